@@ -0,0 +1,320 @@
+"""
+Benchmarks for the pygwig widgets. Builds widget scenes offscreen (dummy video and audio drivers)
+and measures the time and the python allocations of each update/render/handle_events call.
+
+Run it from the repository root:
+    python -m benchmarks.pygwig_bench                  prints the results as JSON
+    python -m benchmarks.pygwig_bench --save-baseline  also saves them as the baseline
+    python -m benchmarks.pygwig_bench --check          exits with 1 if anything got slower than the baseline
+
+The results are compared against the baseline (benchmarks/baseline.json by default) when it exists.
+Baselines only mean something on the machine they were made on, so they aren't committed.
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # no window is needed
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+from types import SimpleNamespace
+import pygame as pg
+from modules.pygwig import (
+        Button,
+        TextBox,
+        MenuImage,
+        MenuAnimation,
+        Menu,
+        Cutscene,
+        CutsceneSlideshow,
+        )
+from modules.utils import create_dialogue_animation
+
+
+SCREEN_SIZE = (640, 360)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def make_image(size: tuple,
+               color: tuple) -> pg.Surface:
+
+    """
+    Returns a filled image with a border, like the button images of the game.
+       size: tuple (required)
+         the size of the image
+       color: tuple (required)
+         the color of the image
+    """
+
+    image = pg.Surface(size).convert()
+    image.fill(color)
+    pg.draw.rect(image, (255, 255, 255), image.get_rect(), 4)
+    return image
+
+
+def make_button_images(size: tuple) -> dict:
+
+    """
+    Returns the image dict of a button.
+       size: tuple (required)
+         the size of the images
+    """
+
+    return {'image': make_image(size, (80, 40, 20)),
+            'hover_image': make_image(size, (160, 80, 40)),
+            'unclickable_image': make_image(size, (40, 20, 10))}
+
+
+def mouse_event(event_type: int,
+                pos: tuple) -> pg.event.Event:
+
+    """
+    Returns a left mouse button event at the position.
+       event_type: int (required)
+         the type of the event (e.g. pygame.MOUSEBUTTONDOWN)
+       pos: tuple (required)
+         the position of the mouse
+    """
+
+    return pg.event.Event(event_type, pos=pos, button=1)
+
+
+def build_cases() -> dict:
+
+    """Builds the scenes and returns the benchmarks in format {name: function to time}."""
+
+    game = SimpleNamespace() # the widgets only pass it to their code
+    surf = pg.Surface(SCREEN_SIZE).convert()
+    font = pg.font.Font(None, 20)
+    cases = {}
+
+    # Button
+    button = Button(game, 1, (100, 100), make_button_images((128, 64)), code=lambda button: None, resize=[0.1, 0.2])
+    away, over = (0, 0), button.rect.center
+    click, motion = mouse_event(pg.MOUSEBUTTONDOWN, over), pg.event.Event(pg.MOUSEMOTION, pos=over, rel=(1, 1), buttons=(0, 0, 0))
+
+    def button_update_hover() -> None:
+        pg.mouse.set_pos(over)
+        button.update(1)
+
+    def button_update_idle() -> None:
+        pg.mouse.set_pos(away)
+        button.update(1)
+
+    cases['button.update.hover'] = button_update_hover
+    cases['button.update.idle'] = button_update_idle
+    cases['button.render'] = lambda: button.render(surf)
+    cases['button.handle_events.click'] = lambda: button.handle_events(click)
+    cases['button.handle_events.motion'] = lambda: button.handle_events(motion)
+
+    # TextBox
+    text_box = TextBox(game, 1, (20, 180), {'image': make_image((600, 44), (3, 3, 3))}, [font, 0, (255, 255, 255), None, 0],
+                       limit=36, text_pos=[8, 8], cursor_blink=30)
+    text_box.focused = 1
+    text_box.text = '1234567890'
+    text_box.cursor_pos = 10
+    typing = (pg.event.Event(pg.TEXTINPUT, text='5'), pg.event.Event(pg.KEYDOWN, key=pg.K_BACKSPACE, mod=0, unicode='\b', scancode=0))
+
+    def text_box_type() -> None:
+        # types a character and deletes it so the text stays the same length
+        text_box.handle_events(typing[0])
+        text_box.update(1)
+        text_box.handle_events(typing[1])
+        text_box.update(1)
+
+    cases['textbox.update'] = lambda: text_box.update(1)
+    cases['textbox.render'] = lambda: text_box.render(surf)
+    cases['textbox.type_and_delete'] = text_box_type
+
+    # MenuImage
+    menu_image = MenuImage((0, 0), make_image((160, 90), (20, 40, 80)), scroll=[[0, 0], [400, 400], 4, 16, 0])
+
+    def menu_image_scroll() -> None:
+        menu_image.wanted_scroll_pos[1] = -menu_image.wanted_scroll_pos[1] or 200 # keeps it moving
+        menu_image.update(1)
+
+    cases['menuimage.update.scroll'] = menu_image_scroll
+    cases['menuimage.render'] = lambda: menu_image.render(surf)
+
+    # MenuAnimation
+    animation = MenuAnimation((0, 0), [make_image((64, 64), (i * 20, 0, 0)) for i in range(12)], 5, running=1)
+    cases['menuanimation.update'] = lambda: animation.update(1)
+    cases['menuanimation.render'] = lambda: animation.render(surf)
+
+    # Menu (like a shop page: a grid of buttons and labels)
+    menu = Menu(game, (pg.Surface(SCREEN_SIZE), 160, (0, 0, 0)), button_list=[
+        *(Button(game, 1, (16 + (dex % 4) * 152, 16 + (dex // 4) * 68), make_button_images((144, 60)), code=lambda button: None)
+          for dex in range(16)),
+        *(MenuImage((24 + (dex % 4) * 152, 24 + (dex // 4) * 68), font.render(f'Item {dex}', 0, (255, 255, 255), (0, 0, 0)), colorkey=(0, 0, 0))
+          for dex in range(16))])
+    menu.on = 1
+    menu_click = mouse_event(pg.MOUSEBUTTONDOWN, menu.button_list[5].rect.center)
+    cases['menu.update'] = lambda: menu.update(1)
+    cases['menu.render'] = lambda: menu.render(surf)
+    cases['menu.get_dirty_rects'] = lambda: menu.get_dirty_rects()
+    cases['menu.handle_events.click'] = lambda: menu.handle_events(menu_click)
+
+    # Cutscene (a dialogue animation that keeps looping)
+    def make_cutscene(text: str) -> Cutscene:
+        dialogue = MenuAnimation((8, 36), create_dialogue_animation(text, [font, 0, (255, 255, 255), (3, 3, 3), 300]), 5)
+        return Cutscene(game, dialogue, background=(pg.Surface(SCREEN_SIZE), None, (3, 3, 3)),
+                        button_list=(MenuImage((4, 4), make_image((300, 120), (40, 80, 40))),))
+
+    cutscene = make_cutscene('Sir Carl Dough III was in his office when he heard the rupture.')
+    cutscene.start_stop(1)
+
+    def cutscene_update() -> None:
+        cutscene.update(1)
+        if not cutscene.button_list[-1].running:
+            cutscene.start_stop(1) # starts the dialogue again
+
+    cases['cutscene.update'] = cutscene_update
+    cases['cutscene.render'] = lambda: cutscene.render(surf)
+
+    # CutsceneSlideshow (fading between slides)
+    slideshow = CutsceneSlideshow(game, [make_cutscene(text) for text in (
+        'Fran Sancisco, Falicornia\n80 Years ago',
+        'He walked outside and saw a giant mound made of... well... brown goop.',
+        'As the owner of Bluever, a shipping company, Sir Dough commanded an idle ship.')], transition_frames=60)
+    slideshow.start_stop(1)
+    slide_keys = (pg.event.Event(pg.KEYDOWN, key=pg.K_RIGHT), pg.event.Event(pg.KEYDOWN, key=pg.K_LEFT))
+    frame = [0]
+
+    def slideshow_update() -> None:
+        # goes forwards and back every 90 frames so there is always a fade going on or starting
+        frame[0] += 1
+        if not frame[0] % 90:
+            slideshow.handle_events(slide_keys[(frame[0] // 90) % 2])
+        slideshow.update(1)
+
+    cases['slideshow.update'] = slideshow_update
+    cases['slideshow.render'] = lambda: slideshow.render(surf)
+
+    return cases
+
+
+def time_case(function: callable,
+              number: int,
+              repeat: int) -> dict:
+
+    """
+    Times a benchmark and measures its python allocations.
+       function: callable (required)
+         the function to time
+       number: int (required)
+         the calls per timing
+       repeat: int (required)
+         the number of timings. the median and the fastest are reported
+    """
+
+    for i in range(number): # warms up caches (scale cache, text renders, etc.)
+        function()
+    timings = []
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        for j in range(number):
+            function()
+        timings.append((time.perf_counter() - start_time) / number * 1e6)
+
+    # tracemalloc only sees python allocations, not the pixels of surfaces (allocated by SDL)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    for i in range(number):
+        function()
+    end_memory, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'us_per_call': round(statistics.median(timings), 3),
+            'min_us_per_call': round(min(timings), 3),
+            'net_bytes_per_call': round((end_memory - start_memory) / number, 1),
+            'peak_bytes': peak_memory - start_memory}
+
+
+def compare(results: dict,
+            baseline: dict,
+            threshold: float) -> dict:
+
+    """
+    Compares results against a baseline. returns {name: (baseline us, us, ratio, verdict)}.
+       results: dict (required)
+         the results of the benchmarks
+       baseline: dict (required)
+         the results of the baseline
+       threshold: float (required)
+         the relative change that counts as faster or slower (e.g. 0.1 for 10%)
+    """
+
+    comparison = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['us_per_call'] / max(baseline[name]['us_per_call'], 1e-9)
+        verdict = 'slower' if ratio > 1 + threshold else 'faster' if ratio < 1 - threshold else 'same'
+        comparison[name] = (baseline[name]['us_per_call'], result['us_per_call'], round(ratio, 3), verdict)
+    return comparison
+
+
+def main() -> int:
+
+    """Runs the benchmarks. returns the exit code."""
+
+    parser = argparse.ArgumentParser(description='Benchmarks the pygwig widgets.')
+    parser.add_argument('--output', help='the file to write the JSON results to (stdout if not given)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='the baseline JSON file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='saves the results as the baseline')
+    parser.add_argument('--check', action='store_true', help='exits with 1 if a benchmark is slower than the baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='the relative change that counts as slower or faster')
+    parser.add_argument('--filter', default='', help='only runs the benchmarks whose name contains this')
+    parser.add_argument('--number', type=int, default=500, help='the calls per timing')
+    parser.add_argument('--repeat', type=int, default=7, help='the number of timings per benchmark')
+    args = parser.parse_args()
+
+    pg.init()
+    pg.display.set_mode(SCREEN_SIZE)
+    results = {}
+    for name, function in build_cases().items():
+        if args.filter in name:
+            results[name] = time_case(function, args.number, args.repeat)
+            print(f'{name:32} {results[name]['us_per_call']:10.2f} us', file=sys.stderr)
+    pg.quit()
+
+    report = {'meta': {'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'python': platform.python_version(),
+                       'pygame': pg.version.ver,
+                       'sdl': '.'.join(str(item) for item in pg.get_sdl_version()),
+                       'platform': platform.platform(),
+                       'number': args.number,
+                       'repeat': args.repeat},
+              'results': results}
+
+    exit_code = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='UTF-8') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        report['comparison'] = {name: dict(zip(('baseline_us', 'us', 'ratio', 'verdict'), values))
+                                for name, values in compare(results, baseline, args.threshold).items()}
+        print(f'\n{'benchmark':32} {'baseline':>10} {'now':>10} {'ratio':>7}', file=sys.stderr)
+        for name, values in report['comparison'].items():
+            print(f'{name:32} {values['baseline_us']:10.2f} {values['us']:10.2f} {values['ratio']:7.3f} {values['verdict']}', file=sys.stderr)
+            if args.check and values['verdict'] == 'slower':
+                exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='UTF-8') as output_file:
+            output_file.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='UTF-8') as baseline_file:
+            baseline_file.write(text)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""Packs the images in data/images into atlases. Run this after changing any image."""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # no window is needed
+import pygame as pg
+from modules.utils import build_atlas
+
+
+if __name__ == '__main__':
+    pg.init()
+    pg.display.set_mode((1, 1)) # convert_alpha() needs a display mode
+    build_atlas()
+    pg.quit()
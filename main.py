@@ -15,6 +15,15 @@ from modules.pygwig import (
         Menu,
         Cutscene,
         CutsceneSlideshow as Slideshow,
+        ParallaxLayer,
+        IndicatorPool,
+        FrameLoop,
+        FrameProfiler,
+        EventRouter,
+        merge_rects,
+        blit_indicators,
+        compile_code,
+        REDRAW_EVENTS,
         )
 
 from modules.utils import (
@@ -25,9 +34,35 @@ from modules.utils import (
         render_rect,
         text_on_big_button,
         render_menu_top_bar,
-        last_index_greater_than_zero,
         create_dialogue_animation,
         arabic_to_roman,
+        LazyAsset,
+        render_text,
+        math_eval,
+        )
+
+from modules.bignumber import BigNumber
+from modules.economy import (
+        TreeFarm,
+        load_save_data,
+        dump_save_data,
+        offline_progress,
+        get_shop_data,
+        can_buy,
+        max_affordable,
+        buy,
+        click_cookie,
+        get_special_cookie_amount,
+        award_special_cookie,
+        update_special_cookie_timer,
+        update_constant_cookies,
+        update_passive_income,
+        auto_harvest,
+        harvest_tree,
+        update_tree_farm,
+        UPGRADE_DATA,
+        UPGRADE_SHOP_KEYS,
+        COOKIE_GROW_SECONDS,
         )
 
 
@@ -41,20 +76,28 @@ class Game(object):
 
     """The main game class of Cookiedough."""
 
-    def __init__(self: object) -> None:
+    def __init__(self: object,
+                 headless: int or bool=0) -> None:
 
-        """Defines all variables and runs all needed functions to initialize Cookiedough."""
+        """
+        Defines all variables and runs all needed functions to initialize Cookiedough.
+           headless: int or bool (not required)
+             if true, the game uses the dummy video and audio drivers (no window or sound device)
+             and is run with Game.step instead of Game.run. the game time only passes when it is stepped
+        """
 
         # Initializations
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
         pg.init()
-        pg.event.set_blocked((pg.MOUSEMOTION,
-                              pg.MOUSEBUTTONUP,
+        # mouse motion and focus changes aren't blocked so that the main loop knows when to idle
+        pg.event.set_blocked((pg.MOUSEBUTTONUP,
 
                               pg.WINDOWMOVED,
                               pg.WINDOWENTER,
                               pg.WINDOWLEAVE,
-                              pg.WINDOWFOCUSLOST,
-                              pg.WINDOWFOCUSGAINED,
         
                               pg.VIDEOEXPOSE,
                               pg.VIDEORESIZE,
@@ -65,22 +108,30 @@ class Game(object):
         self.surface_ratio = (1/4, 1/4)
         self.surface_size = (int(self.screen_size[0] * self.surface_ratio[0]),
                              int(self.screen_size[1] * self.surface_ratio[1]))
-        self.screen = pg.display.set_mode(self.screen_size, flags=pg.RESIZABLE | pg.SCALED, vsync=1)
+        self.screen = pg.display.set_mode(self.screen_size, flags=pg.RESIZABLE | pg.SCALED, vsync=not headless)
         self.surface = pg.Surface(self.surface_size).convert()
         self.game_speed = 60
+        # the loops sleep instead of spinning when vsync isn't available
+        self.frame_cap = pg.display.get_current_refresh_rate() or 60
+        self.dirty_rect_rendering = 1 # only redraws and updates the parts of the screen that changed
         self.second_timer = pg.event.custom_type()
-        pg.time.set_timer(self.second_timer, 1000)
+        if not headless: # Game.step posts it by the game time instead
+            pg.time.set_timer(self.second_timer, 1000)
+        self.headless_time = 0 # the game time that Game.step has ran for
+        self.headless_seconds = 0 # the amount of second timer events Game.step has posted
+        self.headless_cutscenes = [] # the cutscenes that Game.step will run (one at a time), in order
+        self.cutscene_loop = None # the loop of the cutscene that Game.step is running
         pg.display.set_icon(load_img('cookie/cookie.png', (128, 128)))
         pg.display.set_caption('Cookiedough')
 
         # Save data
-        self.save_data = {'score': 0,
-                          'total_baked_cookies': 0,
-                          'cookies_per_second': 0,
-                          'cookies_per_click': 1,
+        self.save_data = {'score': BigNumber(0), # the cookie amounts are BigNumbers (saved as ints, or strings if they are too big)
+                          'total_baked_cookies': BigNumber(0),
+                          'cookies_per_second': BigNumber(0),
+                          'cookies_per_click': BigNumber(1),
                           'cookies_per_day_counter': 0, # counter for each second for cookies per day * the amount of trees
                           'last_logout': time.time(),
-                          'cookie_tree_values': [0] * 11, # Valuse for amount of trees with specified cookies
+                          'cookie_tree_values': TreeFarm(), # Valuse for amount of trees with specified cookies (saved as a list)
                           'auto_harvesters': 0,
                           'last_cutscene': -1, # last cutscene showed; -1 if none have been showed
                           'constant_cookies_level': 0,
@@ -89,7 +140,7 @@ class Game(object):
                           }
         try:
             with open('data/save/save.json', 'r', encoding='UTF-8') as save_file:
-                self.save_data = json.load(save_file)
+                self.save_data = load_save_data(json.load(save_file))
         except FileNotFoundError:
             self.save_save_data_to_file()
 
@@ -154,37 +205,38 @@ class Game(object):
                                'hover_image': load_img('farm/button/tree/tree_hover.png', (128, 128)),
                                'unclickable_image': load_img('farm/button/tree/tree_unclickable.png', (128, 128))}
 
-        self.special_cookie_imgs = ({'image': load_img('cookie/special/stone/stone_cookie.png', (128, 128)),
-                                     'hover_image': load_img('cookie/special/stone/stone_cookie_hover.png', (128, 128))},
-                                    {'image': load_img('cookie/special/bronze/bronze_cookie.png', (128, 128)),
-                                     'hover_image': load_img('cookie/special/bronze/bronze_cookie_hover.png', (128, 128))},
-                                    {'image': load_img('cookie/special/silver/silver_cookie.png', (128, 128)),
-                                     'hover_image': load_img('cookie/special/silver/silver_cookie_hover.png', (128, 128))},
-                                    {'image': load_img('cookie/special/gold/gold_cookie.png', (128, 128)),
-                                     'hover_image': load_img('cookie/special/gold/gold_cookie_hover.png', (128, 128))},
-                                    {'image': load_img('cookie/special/emerald/emerald_cookie.png', (128, 128)),
-                                     'hover_image': load_img('cookie/special/emerald/emerald_cookie_hover.png', (128, 128))})
-
-        self.special_cookie_eating_animation_imgs = ([load_img('cookie/special/stone/bite/stone_bite_1.png', (128, 128)),
-                                                      load_img('cookie/special/stone/bite/stone_bite_2.png', (128, 128)),
-                                                      load_img('cookie/special/stone/bite/stone_bite_3.png', (128, 128)),
-                                                      load_img('cookie/special/stone/bite/stone_bite_4.png', (128, 128))],
-                                                     [load_img('cookie/special/bronze/bite/bronze_bite_1.png', (128, 128)),
-                                                      load_img('cookie/special/bronze/bite/bronze_bite_2.png', (128, 128)),
-                                                      load_img('cookie/special/bronze/bite/bronze_bite_3.png', (128, 128)),
-                                                      load_img('cookie/special/bronze/bite/bronze_bite_4.png', (128, 128))],
-                                                     [load_img('cookie/special/silver/bite/silver_bite_1.png', (128, 128)),
-                                                      load_img('cookie/special/silver/bite/silver_bite_2.png', (128, 128)),
-                                                      load_img('cookie/special/silver/bite/silver_bite_3.png', (128, 128)),
-                                                      load_img('cookie/special/silver/bite/silver_bite_4.png', (128, 128))],
-                                                     [load_img('cookie/special/gold/bite/gold_bite_1.png', (128, 128)),
-                                                      load_img('cookie/special/gold/bite/gold_bite_2.png', (128, 128)),
-                                                      load_img('cookie/special/gold/bite/gold_bite_3.png', (128, 128)),
-                                                      load_img('cookie/special/gold/bite/gold_bite_4.png', (128, 128))],
-                                                     [load_img('cookie/special/emerald/bite/emerald_bite_1.png', (128, 128)),
-                                                      load_img('cookie/special/emerald/bite/emerald_bite_2.png', (128, 128)),
-                                                      load_img('cookie/special/emerald/bite/emerald_bite_3.png', (128, 128)),
-                                                      load_img('cookie/special/emerald/bite/emerald_bite_4.png', (128, 128))])
+        # only the tier the player has is used, so the tiers are loaded when they are first shown
+        self.special_cookie_imgs = ({'image': LazyAsset('cookie/special/stone/stone_cookie.png', (128, 128)),
+                                     'hover_image': LazyAsset('cookie/special/stone/stone_cookie_hover.png', (128, 128))},
+                                    {'image': LazyAsset('cookie/special/bronze/bronze_cookie.png', (128, 128)),
+                                     'hover_image': LazyAsset('cookie/special/bronze/bronze_cookie_hover.png', (128, 128))},
+                                    {'image': LazyAsset('cookie/special/silver/silver_cookie.png', (128, 128)),
+                                     'hover_image': LazyAsset('cookie/special/silver/silver_cookie_hover.png', (128, 128))},
+                                    {'image': LazyAsset('cookie/special/gold/gold_cookie.png', (128, 128)),
+                                     'hover_image': LazyAsset('cookie/special/gold/gold_cookie_hover.png', (128, 128))},
+                                    {'image': LazyAsset('cookie/special/emerald/emerald_cookie.png', (128, 128)),
+                                     'hover_image': LazyAsset('cookie/special/emerald/emerald_cookie_hover.png', (128, 128))})
+
+        self.special_cookie_eating_animation_imgs = ([LazyAsset('cookie/special/stone/bite/stone_bite_1.png', (128, 128)),
+                                                      LazyAsset('cookie/special/stone/bite/stone_bite_2.png', (128, 128)),
+                                                      LazyAsset('cookie/special/stone/bite/stone_bite_3.png', (128, 128)),
+                                                      LazyAsset('cookie/special/stone/bite/stone_bite_4.png', (128, 128))],
+                                                     [LazyAsset('cookie/special/bronze/bite/bronze_bite_1.png', (128, 128)),
+                                                      LazyAsset('cookie/special/bronze/bite/bronze_bite_2.png', (128, 128)),
+                                                      LazyAsset('cookie/special/bronze/bite/bronze_bite_3.png', (128, 128)),
+                                                      LazyAsset('cookie/special/bronze/bite/bronze_bite_4.png', (128, 128))],
+                                                     [LazyAsset('cookie/special/silver/bite/silver_bite_1.png', (128, 128)),
+                                                      LazyAsset('cookie/special/silver/bite/silver_bite_2.png', (128, 128)),
+                                                      LazyAsset('cookie/special/silver/bite/silver_bite_3.png', (128, 128)),
+                                                      LazyAsset('cookie/special/silver/bite/silver_bite_4.png', (128, 128))],
+                                                     [LazyAsset('cookie/special/gold/bite/gold_bite_1.png', (128, 128)),
+                                                      LazyAsset('cookie/special/gold/bite/gold_bite_2.png', (128, 128)),
+                                                      LazyAsset('cookie/special/gold/bite/gold_bite_3.png', (128, 128)),
+                                                      LazyAsset('cookie/special/gold/bite/gold_bite_4.png', (128, 128))],
+                                                     [LazyAsset('cookie/special/emerald/bite/emerald_bite_1.png', (128, 128)),
+                                                      LazyAsset('cookie/special/emerald/bite/emerald_bite_2.png', (128, 128)),
+                                                      LazyAsset('cookie/special/emerald/bite/emerald_bite_3.png', (128, 128)),
+                                                      LazyAsset('cookie/special/emerald/bite/emerald_bite_4.png', (128, 128))])
 
         self.constant_shop_gui_img = load_img('shop/constant_gui.png', (self.screen_size[0], self.screen_size[1] - 64))
         self.main_menu_background = load_img('main_menu/main_menu_background.png', self.screen_size)
@@ -270,33 +322,20 @@ class Game(object):
                 Button(self, 1, (456, 8), self.switch_imgs[1], code=left_arrow_code),
             ]),
             ]
-        # upgrade shop data V
-        # first list is Special cookies (price first, then name of cookie), second is constant cookies 
-        self.upgrade_data = [[(10**6, 'Stone'), (10**9, 'Bronze'), (10**12, 'Silver'), (10**15, 'Gold'), (10**18, 'Emerald')],
-                             [(10**6, 6, 30), (10**9, 6, 25), (10**12, 5, 25), (10**15, 5, 20), (10**18, 4, 20),
-                              (10**21, 4, 15), (10**24, 3, 15), (10**27, 3, 10), (10**30, 2, 10), (10**33, 2, 5)]]
-        # overall shop data V
+        # the shop's prices and upgrade tiers are in modules/economy.py
+        self.upgrade_data = UPGRADE_DATA
         # the first 2 indexes are for menus, the indexes inside of them is for the items; the first index in the item is the cost and the second index in the item is the value of what it gives,  and the third is what it gives (in save data terms)
-        self.shop_data = [[(100, 1, 'auto_harvesters'), (100, 10, 'cookie_tree_values'), (10, 1, 'cookies_per_click'), (25, 1, 'cookies_per_second')],
-                          [[self.upgrade_data[0][self.save_data['special_cookies_level']][0] if self.save_data['special_cookies_level'] < len(self.upgrade_data[0]) else 0, 1, 'special_cookies_level'],
-                           [self.upgrade_data[1][self.save_data['constant_cookies_level']][0] if self.save_data['constant_cookies_level'] < len(self.upgrade_data[1]) else 0, 1, 'constant_cookies_level']]
-                          ]
-
-        buy_button_code = 'self.game.save_data["score"] -= self.game.shop_data[self.game.current_shop_menu[0]][self.game.current_shop_menu[1]][0]' \
-                          ' * (1 if self.game.current_shop_menu[0] else self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]])\n' \
-                          'self.game.save_data[self.game.shop_data[self.game.current_shop_menu[0]][self.game.current_shop_menu[1]][2]] += self.game.shop_data[self.game.current_shop_menu[0]][self.game.current_shop_menu[1]][1]' \
-                          ' * (1 if self.game.current_shop_menu[0] else self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]])\n' \
-                          'self.game.update_score_render(); self.game.set_button_clickable()'
+        self.shop_data = get_shop_data(self.save_data)
+
+        buy_button_code = 'self.game.buy_item()'
         
         # meant to only be executed in the item shop, not the upgrade shop
-        bulk_button_code = 'text = scientific_notation(self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]], self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]] >= 1000000000)\n' \
+        bulk_button_code = 'text = self.game.get_bulk_buy_text()\n' \
                            'self.game.bulk_buy_menu.button_list[1].text = text\n' \
                            'self.game.bulk_buy_menu.button_list[1].cursor_pos = len(text); self.game.bulk_buy_menu.on = 1;\n' \
                            'pg.key.set_repeat(400, 60); pg.key.start_text_input()\n' \
                            'for i in range(1, 3): self.game.shop_button_menu_list[self.game.current_shop_menu[0]][self.game.current_shop_menu[1]].button_list[i].clickable = 0'
 
-        buy_button_code_split = buy_button_code.splitlines() # for tree buy button code
-
         
 
         self.shop_button_menu_list = [
@@ -330,7 +369,7 @@ class Game(object):
                     Button(self, 1, (-((448 - (self.buy_button_imgs['image'].get_width() + self.buy_button_number_imgs['image'].get_width(
                         # adding 16 for the gap in between the buttons
                     ) + 16)) // -2), 328), self.buy_button_imgs, scroll=[(0, 0), (0, 64), 4, 32, pg.Rect(0, 64, 448, 296)],
-                           code=f'{buy_button_code_split[0]}; self.game.save_data["cookie_tree_values"][0] += self.game.config_data["item_shop_buy_numbers"][1]; {buy_button_code_split[2]}'),
+                           code=buy_button_code),
 
                     Button(self, 1, (-((448 - (self.buy_button_imgs['image'].get_width() + self.buy_button_number_imgs['image'].get_width() + 16)) // -2) +
                                      self.buy_button_imgs['image'].get_width() + 16, 328), self.buy_button_number_imgs, scroll=[(0, 0), (0, 64), 4, 32, pg.Rect(0, 64, 448, 296)], code=bulk_button_code),
@@ -345,7 +384,7 @@ class Game(object):
 
                     Button(self, 1, (-((448 - (self.buy_button_imgs['image'].get_width() + self.buy_button_number_imgs['image'].get_width(
                     ) + 16)) // -2), 328), self.buy_button_imgs, scroll=[(0, 0), (0, 64), 4, 32, pg.Rect(0, 64, 448, 296)],
-                           code=f'self.game.normal_indicator_texts[0] = pg.transform.scale_by(self.game.small_font.render(f"+{{scientific_notation(self.game.save_data["cookies_per_click"], self.game.save_data["cookies_per_click"] >= 1000000)}}", 0, (255, 255, 255), wraplength=32, bgcolor=(0, 0, 0)), (4, 4)); {buy_button_code}'),
+                           code=buy_button_code),
 
                     Button(self, 1, (-((448 - (self.buy_button_imgs['image'].get_width() + self.buy_button_number_imgs['image'].get_width() + 16)) // -2) +
                                      self.buy_button_imgs['image'].get_width() + 16, 328), self.buy_button_number_imgs, scroll=[(0, 0), (0, 64), 4, 32, pg.Rect(0, 64, 448, 296)], code=bulk_button_code),
@@ -354,16 +393,14 @@ class Game(object):
                 Menu(self, button_list=[
                     MenuImage((0, 64), center_word_on_image(render_rect((0, 0, 0), pg.Rect(0, 64, 448, 296)), self.surface_ratio[0]**-1,
                                                             [self.font.render('Perpetual Cog', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),
-                                                             self.small_font.render('An infinitely running cog that can power ovens indefinitely. Only works while you are online. These are produced by Orpantine Inventions Limited.',
+                                                             self.small_font.render('An infinitely running cog that can power ovens indefinitely, even while you are offline. These are produced by Orpantine Inventions Limited.',
                                                                                     0, (255, 255, 255), bgcolor=(0, 0, 0), wraplength=104),
                                                              self.font.render(f'Costs {self.shop_data[0][3][0]} cookies.', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0))],
                                                             pos=['center', 0]), scroll=[(0, 0), (0, 64), 4, 32, pg.Rect(0, 64, 448, 296)]),
 
                     Button(self, 1, (-((448 - (self.buy_button_imgs['image'].get_width() + self.buy_button_number_imgs['image'].get_width(
                     ) + 16)) // -2), 328), self.buy_button_imgs, scroll=[(0, 0), (0, 64), 4, 32, pg.Rect(0, 64, 448, 296)],
-                           code='self.game.save_data["cookies_per_click"] -= self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]]\n' \
-                                'self.game.normal_indicator_texts = [pg.transform.scale_by(self.game.small_font.render(f"+{scientific_notation(self.game.save_data["cookies_per_click"], self.game.save_data["cookies_per_click"] >= 1000000)}", 0, (255, 255, 255), wraplength=32, bgcolor=(0, 0, 0)), (4, 4)),\n' \
-                                                            f'pg.transform.scale_by(self.game.small_font.render(f"+{{scientific_notation(self.game.save_data["cookies_per_second"], self.game.save_data["cookies_per_second"] >= 1000000)}}", 0, (255, 255, 255), wraplength=32, bgcolor=(0, 0, 0)), (4, 4))]; {buy_button_code}'),
+                           code=buy_button_code),
 
                     Button(self, 1, (-((448 - (self.buy_button_imgs['image'].get_width() + self.buy_button_number_imgs['image'].get_width() + 16)) // -2) +
                                      self.buy_button_imgs['image'].get_width() + 16, 328), self.buy_button_number_imgs, scroll=[(0, 0), (0, 64), 4, 32, pg.Rect(0, 64, 448, 296)], code=bulk_button_code),
@@ -372,45 +409,22 @@ class Game(object):
             ],
             [
                 Menu(self, button_list=[
-                    MenuImage((0, 64), center_word_on_image(render_rect((0, 0, 0), pg.Rect(0, 64, 448, 400)), self.surface_ratio[0]**-1,
-                                                            [self.font.render('Special Cookies', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),
-                                                             self.small_font.render('Special cookies are cookies that appear rarely. When one is clicked, it gives much more cookies than when you click the normal cookie.', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),
-                                                             self.font_center.render(f'Current Tier:\n{arabic_to_roman(self.save_data['special_cookies_level'])}. {(self.upgrade_data[0][self.save_data['special_cookies_level'] - 1][1] if self.save_data['special_cookies_level'] else 'No Special')} Cookie\n' \
-                                                                                     f'{f'Next Tier Cost:\n{scientific_notation(self.shop_data[1][0][0], self.shop_data[1][0][0] >= 10**6)} Cookies' if self.save_data['special_cookies_level'] < len(self.upgrade_data[0]) else 'You are at the maximum tier.'}', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0))],
-                                                            pos=['center', 0]), scroll=[(0, 0), (0, 208), 4, 32, pg.Rect(0, 64, 448, 296)]),
-                                                            
+                    MenuImage((0, 64), self.render_upgrade_panel(0), scroll=[(0, 0), (0, 208), 4, 32, pg.Rect(0, 64, 448, 296)]),
+
                     Button(self, 1, (-((448 - self.buy_button_imgs['image'].get_width()) // -2), 472), self.buy_button_imgs, scroll=[(0, 0), (0, 208), 4, 32, pg.Rect(0, 64, 448, 296)],
-                           code=f'{buy_button_code}; self.game.shop_data[1][0][0] = self.game.upgrade_data[0][self.game.save_data["special_cookies_level"]][0] if self.game.save_data["special_cookies_level"] < len(self.game.upgrade_data[0]) else 0\n' \
+                           code=f'{buy_button_code}\n' \
+                                 'self.game.special_cookie.release(); self.game.special_cookie_eating_animation.release()\n' \
                                  'self.game.special_cookie.images = self.game.special_cookie_imgs[self.game.save_data["special_cookies_level"] - 1] \n' \
                                  'self.game.special_cookie_eating_animation.images = self.game.special_cookie_eating_animation_imgs[self.game.save_data["special_cookies_level"] - 1]\n' \
-                                 'self.game.shop_button_menu_list[1][0].button_list[0].image = ' \
-                                 'center_word_on_image(render_rect((0, 0, 0), pg.Rect(0, 64, 448, 400)), self.game.surface_ratio[0]**-1,\n' \
-                                                      '[self.game.font.render("Special Cookies", 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),\n' \
-                                                       'self.game.small_font.render("Special cookies are cookies that appear rarely. When one is clicked, it gives much more cookies than when you click the normal cookie.", 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),\n' \
-                                                       'self.game.font_center.render(f"Current Tier:\\n{arabic_to_roman(self.game.save_data["special_cookies_level"])}. {(self.game.upgrade_data[0][self.game.save_data["special_cookies_level"] - 1][1] if self.game.save_data["special_cookies_level"] else "No Special")} Cookie\\n"' \
-                                                                                    'f"{(f"Next Tier Cost:\\n{scientific_notation(self.game.shop_data[1][0][0], self.game.shop_data[1][0][0] >= 10**6)} Cookies" if self.game.save_data["special_cookies_level"] < len(self.game.upgrade_data[0]) else "You are at the maximum tier.")}", 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0))],'
-                                                      'pos=["center", 0])'),
+                                 'self.game.shop_button_menu_list[1][0].button_list[0].image = self.game.render_upgrade_panel(0)'),
 
                 ]),
                 Menu(self, button_list=[
-                    MenuImage((0, 64), center_word_on_image(render_rect((0, 0, 0), pg.Rect(0, 64, 448, 400)), self.surface_ratio[0]**-1,
-                                                            [self.font.render('Constant Cookies', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),
-                                                             self.small_font.render('Constant Cookie bonuses are given when you click the cookie consistently over a certain amount of time.', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),
-                                                             self.font_center.render(f'Current Tier:\n{arabic_to_roman(self.save_data['constant_cookies_level'])}. {f'Bonus awarded if you click {self.upgrade_data[1][self.save_data['constant_cookies_level'] - 1][1]} clicks per second for {self.upgrade_data[1][self.save_data['constant_cookies_level'] - 1][2]} seconds.'
-                                                                                     if self.save_data['constant_cookies_level'] else 'No Bonuses Possible.'}\n{f'Next Tier Cost:\n{scientific_notation(self.shop_data[1][1][0], self.shop_data[1][1][0] >= 10**6)} Cookies'
-                                                                                     if self.save_data['constant_cookies_level'] < len(self.upgrade_data[1]) else 'You are at the maximum tier.'}', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0))],
-                                                            pos=['center', 0]), scroll=[(0, 0), (0, 208), 4, 32, pg.Rect(0, 64, 448, 296)]),
+                    MenuImage((0, 64), self.render_upgrade_panel(1), scroll=[(0, 0), (0, 208), 4, 32, pg.Rect(0, 64, 448, 296)]),
 
                     Button(self, 1, (-((448 - self.buy_button_imgs['image'].get_width()) // -2), 472), self.buy_button_imgs, scroll=[(0, 0), (0, 208), 4, 32, pg.Rect(0, 64, 448, 296)],
-                           code=f'{buy_button_code}; self.game.shop_data[1][1][0] = self.game.upgrade_data[1][self.game.save_data["constant_cookies_level"]][0] if self.game.save_data["constant_cookies_level"] < len(self.game.upgrade_data[1]) else 0\n' \
-                                 'self.game.shop_button_menu_list[1][1].button_list[0].image = ' \
-                                 'center_word_on_image(render_rect((0, 0, 0), pg.Rect(0, 64, 448, 400)), self.game.surface_ratio[0]**-1,\n' \
-                                                     '[self.game.font.render("Constant Cookies", 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),\n' \
-                                                      'self.game.small_font.render("Constant Cookie bonuses are given when click the cookie consistently over a certain amount of time.", 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),\n' \
-                                                      'self.game.font_center.render(f"Current Tier:\\n{arabic_to_roman(self.game.save_data["constant_cookies_level"])}. {f"Bonus awarded if you click {self.game.upgrade_data[1][self.game.save_data["constant_cookies_level"] - 1][1]} clicks per second for {self.game.upgrade_data[1][self.game.save_data["constant_cookies_level"] - 1][2]} seconds."\n' \
-                                                                                   'if self.game.save_data["constant_cookies_level"] else "No Bonuses Possible."}\\n{f"Next Tier Cost:\\n{scientific_notation(self.game.shop_data[1][1][0], self.game.shop_data[1][1][0] >= 10**6)} Cookies"\n' \
-                                                                                   'if self.game.save_data["constant_cookies_level"] < len(self.game.upgrade_data[1]) else "You are at the maximum tier."}", 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0))],\n' \
-                                                     'pos=["center", 0])')
+                           code=f'{buy_button_code}\n' \
+                                 'self.game.shop_button_menu_list[1][1].button_list[0].image = self.game.render_upgrade_panel(1)')
                 ]),
             ],
         ]
@@ -423,12 +437,8 @@ class Game(object):
         # a variable telling the index which menu is on. the first number is the shop that is open, and the second is the menu that is opened.
         self.current_shop_menu = [0, 2]
         # Cookie
-        self.cookie = Button(self, 1, (96, 88), self.cookie_imgs, code='self.game.save_data["score"] += self.game.save_data["cookies_per_click"]\n' \
-                                                                       'self.game.save_data["total_baked_cookies"] += self.game.save_data["cookies_per_click"]\n' \
-                                                                       'self.game.update_score_render()\n' \
-                                                                       'self.game.constant_cookies_stats[0] += 1 if self.game.save_data["constant_cookies_level"] else 0\n' \
-                                                                       'self.game.cookie_indicators.append(MenuImage(((pg.mouse.get_pos()[0] - self.game.normal_indicator_texts[0].get_width() / 2) // self.game.surface_ratio[0]**-1 * self.game.surface_ratio[0]**-1,\n' \
-                                                                                                                     '(pg.mouse.get_pos()[1] - self.game.normal_indicator_texts[0].get_height()) // self.game.surface_ratio[0]**-1 * self.game.surface_ratio[0]**-1), self.game.normal_indicator_texts[0].copy(), colorkey=(0, 0, 0)))')
+        # the cookie is clicked the most (autoclickers), so its code is a method instead of a code string
+        self.cookie = Button(self, 1, (96, 88), self.cookie_imgs, code=self.click_cookie)
         self.special_cookie = Button(self, 0, (640, 116), self.special_cookie_imgs[self.save_data['special_cookies_level'] - 1], code='self.game.update_score_render()\n' \
                                                                                                                                       'self.game.special_cookie_state = 2\n' \
                                                                                                                                       'self.game.special_cookie_eating_animation.render_pos = list(self.game.special_cookie.render_pos)\n' \
@@ -438,23 +448,24 @@ class Game(object):
 
         self.special_cookie_eating_animation = Animation((0, 0), self.special_cookie_eating_animation_imgs[self.save_data['special_cookies_level'] - 1], 15, update_style='disappear')
 
-        self.special_cookie_cookiefall = Menu(self, button_list=[MenuImage((0, 0), load_img('cookie/special/cookiefall/back.png', (640, 1440))),
-                                                                 MenuImage((0, 0), load_img('cookie/special/cookiefall/middle.png', (640, 2160))),
-                                                                 MenuImage((0, 0), load_img('cookie/special/cookiefall/front.png', (640, 2880)))])
+        # the layers are kept unscaled; only the part on the screen is scaled
+        self.special_cookie_cookiefall = Menu(self, button_list=[ParallaxLayer((0, 0), load_img('cookie/special/cookiefall/back.png', (160, 360)), int(self.surface_ratio[0]**-1), self.screen_size),
+                                                                 ParallaxLayer((0, 0), load_img('cookie/special/cookiefall/middle.png', (160, 540)), int(self.surface_ratio[0]**-1), self.screen_size),
+                                                                 ParallaxLayer((0, 0), load_img('cookie/special/cookiefall/front.png', (160, 720)), int(self.surface_ratio[0]**-1), self.screen_size)])
 
         self.special_cookie_state = 0
 
         # below, in the codes, i use int() twice just in case (becaues i use max())
         self.bulk_buy_menu = Menu(self, (pg.Surface(self.screen_size), 160, (0, 0, 0)), button_list=[
             MenuImage((f'{self.screen_size[0]};{int(self.surface_ratio[0]**-1)}', 64), small_font_scaled.render(
-                'Enter the amount (number or mathematical expression) to buy when pressing the "buy" button.', 0, (255, 255, 255), bgcolor=(0, 0, 0), wraplength=592), colorkey=(0, 0, 0)),
+                'Enter the amount (number or mathematical expression) to buy when pressing the "buy" button, or "max" to buy as many as you can.', 0, (255, 255, 255), bgcolor=(0, 0, 0), wraplength=592), colorkey=(0, 0, 0)),
 
             TextBox(self, 1, (20, 180), {'image': render_rect((3, 3, 3), pg.Rect(0, 0, 600, 44), outline_color=(255, 255, 255), outline_width=4)}, [
-                    small_font_scaled, 0, (255, 255, 255), None, 0], limit=36, text_pos=[8, 0], enter_code='self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]] = int((max(math_eval(self.text, 1, int), 1))); self.text = scientific_notation(math_eval(self.text, 1, int));'),
+                    small_font_scaled, 0, (255, 255, 255), None, 0], limit=36, text_pos=[8, 0], cursor_blink=30, enter_code='self.game.set_bulk_buy_amount(self.text); self.text = self.game.get_bulk_buy_text(); self.cursor_pos = len(self.text)'),
             Button(self, 1, (-((self.screen_size[0] - (self.save_button_imgs['image'].get_width() + self.clear_button_imgs['image'].get_width(
                 # save button
-            ) + 16)) // -2), 240), self.save_button_imgs, code='self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]] = int(max(math_eval(self.game.bulk_buy_menu.button_list[1].text, 1, int), 1)); self.game.save_config_data_to_file()\n' \
-                                                               'self.game.bulk_buy_menu.button_list[1].text = scientific_notation(self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]], self.game.config_data["item_shop_buy_numbers"][self.game.current_shop_menu[1]] >= 1000000)'),
+            ) + 16)) // -2), 240), self.save_button_imgs, code='self.game.set_bulk_buy_amount(self.game.bulk_buy_menu.button_list[1].text); self.game.save_config_data_to_file()\n' \
+                                                               'self.game.bulk_buy_menu.button_list[1].text = self.game.get_bulk_buy_text()'),
 
             Button(self, 1, (-((self.screen_size[0] - (self.save_button_imgs['image'].get_width() + self.clear_button_imgs['image'].get_width() + 16)) // -2) + self.save_button_imgs['image'].get_width() + 16, 240),
                    # clear button
@@ -469,16 +480,7 @@ class Game(object):
             ])
 
         # code for trees in farm
-        self.tree_code = 'for button in self.game.farm_menu.button_list[self.game.farm_menu.button_list.index(self):]: button.render_pos[0] = button.pos[0] + 160\n' \
-                         'cookies_gained = last_index_greater_than_zero(self.game.save_data["cookie_tree_values"])\n' \
-                         'if sum(self.game.save_data["cookie_tree_values"][1:]) <= 4: del self.game.farm_menu.button_list[-1]\n' \
-                         'self.game.save_data["score"] += cookies_gained\n' \
-                         'self.game.save_data["total_baked_cookies"] += cookies_gained\n' \
-                         'self.game.save_data["cookie_tree_values"][cookies_gained] -= 1\n' \
-                         'self.game.save_data["cookie_tree_values"][0] += 1\n' \
-                         'self.game.update_tree_farm()\n' \
-                         'self.game.update_score_render()'
-         # for 2nd line ^: removes a full day if greater;  rest if less
+        self.tree_code = self.click_tree
 
         self.farm_menu = Menu(self, (pg.Surface(self.screen_size), 160, (0, 0, 0)), button_list=[
             # Top bar with text
@@ -496,37 +498,17 @@ class Game(object):
                 'If there are no trees, none have grown yet.', 0, (255, 255, 255), bgcolor=(0, 0, 0), wraplength=640), colorkey=(0, 0, 0)),
 
             ])
-        self.cookie_grow_seconds = 8640 # the amount of seconds for one cookie to grow in cookie trees
+        self.cookie_grow_seconds = COOKIE_GROW_SECONDS # the amount of seconds for one cookie to grow in cookie trees
 
         # Cookies per day check
-        trees = sum(self.save_data['cookie_tree_values'])
-        if trees:
-            self.save_data['cookies_per_day_counter'] += int(time.time() - self.save_data['last_logout'])
-            counter = divmod(int(self.save_data['cookies_per_day_counter']), int(self.cookie_grow_seconds))
-            # ^ first is the number of max iterations, next is the cookies_per_day_coounter after procesesing
-
-            if self.save_data['auto_harvesters']:
-                # tree_value_loop_list is a list that the tree list will eventually become when shifted and harvested enough times
-                # this is so that there is not that much unnecessary iterating (1.7 sec to 0.004 sec)
-                # after the iteration, I change the score using a calculation
-                tree_value_loop_list = [0] * 11
-                auto_harvester_numbers_in_list = min(10, trees // self.save_data['auto_harvesters'])
-                for i in range(auto_harvester_numbers_in_list):
-                    tree_value_loop_list[i] = self.save_data['auto_harvesters']
-                tree_value_loop_list[auto_harvester_numbers_in_list] = max(trees % self.save_data['auto_harvesters'], trees - self.save_data['auto_harvesters'] * 10)
-
-                for i in range(counter[0]):
-                    self.shift_tree_farm()
-                    self.auto_harvest(change_score=0)
-                    if self.save_data['cookie_tree_values'] == tree_value_loop_list:
-                        break
-                self.save_data['score'] += min(self.save_data['auto_harvesters'], trees) * counter[0]
-                self.save_data['total_baked_cookies'] += min(self.save_data['auto_harvesters'], trees) * counter[0]
-            else:
-                for i in range(min(counter[0], 10)):
-                    self.shift_tree_farm()
-
-            self.save_data['cookies_per_day_counter'] = counter[1]
+        if self.save_data['cookie_tree_values'].trees or self.save_data['cookies_per_second']:
+            # the trees grow and are auto harvested once for every cookie_grow_seconds that passed, and the perpetual cogs
+            # bake the passive income for every second (it takes the same time for any amount)
+            self.save_data['cookie_tree_values'], cookies, self.save_data['cookies_per_day_counter'] = offline_progress(
+                    self.save_data['cookie_tree_values'], self.save_data['auto_harvesters'], int(time.time() - self.save_data['last_logout']),
+                    int(self.save_data['cookies_per_day_counter']), self.cookie_grow_seconds, self.save_data['cookies_per_second'])
+            self.save_data['score'] += cookies
+            self.save_data['total_baked_cookies'] += cookies
             self.update_tree_farm()
         self.update_score_render()
         
@@ -541,23 +523,23 @@ class Game(object):
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 68), create_dialogue_animation(
                         'Sir Carl Dough III was in his office when he heard the rupture.',
                         [small_font_center, 0, (255, 255, 255), (3, 3, 3), 144]), 5), sound=self.sfx['dialogue'], background=(pg.Surface(self.surface.get_size()), None, (3, 3, 3)),
-                             button_list=(MenuImage((4, 4), load_img('cutscenes/intro/1.png', (152, 60))),)),
+                             button_list=(MenuImage((4, 4), LazyAsset('cutscenes/intro/1.png', (152, 60))),)),
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 59), create_dialogue_animation(
                         'He walked outside and saw a giant mound made of... well... brown goop. It seemed to grow out of the water.',
                         [small_font_center, 0, (255, 255, 255), (3, 3, 3), 144]), 5), sound=self.sfx['dialogue'], background=(pg.Surface(self.surface.get_size()), None, (3, 3, 3)),
-                             button_list=(MenuImage((4, 4), load_img('cutscenes/intro/2.png', (152, 51))),)),
+                             button_list=(MenuImage((4, 4), LazyAsset('cutscenes/intro/2.png', (152, 51))),)),
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 59), create_dialogue_animation(
                         'As the owner of Bluever, a shipping company, Sir Dough commanded an idle ship to figure out what the mound was.',
                         [small_font_center, 0, (255, 255, 255), (3, 3, 3), 144]), 5), sound=self.sfx['dialogue'], background=(pg.Surface(self.surface.get_size()), None, (3, 3, 3)),
-                             button_list=(MenuImage((4, 4), load_img('cutscenes/intro/3.png', (152, 51))),)),
+                             button_list=(MenuImage((4, 4), LazyAsset('cutscenes/intro/3.png', (152, 51))),)),
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 59), create_dialogue_animation(
                         'While most thought it was poop, one brave mariner decided to go near it. He discovered that it was cookiedough.',
                         [small_font_center, 0, (255, 255, 255), (3, 3, 3), 144]), 5), sound=self.sfx['dialogue'], background=(pg.Surface(self.surface.get_size()), None, (3, 3, 3)),
-                             button_list=(MenuImage((4, 4), load_img('cutscenes/intro/4.png', (152, 51))),)),
+                             button_list=(MenuImage((4, 4), LazyAsset('cutscenes/intro/4.png', (152, 51))),)),
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 59), create_dialogue_animation(
                         'Sir Dough immediately started forming a cookie empire with his all-new salt-water cookies.',
                         [small_font_center, 0, (255, 255, 255), (3, 3, 3), 144]), 5), sound=self.sfx['dialogue'], background=(pg.Surface(self.surface.get_size()), None, (3, 3, 3)),
-                             button_list=(MenuImage((4, 4), load_img('cutscenes/intro/5.png', (152, 51))),)),
+                             button_list=(MenuImage((4, 4), LazyAsset('cutscenes/intro/5.png', (152, 51))),)),
 
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 36), create_dialogue_animation(
                         'Fran Sancisco, Falicornia\nPresent Day',
@@ -565,15 +547,15 @@ class Game(object):
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 59), create_dialogue_animation(
                         'Cookies are now a currency used everywhere around the world. Dough\'s Salt-water Cookies are worth the most.',
                         [small_font_center, 0, (255, 255, 255), (3, 3, 3), 144]), 5), sound=self.sfx['dialogue'], background=(pg.Surface(self.surface.get_size()), None, (3, 3, 3)),
-                             button_list=(MenuImage((4, 4), load_img('cutscenes/intro/7.png', (152, 51))),)),
+                             button_list=(MenuImage((4, 4), LazyAsset('cutscenes/intro/7.png', (152, 51))),)),
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 59), create_dialogue_animation(
                         'You have just inherited Sir Dough\'s empire, as the grandson of the legendary Sir Carl Dough III.',
                         [small_font_center, 0, (255, 255, 255), (3, 3, 3), 144]), 5), sound=self.sfx['dialogue'], background=(pg.Surface(self.surface.get_size()), None, (3, 3, 3)),
-                             button_list=(MenuImage((4, 4), load_img('cutscenes/intro/8.png', (152, 51))),)),
+                             button_list=(MenuImage((4, 4), LazyAsset('cutscenes/intro/8.png', (152, 51))),)),
                     Cutscene(self, Animation((f'{self.surface_size[0]};1', 59), create_dialogue_animation(
                         'All his machines mysteriously exploded before he passed away, though, so you have to start fresh.',
                         [small_font_center, 0, (255, 255, 255), (3, 3, 3), 144]), 5), sound=self.sfx['dialogue'], background=(pg.Surface(self.surface.get_size()), None, (3, 3, 3)),
-                             button_list=(MenuImage((4, 4), load_img('cutscenes/intro/9.png', (152, 51))),)),
+                             button_list=(MenuImage((4, 4), LazyAsset('cutscenes/intro/9.png', (152, 51))),)),
 
                     ), control_keys=(pg.K_RIGHT, pg.K_LEFT, pg.K_ESCAPE), transition_frames=60, auto_time=69, finish_code=cutscene_finish_code),
                 
@@ -588,21 +570,46 @@ class Game(object):
         # the hierarchy of pressing escape. if bulk buy menu and item shop are both open, bulk buy menu closes when escape is pressed
         # highest index will close last
         # only for menus that close individually. if there are sub menus that close alongisde a menu, put that in the code
-        self.menu_hierarchy = (((self.bulk_buy_menu, 'self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].button_list[2].clickable = 1; self.set_button_clickable(); pg.key.stop_text_input()'),),
-                               ((self.shop_list[0], 'self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].on = 0'),
-                                (self.shop_list[1], 'self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].on = 0'),
-                                (self.farm_menu, '')))
+        self.menu_hierarchy = (((self.bulk_buy_menu, compile_code('self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].button_list[2].clickable = 1; self.set_button_clickable(); pg.key.stop_text_input()')),),
+                               ((self.shop_list[0], compile_code('self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].on = 0')),
+                                (self.shop_list[1], compile_code('self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].on = 0')),
+                                (self.farm_menu, compile_code(''))))
         
         self.constant_cookies_stats = [0, 0]
         # the first number is the number of clicks clicked in the last second
         # the second is the number of consecutive seconds clicked so far with the needed cps
         # the third number is the total number of clicks clicked in the period,
 
-        special_cookie_cookie_amount = math.ceil(self.save_data["cookies_per_click"]**(self.save_data["special_cookies_level"] / 2)) * 100000
-        self.cookie_indicators = [] # list of current "+1" menuimages
-        self.normal_indicator_texts = [pg.transform.scale_by(self.small_font.render(f'+{scientific_notation(self.save_data['cookies_per_click'], self.save_data['cookies_per_click'] >= 1000000)}', 0, (255, 255, 255), wraplength=32, bgcolor=(0, 0, 0)), (4, 4)),
-                                       pg.transform.scale_by(self.small_font.render(f'+{scientific_notation(self.save_data['cookies_per_second'], self.save_data['cookies_per_second'] >= 1000000)}', 0, (255, 255, 255), wraplength=32, bgcolor=(0, 0, 0)), (4, 4)),
-                                       pg.transform.scale_by(self.font.render(f'+{scientific_notation(special_cookie_cookie_amount, special_cookie_cookie_amount >= 1000000)}', 0, (255, 255, 255), wraplength=360, bgcolor=(0, 0, 0)), (4, 4))]
+        self.special_cookie_cookie_amount = get_special_cookie_amount(self.save_data)
+        self.cookie_indicators = IndicatorPool() # the "+1"s
+        self.normal_indicator_texts = [render_text(self.small_font, f'+{scientific_notation(self.save_data['cookies_per_click'], self.save_data['cookies_per_click'] >= 1000000)}', 0, (255, 255, 255), (0, 0, 0), 32, (4, 4)),
+                                       render_text(self.small_font, f'+{scientific_notation(self.save_data['cookies_per_second'], self.save_data['cookies_per_second'] >= 1000000)}', 0, (255, 255, 255), (0, 0, 0), 32, (4, 4)),
+                                       render_text(self.font, f'+{scientific_notation(self.special_cookie_cookie_amount, self.special_cookie_cookie_amount >= 1000000)}', 0, (255, 255, 255), (0, 0, 0), 360, (4, 4))]
+
+        # Main loop
+        self.dot_shown = 1
+        self.shop_background = pg.Surface(self.screen_size)  # so i can set alpha
+        self.shop_background.set_alpha(160)
+        self.shop_on = sum([shop.on for shop in self.shop_list])
+        # whether the game and the intro's final fade transition are on the screen (set every update)
+        self.game_shown = 1
+        self.fade_shown = 0
+        # the low res surface is only redrawn and rescaled when something on it changes
+        self.scaled_surface = pg.Surface(self.screen_size).convert()
+        self.rendered_surface_state = (None, None, None)
+        self.score_rect = pg.Rect(0, 0, 0, 0)
+        self.layer_state = None # the layers that were on the screen last frame
+        # when there's no input for a few seconds (or the window is unfocused or minimized), the loop waits
+        # for events at a low frame rate. the economy runs on the second timer's events, so it isn't affected.
+        # it doesn't idle while a special cookie is on the screen, so it doesn't fly past at the low frame rate
+        # F3 shows the profiler's overlay; the frames it measured are saved to data/profile.json when the game closes
+        self.profiler = FrameProfiler(('events', 'update', 'scale', 'render', 'overlay', 'display'), target_frame_time=1 / self.frame_cap)
+        self.profiler_pos = (0, self.screen_size[1] - self.profiler.overlay_size[1])
+        self.frame_loop = FrameLoop(self.update, self.render, self.handle_events, frame_cap=self.frame_cap, idle_time=3, idle_frame_cap=10,
+                                    idle_blocked=lambda: self.special_cookie_state or self.special_cookie_cookiefall.on, profiler=self.profiler)
+        self.event_router = EventRouter(self.get_event_widgets)
+        if headless:
+            self.frame_loop.start()
         
     def save_save_data_to_file(self: object) -> None:
 
@@ -610,7 +617,7 @@ class Game(object):
 
         self.save_data['last_logout'] = int(time.time())
         with open('data/save/save.json', 'w', encoding='UTF-8') as save_file:
-            json.dump(self.save_data, save_file)
+            json.dump(dump_save_data(self.save_data), save_file)
 
     def save_config_data_to_file(self: object) -> None:
 
@@ -619,63 +626,225 @@ class Game(object):
         with open('data/save/config.json', 'w', encoding='UTF-8') as config_file:
             json.dump(self.config_data, config_file)
 
+    def click_cookie(self: object,
+                     button: Button) -> None:
+
+        """
+        The click code of the cookie.
+           button: Button (required)
+             the cookie button
+        """
+
+        click_cookie(self.save_data, self.constant_cookies_stats)
+        self.update_score_render()
+        self.cookie_indicators.add(self.normal_indicator_texts[0], ((pg.mouse.get_pos()[0] - self.normal_indicator_texts[0].get_width() / 2) // self.surface_ratio[0]**-1 * self.surface_ratio[0]**-1,
+                                                                    (pg.mouse.get_pos()[1] - self.normal_indicator_texts[0].get_height()) // self.surface_ratio[0]**-1 * self.surface_ratio[0]**-1))
+
+    def click_tree(self: object,
+                   button: Button) -> None:
+
+        """
+        The click code of the trees in the farm. the tree with the most cookies is harvested.
+           button: Button (required)
+             the tree button
+        """
+
+        for farm_button in self.farm_menu.button_list[self.farm_menu.button_list.index(button):]:
+            farm_button.render_pos[0] = farm_button.pos[0] + 160
+        if self.save_data['cookie_tree_values'].ripe_trees <= 4:
+            del self.farm_menu.button_list[-1]
+        harvest_tree(self.save_data)
+        self.update_tree_farm()
+        self.update_score_render()
+
     def update_score_render(self: object) -> None:
 
         """Updates the Cookie count render."""
 
-        self.score_render = self.font.render(scientific_notation(self.save_data["score"], self.save_data['score'] >= 1000000), 0, (255, 255, 255))
+        self.score_render = render_text(self.font, scientific_notation(self.save_data['score'], self.save_data['score'] >= 1000000), 0, (255, 255, 255))
 
     def update_tree_farm(self: object) -> None:
 
         """Updates the menu of the tree farm."""
 
-        for i in range(len(self.farm_menu.button_list[5:]), int(min(4, sum(self.save_data["cookie_tree_values"][1:])))): # add tree buttons; adds remaining with the range thing;
+        for i in range(len(self.farm_menu.button_list[5:]), int(min(4, self.save_data["cookie_tree_values"].ripe_trees))): # add tree buttons; adds remaining with the range thing;
             self.farm_menu.button_list.append(Button(self, 1, (12 + i * 160, 136), self.farm_tree_imgs, scroll=[(160, 160), (0, 0), 1, 0, 0], code=self.tree_code))
         # len(self.farm_menu.button_list[5:]) is the amount of trees that are in the menu
 
-    def shift_tree_farm(self: object) -> None:
+    def auto_harvest(self: object) -> None:
+
+        """Auto harvest all the trees that can be autoharvested."""
+
+        auto_harvest(self.save_data)
+        self.update_score_render()
+
+    def buy_item(self: object) -> None:
 
-        """Shifts the tree farm values right once. This is grows one cookie on all trees except the ones that already have 10 cookies."""
+        """Buys the item of the current shop menu (the item shop's items are bought in bulk)."""
+
+        menu, item_dex = self.current_shop_menu
+        buy(self.save_data, menu, item_dex, 1 if menu else self.get_buy_amount(item_dex))
+        self.shop_data = get_shop_data(self.save_data) # the upgrades' prices change
+        if not menu and self.shop_data[0][item_dex][2] in ('cookies_per_click', 'cookies_per_second'):
+            self.update_normal_indicator_texts() # once per purchase, however many were bought
+        self.update_score_render()
+        self.set_button_clickable()
+
+    def render_upgrade_panel(self: object,
+                             upgrade_dex: int) -> pg.Surface:
+
+        """
+        Renders the description and current tier of an upgrade in the upgrade shop (again after it is bought).
+           upgrade_dex: int (required)
+             the index of the upgrade in the upgrade shop (0 for special cookies, 1 for constant cookies)
+        """
 
-        self.save_data['cookie_tree_values'][-1] += self.save_data['cookie_tree_values'][-2] 
-        for i in range(len(self.save_data['cookie_tree_values']) - 2, 0, -1):
-            self.save_data['cookie_tree_values'][i] = self.save_data['cookie_tree_values'][i - 1]
-        self.save_data['cookie_tree_values'][0] = 0
-    
-    def auto_harvest(self: object,
-                     change_score: int or bool=1) -> None:
+        level = self.save_data[UPGRADE_SHOP_KEYS[upgrade_dex]]
+        if upgrade_dex == 0:
+            title = 'Special Cookies'
+            description = 'Special cookies are cookies that appear rarely. When one is clicked, it gives much more cookies than when you click the normal cookie.'
+            tier_text = f'{self.upgrade_data[0][level - 1][1] if level else 'No Special'} Cookie'
+        else:
+            title = 'Constant Cookies'
+            description = 'Constant Cookie bonuses are given when you click the cookie consistently over a certain amount of time.'
+            tier_text = (f'Bonus awarded if you click {self.upgrade_data[1][level - 1][1]} clicks per second for {self.upgrade_data[1][level - 1][2]} seconds.'
+                         if level else 'No Bonuses Possible.')
+        price = self.shop_data[1][upgrade_dex][0]
+        cost_text = f'Next Tier Cost:\n{scientific_notation(price, price >= 10**6)} Cookies' if level < len(self.upgrade_data[upgrade_dex]) else 'You are at the maximum tier.'
+        return center_word_on_image(render_rect((0, 0, 0), pg.Rect(0, 64, 448, 400)), self.surface_ratio[0]**-1,
+                                    [self.font.render(title, 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),
+                                     self.small_font.render(description, 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0)),
+                                     self.font_center.render(f'Current Tier:\n{arabic_to_roman(level)}. {tier_text}\n{cost_text}', 0, (255, 255, 255), wraplength=104, bgcolor=(0, 0, 0))],
+                                    pos=['center', 0])
+
+    def get_buy_amount(self: object,
+                       item_dex: int) -> int or BigNumber:
 
         """
-        Auto harvest all the trees that can be autoharvested.
+        Returns the amount of an item in the item shop that the buy button buys (the most the player can buy if its bulk amount is "max").
+           item_dex: int (required)
+             the index of the item in the item shop
+        """
+
+        amount = self.config_data['item_shop_buy_numbers'][item_dex]
+        return max_affordable(self.save_data, 0, item_dex) if amount == 'max' else amount
 
-           change_score
-             tells whether to change the players score or not
+    def set_bulk_buy_amount(self: object,
+                            text: str) -> None:
+
+        """
+        Sets the bulk amount of the current item shop menu from the text in the bulk buy menu.
+           text: str (required)
+             a number, a mathematical expression, or "max" (to buy as many as the player can)
         """
 
-        trees_to_harvest = min(sum(self.save_data['cookie_tree_values'][1:]), self.save_data['auto_harvesters'])
-        while trees_to_harvest:
-            dex = last_index_greater_than_zero(self.save_data['cookie_tree_values']) # finds the amount of cookies per tree to harvest
-            trees_just_harvested = min(self.save_data['cookie_tree_values'][dex], trees_to_harvest) # trees that will be just harvested
-            if not change_score:
-                self.save_data['score'] += trees_just_harvested * dex
-                self.save_data['total_baked_cookies'] += trees_just_harvested * dex
-            self.save_data['cookie_tree_values'][0] += trees_just_harvested
-            self.save_data['cookie_tree_values'][dex] -= trees_just_harvested
-            trees_to_harvest -= trees_just_harvested
+        amount = 'max' if text.strip().lower() == 'max' else int(max(math_eval(text, 1, int), 1))
+        self.config_data['item_shop_buy_numbers'][self.current_shop_menu[1]] = amount
+
+    def get_bulk_buy_text(self: object) -> str:
+
+        """Returns the bulk amount of the current item shop menu as it is shown in the bulk buy menu."""
+
+        amount = self.config_data['item_shop_buy_numbers'][self.current_shop_menu[1]]
+        return amount if amount == 'max' else scientific_notation(amount, amount >= 1000000000)
+
+    def update_normal_indicator_texts(self: object) -> None:
+
+        """Renders the cookies per click and cookies per second indicators (the "+1"s) again."""
+
+        self.normal_indicator_texts[:2] = [render_text(self.small_font, f'+{scientific_notation(self.save_data[key], self.save_data[key] >= 1000000)}', 0, (255, 255, 255), (0, 0, 0), 32, (4, 4))
+                                           for key in ('cookies_per_click', 'cookies_per_second')]
 
     def set_button_clickable(self: object) -> None:
 
         """For each buy button in the shop, set the clickable value according to the user's amount of cookies."""
 
-        for item_dex, item_data in enumerate(self.shop_data[0]):
-            self.shop_button_menu_list[0][item_dex].button_list[1].clickable = self.save_data['score'] >= (
-                item_data[0] * self.config_data['item_shop_buy_numbers'][item_dex])
-        self.shop_button_menu_list[0][3].button_list[1].clickable = self.save_data['score'] >= (self.shop_data[0][3][0] * self.config_data['item_shop_buy_numbers'][3]) \
-                and self.save_data['cookies_per_click'] > self.config_data['item_shop_buy_numbers'][3]
-        # makes sure the player always has at least 1 non-automatic oven
-        for item_dex, item_data in enumerate(self.shop_data[1]):
-            self.shop_button_menu_list[1][item_dex].button_list[1].clickable = self.save_data[item_data[2]] < len(self.upgrade_data[item_dex]) \
-                    and self.save_data['score'] >= self.upgrade_data[item_dex][self.save_data[item_data[2]]][0]
+        for menu, shop in enumerate(self.shop_data):
+            for item_dex in range(len(shop)):
+                # when the bulk amount is "max", it can be bought if at least 1 can be bought
+                self.shop_button_menu_list[menu][item_dex].button_list[1].clickable = can_buy(
+                    self.save_data, menu, item_dex, 1 if menu else max(self.get_buy_amount(item_dex), 1))
+
+    def get_dirty_rects(self: object,
+                        current_screen_cutscene: Slideshow,
+                        game_shown: int or bool,
+                        fade_shown: int or bool) -> list:
+
+        """
+        Returns the rects of the screen that changed since the last frame.
+           current_screen_cutscene: Slideshow (required)
+             the cutscene that should be rendered on the screen
+           game_shown: int or bool (required)
+             tells whether the game (cookie, menus, etc.) is on the screen
+           fade_shown: int or bool (required)
+             tells whether the final fade transition of the cutscene is on the screen
+        """
+
+        dirty_rects = []
+        if game_shown:
+            for widget in (self.cookie, self.shop_open_button, self.farm_open_button, self.special_cookie_cookiefall, self.cookie_indicators,
+                           self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]], *self.shop_list, self.farm_menu, self.bulk_buy_menu):
+                dirty_rects += widget.get_dirty_rects()
+            if self.special_cookie_state:
+                # the special cookie is only rendered when it is on the screen
+                dirty_rects += (self.special_cookie_eating_animation if self.special_cookie_state > 2 else self.special_cookie).get_dirty_rects()
+        if fade_shown:
+            dirty_rects += current_screen_cutscene.get_dirty_rects()
+        return dirty_rects
+
+    def render_layers(self: object,
+                      surf: pg.Surface,
+                      dirty_rects: list or tuple,
+                      current_screen_cutscene: Slideshow,
+                      game_shown: int or bool,
+                      fade_shown: int or bool,
+                      shop_on: int or bool,
+                      shop_background: pg.Surface) -> None:
+
+        """
+        Redraws the dirty rects of the given surface: the scaled low res surface, then everything above it.
+           surf: pygame.Surface (required)
+             the surface to render onto
+           dirty_rects: list or tuple[pygame.Rect] (required)
+             the parts of the surface to redraw (they shouldn't overlap)
+           current_screen_cutscene: Slideshow (required)
+             the cutscene that should be rendered on the screen
+           game_shown: int or bool (required)
+             tells whether the game (cookie, menus, etc.) is on the screen
+           fade_shown: int or bool (required)
+             tells whether the final fade transition of the cutscene is on the screen
+           shop_on: int or bool (required)
+             tells whether a shop is open
+           shop_background: pygame.Surface (required)
+             the transparent background drawn below the shop
+        """
+
+        if not dirty_rects:
+            return
+        # the blits of every layer are worked out once, then blitted clipped to each dirty rect
+        if game_shown:
+            game_blits = [*self.cookie.get_blits(), *self.shop_open_button.get_blits(), *self.farm_open_button.get_blits(),
+                          *self.special_cookie_cookiefall.get_blits()]
+            indicator_blits = self.cookie_indicators.get_blits() # not batched; each indicator has its own alpha
+            # the special cookie is only rendered when it is on the screen
+            special_cookie_blits = (self.special_cookie_eating_animation if self.special_cookie_state > 2 else self.special_cookie).get_blits() if self.special_cookie_state else []
+
+            # I use this instead of setting the backgrounds so that images in the shop menu overlay the text, while the background doesn't
+            menu_blits = [(shop_background, (0, 0))] if shop_on else []
+            for menu in (self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]], *self.shop_list, self.farm_menu, self.bulk_buy_menu):
+                menu_blits += menu.get_blits()
+        cutscene_blits = current_screen_cutscene.get_blits(surf.get_size()) if fade_shown else []
+
+        for rect in dirty_rects:
+            surf.set_clip(rect)
+            surf.blit(self.scaled_surface, rect, area=rect)
+            if game_shown:
+                surf.fblits(game_blits)
+                blit_indicators(surf, indicator_blits)
+                surf.fblits(special_cookie_blits)
+                surf.fblits(menu_blits)
+            surf.fblits(cutscene_blits)
+        surf.set_clip(None)
 
     def check_cutscenes(self: object) -> None:
 
@@ -683,244 +852,289 @@ class Game(object):
 
         for dex, item in enumerate(self.cutscene_counts):
             if dex > self.save_data['last_cutscene'] and self.save_data['total_baked_cookies'] >= item[0]:
-                self.cutscenes[item[1]].run(self.surface, self.game_speed, self.screen)
+                if self.headless:
+                    self.headless_cutscenes.append(self.cutscenes[item[1]])
+                else:
+                    self.cutscenes[item[1]].run(self.surface, self.game_speed, self.screen, self.frame_cap)
+
+    def get_current_screen_cutscene(self: object) -> Slideshow:
+
+        """Returns the cutscene that should be rendered on the screen (fade transition)."""
+
+        return self.cutscenes[self.cutscene_counts[self.save_data['last_cutscene']][1]]
+
+    def get_event_widgets(self: object) -> list:
+
+        """Returns the widgets that can get events, in the order that they get them."""
+
+        menus = [self.farm_menu, self.bulk_buy_menu]
+        if not self.bulk_buy_menu.on:
+            menus = [*self.shop_list, self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]], *menus]
+        return [widget for menu in menus for widget in menu.get_event_widgets()] + [
+            self.cookie, self.special_cookie, self.shop_open_button, self.farm_open_button]
+
+    def handle_events(self: object,
+                      event: pg.event.Event) -> None:
+
+        """
+        The event handler of the main game loop.
+           event: pygame.event.Event (required)
+             the event to handle
+        """
+
+        current_screen_cutscene = self.get_current_screen_cutscene()
+
+        current_screen_cutscene.handle_events(event)
+
+        # clicks only go to the widgets under the mouse and key presses to the focused text box
+        for widget in self.event_router.route(event):
+            widget.handle_events(event)
+        self.shop_on = sum([shop.on for shop in self.shop_list])
+        if event.type == self.second_timer:
+            # the rules of the economy are in modules/economy.py; this only shows what happened
+            if update_special_cookie_timer(self.save_data):
+                self.special_cookie_cookie_amount = get_special_cookie_amount(self.save_data)
+                self.normal_indicator_texts[2] = render_text(self.font, f'+{scientific_notation(self.special_cookie_cookie_amount, self.special_cookie_cookie_amount >= 1000000)}', 0, (255, 255, 255), (0, 0, 0), 360, (4, 4))
+
+                # V 0 is off, 1 is started, 2 is clicked, 3 means the animation has starteed for self.special_cookie_state
+                self.special_cookie_state = 1
+            bonus = update_constant_cookies(self.save_data, self.constant_cookies_stats)
+            if bonus:
+                # reward constant cookies bonus
+                constant_cookies_bonus_text = render_text(self.font, f'BONUS!+{scientific_notation(bonus, bonus >= 1000000)}', 0, (255, 255, 255), (0, 0, 0), 32, (4, 4))
+                self.cookie_indicators.add(constant_cookies_bonus_text, ((self.cookie.images['image'].get_width() - constant_cookies_bonus_text.get_width()) / 2 //
+                                                                         self.surface_ratio[0]**-1 * self.surface_ratio[0]**-1 + self.cookie.pos[0], pg.mouse.get_pos()[1] + 4))
+                self.update_score_render()
+            if update_passive_income(self.save_data):
+                self.cookie_indicators.add(self.normal_indicator_texts[1], (random.randint(43, 48) * self.surface_ratio[0]**-1, 96))
+                self.update_score_render()
+                if not self.bulk_buy_menu.on:  # it won't update until the menu is exited
+                    self.set_button_clickable()
+            # grows each tree once every cookie_grow_seconds
+            if update_tree_farm(self.save_data, self.cookie_grow_seconds):
+                self.update_tree_farm()
+                self.update_score_render()
+            self.dot_shown = not self.dot_shown
+            self.save_save_data_to_file()
+
+        elif event.type == pg.KEYDOWN:
+            if event.key == pg.K_ESCAPE:
+                for menu_list in self.menu_hierarchy:
+                    if tuple((item[0].on for item in menu_list)) != (0,) * len(menu_list):
+                        for item in menu_list:
+                            item[0].on = 0
+                            exec(item[1])
+                            pg.event.post(pg.Event(pg.MOUSEWHEEL, {"x": 0, 'y': 0}))
+                            # posts an event to make sure self.shop_on becomes zero
+                        self.event_router.dirty = 1
+                        break
+            elif event.key == pg.K_F3:
+                self.profiler.toggle()
+                self.layer_state = None # redraws what was under the overlay
+
+        elif event.type == pg.MOUSEWHEEL:
+            for dex, menu in enumerate(self.shop_list):
+                if menu.on:
+                    if pg.Rect(448, 0, 192, 360).collidepoint(pg.mouse.get_pos()) or (not event.y and not event.x):
+                        self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].on = 0
+                        self.current_shop_menu = [dex, int((148 - (max(menu.button_list[0].pos[1] - menu.button_list[0].scroll_opts[1][1], min(
+                            menu.button_list[0].pos[1] + menu.button_list[0].scroll_opts[1][0], menu.button_list[0].wanted_scroll_pos[1])))) / 160)]
+                        self.set_button_clickable()
+                        for button in self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].button_list:
+                            button.render_pos = button.pos.copy()
+                            button.wanted_scroll_pos = button.pos.copy()
+                        self.event_router.dirty = 1
+
+                    # makes sure its turned on even when the mouse pos is not in the rectangle (like when you click the shop open button)
+                    self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].on = 1
+
+        elif event.type == pg.WINDOWRESIZED:
+            self.frame_loop.reset_time() # makes sure delta time doesn't become super big during next frame
+
+        elif event.type == pg.QUIT:
+            self.frame_loop.stop()
+
+        if event.type in REDRAW_EVENTS:
+            self.layer_state = None
+
+        self.shop_open_button.clickable = not (self.shop_on or self.farm_menu.on)
+        self.farm_open_button.clickable = not (self.shop_on or self.farm_menu.on)
+
+    def update(self: object,
+               delta_time: float) -> None:
+
+        """
+        Updates the game.
+           delta_time: float (required)
+             the time since the last frame in seconds
+        """
+
+        current_screen_cutscene = self.get_current_screen_cutscene()
+        relative_game_speed = delta_time * self.game_speed
+
+        self.cookie.clickable = not self.special_cookie.rect.collidepoint(pg.mouse.get_pos()) and not (self.shop_on or self.farm_menu.on)
+        self.special_cookie.clickable = not (self.shop_on or self.farm_menu.on) and self.special_cookie_state == 1
+        self.cookie.update(relative_game_speed)
+        if self.special_cookie_state:
+            self.special_cookie.update(relative_game_speed)
+        self.shop_open_button.update(relative_game_speed)
+        self.farm_open_button.update(relative_game_speed)
+        current_screen_cutscene.update(relative_game_speed)
+
+        if not self.bulk_buy_menu.on:
+            for shop in self.shop_list:
+                shop.update(relative_game_speed)
+        elif not self.bulk_buy_menu.button_list[1].focused:
+            self.bulk_buy_menu.button_list[1].focused = 1
+        self.farm_menu.update(relative_game_speed)
+        self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].update(
+            relative_game_speed)
+        self.bulk_buy_menu.update(relative_game_speed)
+
+        if self.special_cookie_cookiefall.on:
+            self.special_cookie_cookiefall.button_list[0].render_pos[1] += 12 * relative_game_speed
+            self.special_cookie_cookiefall.button_list[1].render_pos[1] += 18 * relative_game_speed
+            self.special_cookie_cookiefall.button_list[2].render_pos[1] += 24 * relative_game_speed
+            if self.special_cookie_cookiefall.button_list[0].render_pos[1] >= 360:
+                self.special_cookie_cookiefall.on = 0
+                self.special_cookie_cookiefall.release()
+        # Hands the special cookie moving across the screen / updating the animation
+        if self.special_cookie_state:
+            if self.special_cookie.render_pos[0] <= -128 or (self.special_cookie_state == 3
+                                                             and not self.special_cookie_eating_animation.running
+                                                             and not self.special_cookie_cookiefall.on):
+
+                self.special_cookie_state = 0
+
+            if self.special_cookie_state == 1:
+                self.special_cookie.render_pos[0] -= 4 * relative_game_speed
+                self.special_cookie.render_pos[1] = 48 * math.sin((self.special_cookie.render_pos[0] - 640) / 64) + 116
+            elif self.special_cookie_state == 2 and self.special_cookie.rect.size == (128, 128):
+                self.special_cookie_state = 3
+                self.special_cookie.rect.x = self.special_cookie.pos[0]
+                self.special_cookie.rect.y = self.special_cookie.pos[1]
+                self.special_cookie.render_pos = list(self.special_cookie.pos)
+                self.special_cookie_eating_animation.running = 1
+                # when it's (128, 128), the images perfectly transition
+            elif self.special_cookie_state == 3:
+                self.special_cookie_eating_animation.update(relative_game_speed)
+                if not self.special_cookie_eating_animation.running and not self.special_cookie_cookiefall.on:
+                    award_special_cookie(self.save_data, self.special_cookie_cookie_amount)
+                    self.update_score_render()
+                    self.special_cookie_cookiefall.on = 1
+                    self.cookie_indicators.add(self.normal_indicator_texts[2], ((self.screen_size[0] - self.normal_indicator_texts[2].get_width()) / 2,
+                                                                                (self.screen_size[1] - self.normal_indicator_texts[2].get_height()) / 2))
+
+        # whether the game and the intro's final fade transition are on the screen
+        self.game_shown = (not (current_screen_cutscene.on
+                                and (current_screen_cutscene.wanted_slide < len(current_screen_cutscene.cutscene_list)
+                                     or (current_screen_cutscene.transition_style == 'fade'
+                                         and current_screen_cutscene.wanted_slide == len(current_screen_cutscene.cutscene_list)
+                                         and current_screen_cutscene.transition_state == 1)))
+                           or self.save_data['last_cutscene'] == -1)
+        self.fade_shown = (self.save_data['last_cutscene'] >= 0
+                           and current_screen_cutscene.transition_style == 'fade'
+                           and current_screen_cutscene.wanted_slide == len(current_screen_cutscene.cutscene_list)
+                           and current_screen_cutscene.transition_state == -1)
+
+        if self.game_shown:
+            self.cookie_indicators.update(delta_time)
+
+    def render(self: object) -> None:
+
+        """Renders the game onto the screen. only the parts of the screen that changed are drawn."""
+
+        current_screen_cutscene = self.get_current_screen_cutscene()
+
+        # Rendering
+        dirty_rects = []
+        earth_stage = min(int(math.sqrt(float(min(self.save_data['total_baked_cookies'], 10**32))) // 10**15), 8) # capped before the sqrt since it can be past the biggest float
+        surface_state = (self.score_render, earth_stage, self.dot_shown)
+        if surface_state != self.rendered_surface_state:
+            self.surface.blit(self.background, (0, 0))
+            surface_rects = [self.score_rect, self.surface.blit(self.earth_imgs[earth_stage], (82, 2)), pg.Rect(85, 5, *self.red_dot.get_size())]
+            if self.dot_shown:
+                self.surface.blit(self.red_dot, (85, 5))
+            self.score_rect = self.surface.blit(self.score_render, (int((self.cookie_imgs['image'].get_width() * self.surface_ratio[0] - self.score_render.get_width()) / 2 + self.cookie.pos[0] * self.surface_ratio[0]), 0))
+            surface_rects[0] = surface_rects[0].union(self.score_rect)
+            pg.transform.scale(self.surface, self.screen_size, self.scaled_surface)
+            # only the parts of the surface that changed are redrawn (scaled to the screen)
+            dirty_rects += [pg.Rect([int(value / self.surface_ratio[dex % 2]) for dex, value in enumerate(surface_rects[dex])])
+                            for dex in range(3) if surface_state[dex] != self.rendered_surface_state[dex]]
+            self.rendered_surface_state = surface_state
+        self.profiler.mark('scale')
+
+        # Cutscene stuff
+        # if the layers on the screen change, the whole screen is redrawn
+        if (self.game_shown, self.fade_shown, self.shop_on, self.special_cookie_state,
+            self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]]) != self.layer_state or not self.dirty_rect_rendering:
+            self.layer_state = (self.game_shown, self.fade_shown, self.shop_on, self.special_cookie_state,
+                                self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]])
+            dirty_rects = [self.screen.get_rect()]
+        else:
+            dirty_rects += self.get_dirty_rects(current_screen_cutscene, self.game_shown, self.fade_shown)
+            if self.profiler.enabled:
+                dirty_rects.append(self.profiler.get_rect(self.profiler_pos)) # the overlay changes every frame
+            dirty_rects = merge_rects(dirty_rects, self.screen.get_rect())
+
+        self.render_layers(self.screen, dirty_rects, current_screen_cutscene, self.game_shown, self.fade_shown, self.shop_on, self.shop_background)
+        self.profiler.mark('render')
+        if self.profiler.enabled:
+            self.profiler.render(self.screen, self.small_font, self.profiler_pos)
+            self.profiler.mark('overlay')
+        if dirty_rects:
+            pg.display.update(dirty_rects)
+        self.profiler.mark('display')
+
+    def step(self: object,
+             frames: int=1,
+             events: list or tuple=(),
+             delta_time: float=1/60) -> None:
+
+        """
+        Runs frames of the game right away without waiting (for headless mode). the frames are the same
+        as the frames of Game.run, except that the time is the given delta time instead of the real time.
+           frames: int (not required)
+             the number of frames to run
+           events: list or tuple[pygame.event.Event] (not required)
+             the events to post before the first frame. mouse events also move the mouse to their position
+           delta_time: float (not required)
+             the time of each frame in seconds
+        """
+
+        for event in events:
+            if 'pos' in event.dict:
+                pg.mouse.set_pos(event.pos)
+            pg.event.post(event)
+        for frame in range(frames):
+            self.headless_time += delta_time
+            # the small number makes up for floating point errors (60 frames of 1/60 is one second)
+            while self.headless_time + 1e-9 >= self.headless_seconds + 1:
+                self.headless_seconds += 1
+                pg.event.post(pg.Event(self.second_timer))
+
+            # cutscenes run in their own loop (like Slideshow.run), so the game doesn't run until they finish
+            if not self.cutscene_loop and self.headless_cutscenes:
+                self.cutscene_loop = self.headless_cutscenes.pop(0).create_frame_loop(self.surface, self.game_speed, self.screen, self.frame_cap)
+                self.cutscene_loop.start()
+            if self.cutscene_loop:
+                self.cutscene_loop.step(delta_time)
+                if not (self.cutscene_loop.running and self.cutscene_loop.condition()):
+                    self.cutscene_loop = None
+            else:
+                self.frame_loop.step(delta_time)
 
     def run(self: object) -> None:
 
         """Runs the main game loop."""
 
         try:
-            running = 1
-            start_time = time.time()
-            # delta_time = 1 / pg.display.get_current_refresh_rate() # for when it is vsync
-            dot_shown = 1
-            shop_background = pg.Surface(self.screen_size)  # so i can set alpha
-            shop_background.set_alpha(160)
-            bulk_textbox = self.bulk_buy_menu.button_list[1]
-            shop_on = sum([shop.on for shop in self.shop_list])
-
-            while running:
-
-                delta_time = time.time() - start_time
-                start_time = time.time()
-
-                # the current cutscene that should be rendered on the screen (fade transition)
-                current_screen_cutscene = self.cutscenes[self.cutscene_counts[self.save_data['last_cutscene']][1]]
-                
-                # event handling
-                for event in pg.event.get():
-                    current_screen_cutscene.handle_events(event)
-
-                    if not self.bulk_buy_menu.on:
-                        for shop in self.shop_list:
-                            shop.handle_events(event)
-                        self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].handle_events(event)
-                    shop_on = sum([shop.on for shop in self.shop_list])
-                    self.farm_menu.handle_events(event)
-                    self.bulk_buy_menu.handle_events(event)
-                    if event.type == self.second_timer:
-                        if self.save_data['special_cookies_level']:
-                            self.save_data['seconds_until_next_special_cookie'] -= 1
-                            if self.save_data['seconds_until_next_special_cookie'] <= 0:
-
-                                self.save_data['seconds_until_next_special_cookie'] = random.randint(600, 3600)
-
-                                special_cookie_cookie_amount = math.ceil(self.save_data["cookies_per_click"]**(self.save_data["special_cookies_level"]**0.1)) * 100000
-                                self.normal_indicator_texts[2] = pg.transform.scale_by(self.font.render(f'+{scientific_notation(special_cookie_cookie_amount, special_cookie_cookie_amount >= 1000000)}', 0, (255, 255, 255), wraplength=360, bgcolor=(0, 0, 0)), (4, 4))
-
-                                # V 0 is off, 1 is started, 2 is clicked, 3 means the animation has starteed for self.special_cookie_state
-                                self.special_cookie_state = 1
-                        if self.save_data['constant_cookies_level']:
-                            if self.constant_cookies_stats[0] >= self.upgrade_data[1][self.save_data['constant_cookies_level'] - 1][1]:
-                                self.constant_cookies_stats[1] += 1
-                                if self.constant_cookies_stats[1] >= self.upgrade_data[1][self.save_data['constant_cookies_level'] - 1][2]:
-                                    bonus = self.save_data['cookies_per_click'] * 10**(self.save_data['constant_cookies_level']**0.5)
-                                    # reward constant cookies bonus
-                                    self.save_data['score'] += bonus
-
-                                    constant_cookies_bonus_text = pg.transform.scale_by(self.font.render(f'BONUS!+{scientific_notation(bonus, bonus >= 1000000)}', 0, (255, 255, 255), wraplength=32, bgcolor=(0, 0, 0)), (4, 4))
-                                    self.cookie_indicators.append(MenuImage(((self.cookie.images['image'].get_width() - constant_cookies_bonus_text.get_width()) / 2 //
-                                                                   self.surface_ratio[0]**-1 * self.surface_ratio[0]**-1 + self.cookie.pos[0], pg.mouse.get_pos()[1] + 4), constant_cookies_bonus_text, colorkey=(0, 0, 0)))
-
-                                    self.update_score_render()
-                                    self.constant_cookies_stats[1] = 0
-                            else:
-                                self.constant_cookies_stats[1] = 0
-                            self.constant_cookies_stats[0] = 0
-                        if self.save_data['cookies_per_second']:
-                            self.cookie_indicators.append(MenuImage((random.randint(43, 48) * self.surface_ratio[0]**-1, 96), self.normal_indicator_texts[1].copy(), colorkey=(0, 0, 0)))
-
-                            # .copy() ^ so then the alpha value doesn't change for all of the texts when setting alpha
-                            self.save_data['score'] += self.save_data['cookies_per_second']
-                            self.save_data['total_baked_cookies'] += self.save_data['cookies_per_second']
-                            self.update_score_render()
-                            if not self.bulk_buy_menu.on:  # it won't update until the menu is exited
-                                self.set_button_clickable()
-                        if sum(self.save_data['cookie_tree_values']):
-                            self.save_data['cookies_per_day_counter'] += 1
-                            # the below loop shifts everything and grows each tree
-                            if not (self.save_data['cookies_per_day_counter'] % self.cookie_grow_seconds):
-                                self.shift_tree_farm()
-                                self.auto_harvest()
-                                self.update_tree_farm()
-                                self.update_score_render()
-                            self.save_data['cookies_per_day_counter'] %= self.cookie_grow_seconds
-                        dot_shown = not dot_shown
-                        self.save_save_data_to_file()
-
-                    elif event.type == pg.KEYDOWN:
-                        if event.key == pg.K_ESCAPE:
-                            for menu_list in self.menu_hierarchy:
-                                if tuple((item[0].on for item in menu_list)) != (0,) * len(menu_list):
-                                    for item in menu_list:
-                                        item[0].on = 0
-                                        exec(item[1])
-                                        pg.event.post(pg.Event(pg.MOUSEWHEEL, {"x": 0, 'y': 0}))
-                                        # posts an event to make sure shop_on becomes zero
-                                    break
-
-                    elif event.type == pg.MOUSEWHEEL:
-                        for dex, menu in enumerate(self.shop_list):
-                            if menu.on:
-                                if pg.Rect(448, 0, 192, 360).collidepoint(pg.mouse.get_pos()) or (not event.y and not event.x):
-                                    self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].on = 0
-                                    self.current_shop_menu = [dex, int((148 - (max(menu.button_list[0].pos[1] - menu.button_list[0].scroll_opts[1][1], min(
-                                        menu.button_list[0].pos[1] + menu.button_list[0].scroll_opts[1][0], menu.button_list[0].wanted_scroll_pos[1])))) / 160)]
-                                    self.set_button_clickable()
-                                    for button in self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].button_list:
-                                        button.render_pos = button.pos.copy()
-                                        button.wanted_scroll_pos = button.pos.copy()
-
-                                # makes sure its turned on even when the mouse pos is not in the rectangle (like when you click the shop open button)
-                                self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].on = 1
-
-                    elif event.type == pg.WINDOWRESIZED:
-                        start_time = time.time() # makes sure delta time doesn't become super big during next frame
-
-                    elif event.type == pg.QUIT:
-                        running = 0
-
-                    self.cookie.handle_events(event)
-                    self.special_cookie.handle_events(event)
-                    self.shop_open_button.handle_events(event)
-                    self.farm_open_button.handle_events(event)
-
-                    self.shop_open_button.clickable = not (shop_on or self.farm_menu.on)
-                    self.farm_open_button.clickable = not (shop_on or self.farm_menu.on)
-
-                # Update
-                self.cookie.clickable = not self.special_cookie.rect.collidepoint(pg.mouse.get_pos()) and not (shop_on or self.farm_menu.on)
-                self.special_cookie.clickable = not (shop_on or self.farm_menu.on) and self.special_cookie_state == 1
-                self.cookie.update(delta_time * self.game_speed)
-                if self.special_cookie_state:
-                    self.special_cookie.update(delta_time * self.game_speed)
-                self.shop_open_button.update(delta_time * self.game_speed)
-                self.farm_open_button.update(delta_time * self.game_speed)
-                current_screen_cutscene.update(delta_time * self.game_speed)
-
-                if not self.bulk_buy_menu.on:
-                    for shop in self.shop_list:
-                        shop.update(delta_time * self.game_speed)
-                elif not bulk_textbox.focused:
-                    bulk_textbox.focused = 1
-                self.farm_menu.update(delta_time * self.game_speed)
-                self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].update(
-                    delta_time * self.game_speed)
-                self.bulk_buy_menu.update(delta_time * self.game_speed)
-
-                if self.special_cookie_cookiefall.on:
-                    self.special_cookie_cookiefall.button_list[0].render_pos[1] += 12 * delta_time * self.game_speed
-                    self.special_cookie_cookiefall.button_list[1].render_pos[1] += 18 * delta_time * self.game_speed
-                    self.special_cookie_cookiefall.button_list[2].render_pos[1] += 24 * delta_time * self.game_speed
-                    if self.special_cookie_cookiefall.button_list[0].render_pos[1] >= 360:
-                        self.special_cookie_cookiefall.on = 0
-                # Hands the special cookie moving across the screen / updating the animation
-                if self.special_cookie_state:
-                    if self.special_cookie.render_pos[0] <= -128 or (self.special_cookie_state == 3
-                                                                     and not self.special_cookie_eating_animation.running
-                                                                     and not self.special_cookie_cookiefall.on):
-
-                        self.special_cookie_state = 0
-
-                    if self.special_cookie_state == 1:
-                        self.special_cookie.render_pos[0] -= 4 * delta_time * self.game_speed
-                        self.special_cookie.render_pos[1] = 48 * math.sin((self.special_cookie.render_pos[0] - 640) / 64) + 116
-                    elif self.special_cookie_state == 2 and self.special_cookie.rect.size == (128, 128):
-                        self.special_cookie_state = 3
-                        self.special_cookie.rect.x = self.special_cookie.pos[0]
-                        self.special_cookie.rect.y = self.special_cookie.pos[1]
-                        self.special_cookie.render_pos = list(self.special_cookie.pos)
-                        self.special_cookie_eating_animation.running = 1
-                        # when it's (128, 128), the images perfectly transition
-                    elif self.special_cookie_state == 3:
-                        self.special_cookie_eating_animation.update(delta_time * self.game_speed)
-                        if not self.special_cookie_eating_animation.running and not self.special_cookie_cookiefall.on:
-                            self.save_data["score"] += special_cookie_cookie_amount
-                            self.save_data["total_baked_cookies"] += special_cookie_cookie_amount
-                            self.update_score_render()
-                            self.special_cookie_cookiefall.on = 1
-                            self.cookie_indicators.append(MenuImage(((self.screen_size[0] - self.normal_indicator_texts[2].get_width()) / 2,
-                                                                     (self.screen_size[1] - self.normal_indicator_texts[2].get_height()) / 2),
-                                                                    self.normal_indicator_texts[2].copy(), colorkey=(0, 0, 0)))
-
-                # Rendering
-                self.surface.blit(self.background, (0, 0))
-                self.surface.blit(self.earth_imgs[min(int(math.sqrt(self.save_data['total_baked_cookies']) // 10**15), 8)], (82, 2))
-                if dot_shown:
-                    self.surface.blit(self.red_dot, (85, 5))
-                self.surface.blit(self.score_render, (int((self.cookie_imgs['image'].get_width() * self.surface_ratio[0] - self.score_render.get_width()) / 2 + self.cookie.pos[0] * self.surface_ratio[0]), 0))
-
-                # Cutscene stuff
-                self.screen.blit(pg.transform.scale(self.surface, self.screen_size), (0, 0))
-                if (not (current_screen_cutscene.on
-                         and (current_screen_cutscene.wanted_slide < len(current_screen_cutscene.cutscene_list)
-                              or (current_screen_cutscene.transition_style == 'fade'
-                                  and current_screen_cutscene.wanted_slide == len(current_screen_cutscene.cutscene_list)
-                                  and current_screen_cutscene.transition_state == 1)))
-                    or self.save_data['last_cutscene'] == -1):
-
-                    self.cookie.render(self.screen)
-                    self.shop_open_button.render(self.screen)
-                    self.farm_open_button.render(self.screen)
-
-                    self.special_cookie_cookiefall.render(self.screen)
-
-                    for i in range(len(self.cookie_indicators) - 1, -1, -1):
-                        alpha = self.cookie_indicators[i].image.get_alpha()
-                        alpha = (255 if alpha == None else alpha)
-                        self.cookie_indicators[i].update(delta_time * self.game_speed)
-                        self.cookie_indicators[i].render_pos[1] -= delta_time * 48
-                        self.cookie_indicators[i].image.set_alpha(alpha - delta_time * 196)
-                        self.cookie_indicators[i].render(self.screen)
-                        if alpha <= 0:
-                            del self.cookie_indicators[i]
-                    if self.special_cookie_state:
-                        if self.special_cookie_state > 2:
-                            self.special_cookie_eating_animation.render(self.screen)
-                        else:
-                            self.special_cookie.render(self.screen)
-
-
-                    if shop_on: # I use this instead of setting the backgrounds so that images in the shop menu overlay the text, while the background doesn't
-                        self.screen.blit(shop_background, (0, 0))
-                    self.shop_button_menu_list[self.current_shop_menu[0]][self.current_shop_menu[1]].render(self.screen)
-                    for shop in self.shop_list:
-                        shop.render(self.screen)
-                    self.farm_menu.render(self.screen)
-                    self.bulk_buy_menu.render(self.screen)
-
-                if (self.save_data['last_cutscene'] >= 0
-                    and current_screen_cutscene.transition_style == 'fade'
-                    and current_screen_cutscene.wanted_slide == len(current_screen_cutscene.cutscene_list)
-                    and current_screen_cutscene.transition_state == -1):
-                    
-                    current_screen_cutscene.render(self.screen)
-
-                pg.display.update()
+            self.frame_loop.run()
 
         finally:
             self.save_save_data_to_file()
             self.save_config_data_to_file()
+            self.profiler.dump('data/profile.json')
             pg.quit()
 
 
@@ -0,0 +1,290 @@
+'Big number module -- a number type for the score that can go past the biggest float'
+
+import math
+import sys
+from fractions import Fraction
+
+# numbers below this are kept as they are (exponent 0), so small whole numbers stay exact like ints.
+# bigger numbers keep a mantissa between MANTISSA_MIN and MANTISSA_MAX (16 digits, about what a float can hold)
+MANTISSA_MAX = 1e16
+MANTISSA_MIN = 1e15
+MANTISSA_DIGITS = 15 # the power of ten of MANTISSA_MIN
+EXACT_INT_MAX = 2**53 # the biggest int that is exact as a float
+HASH_MODULUS = sys.hash_info.modulus # ints, floats, and fractions are hashed modulo this
+
+
+class BigNumber(object):
+
+    """
+    A number stored as a float mantissa and an int power of ten (mantissa * 10**exponent), so it never overflows
+    and every operation takes the same time no matter how big the number is. it works with ints, floats, and other
+    big numbers in arithmetic and comparisons. it is immutable.
+    """
+
+    __slots__ = ('mantissa', 'exponent')
+
+    def __init__(self: object,
+                 value: int or float or str or object=0) -> None:
+
+        """
+        The initialization function of the BigNumber class.
+           value: int, float, str, or BigNumber (not required)
+             the value of the number. strings are in the format of str(BigNumber) (like "1.5e400")
+        """
+
+        if type(value) is BigNumber:
+            self.mantissa, self.exponent = value.mantissa, value.exponent
+        elif type(value) is str:
+            mantissa, exponent = value.lower().split('e') if 'e' in value.lower() else (value, 0)
+            if int(exponent) < MANTISSA_DIGITS:
+                self.mantissa, self.exponent = _normalize(float(value), 0)
+            else:
+                # the mantissa is read with MANTISSA_DIGITS more digits before the point, so the digits str() wrote are read exactly
+                self.mantissa, self.exponent = _normalize(float(f'{mantissa}e{MANTISSA_DIGITS}'), int(exponent) - MANTISSA_DIGITS)
+        elif type(value) is int and abs(value) >= EXACT_INT_MAX:
+            # the int is divided before it is turned into a float so it doesn't overflow
+            exponent = max(int(value.bit_length() * math.log10(2)) - MANTISSA_DIGITS, 0)
+            self.mantissa, self.exponent = _normalize(value / 10**exponent, exponent)
+        else:
+            if not math.isfinite(value):
+                raise ValueError(f'BigNumber can\'t be {value}')
+            self.mantissa, self.exponent = _normalize(float(value), 0)
+
+    @classmethod
+    def _new(cls: type,
+             mantissa: float,
+             exponent: int) -> object:
+        number = object.__new__(cls)
+        number.mantissa, number.exponent = _normalize(mantissa, exponent)
+        return number
+
+    def scientific(self: object) -> tuple:
+
+        """Returns the number in scientific notation in format (mantissa between 1 and 10, power of ten)."""
+
+        if not self.mantissa:
+            return (0.0, 0)
+        power_of_ten = math.floor(math.log10(abs(self.mantissa)))
+        mantissa = self.mantissa / 10**power_of_ten
+        if abs(mantissa) < 1: # log10 can be off by one because of rounding
+            mantissa *= 10
+            power_of_ten -= 1
+        return (mantissa, power_of_ten + self.exponent)
+
+    def to_json(self: object) -> int or float or str:
+
+        """Returns the number in a format json can save: an int or float if it fits, otherwise a string."""
+
+        if self.exponent:
+            return str(self)
+        return int(self.mantissa) if self.mantissa.is_integer() and abs(self.mantissa) < EXACT_INT_MAX else self.mantissa
+
+    # Arithmetic
+
+    def __add__(self: object,
+                other: object) -> object:
+        if type(other) is not BigNumber:
+            if self.exponent == 0 and type(other) in (int, float) and abs(other) < MANTISSA_MAX:
+                return BigNumber._new(self.mantissa + other, 0) # the usual case while the numbers are small
+            other = BigNumber(other)
+        if self.exponent < other.exponent:
+            self, other = other, self
+        # the smaller number is scaled to the bigger one's exponent (it doesn't change the bigger one if it is too small)
+        difference = self.exponent - other.exponent
+        if difference > MANTISSA_DIGITS + 2:
+            return self
+        return BigNumber._new(self.mantissa + other.mantissa / 10.0**difference, self.exponent)
+
+    __radd__ = __add__
+
+    def __sub__(self: object,
+                other: object) -> object:
+        return self + -other
+
+    def __rsub__(self: object,
+                 other: object) -> object:
+        return -self + other
+
+    def __mul__(self: object,
+                other: object) -> object:
+        if type(other) is not BigNumber:
+            if type(other) in (int, float) and abs(other) < MANTISSA_MAX:
+                return BigNumber._new(self.mantissa * other, self.exponent)
+            other = BigNumber(other)
+        return BigNumber._new(self.mantissa * other.mantissa, self.exponent + other.exponent)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self: object,
+                    other: object) -> object:
+        other = BigNumber(other)
+        if not other.mantissa:
+            raise ZeroDivisionError('BigNumber division by zero')
+        return BigNumber._new(self.mantissa / other.mantissa, self.exponent - other.exponent)
+
+    def __rtruediv__(self: object,
+                     other: object) -> object:
+        return BigNumber(other) / self
+
+    def __floordiv__(self: object,
+                     other: object) -> object:
+        return math.floor(self / other)
+
+    def __pow__(self: object,
+                power: int or float) -> object:
+        if self.exponent == 0:
+            try:
+                result = self.mantissa**power
+                if abs(result) < MANTISSA_MAX:
+                    return BigNumber._new(result, 0)
+            except OverflowError:
+                pass
+        if not self.mantissa:
+            return BigNumber(0)
+        # (mantissa * 10**exponent)**power is worked out with the power of ten
+        power_of_ten = power * (math.log10(abs(self.mantissa)) + self.exponent)
+        exponent = math.floor(power_of_ten) - MANTISSA_DIGITS
+        return BigNumber._new(10**(power_of_ten - exponent), exponent)
+
+    def __neg__(self: object) -> object:
+        number = object.__new__(BigNumber)
+        number.mantissa, number.exponent = -self.mantissa, self.exponent
+        return number
+
+    def __pos__(self: object) -> object:
+        return self
+
+    def __abs__(self: object) -> object:
+        return -self if self.mantissa < 0 else self
+
+    def __floor__(self: object) -> object:
+        # numbers with an exponent are too big to have a fraction part
+        return self if self.exponent else BigNumber._new(float(math.floor(self.mantissa)), 0)
+
+    def __ceil__(self: object) -> object:
+        return self if self.exponent else BigNumber._new(float(math.ceil(self.mantissa)), 0)
+
+    # Comparisons
+
+    def _compare(self: object,
+                 other: object) -> int:
+        if type(other) is not BigNumber:
+            if self.exponent == 0 and type(other) in (int, float) and abs(other) < MANTISSA_MAX:
+                return (self.mantissa > other) - (self.mantissa < other)
+            if type(other) is float and math.isinf(other):
+                return -1 if other > 0 else 1
+            # the other number is rounded to a big number first; rounding never changes which number is bigger,
+            # so the exact values are only compared when they are equal after rounding (which is rare)
+            result = self._compare(BigNumber(other))
+            if not result:
+                exact_value = self.exact()
+                return (exact_value > other) - (exact_value < other)
+            return result
+        if self.exponent == other.exponent:
+            return (self.mantissa > other.mantissa) - (self.mantissa < other.mantissa)
+        # the mantissas are normalized, so the bigger exponent is the bigger number (unless the signs are different)
+        if (self.mantissa < 0) != (other.mantissa < 0) or not (self.mantissa and other.mantissa):
+            return (self.mantissa > other.mantissa) - (self.mantissa < other.mantissa)
+        bigger = 1 if self.exponent > other.exponent else -1
+        return -bigger if self.mantissa < 0 else bigger
+
+    def __eq__(self: object,
+               other: object) -> bool:
+        if type(other) not in (BigNumber, int, float):
+            return NotImplemented
+        return not self._compare(other)
+
+    def __lt__(self: object,
+               other: object) -> bool:
+        return self._compare(other) < 0
+
+    def __le__(self: object,
+               other: object) -> bool:
+        return self._compare(other) <= 0
+
+    def __gt__(self: object,
+               other: object) -> bool:
+        return self._compare(other) > 0
+
+    def __ge__(self: object,
+               other: object) -> bool:
+        return self._compare(other) >= 0
+
+    def __hash__(self: object) -> int:
+        # the same as the hash of the equal int, float, or Fraction (see the hashing of numeric types in python's docs).
+        # it is worked out modulo HASH_MODULUS, so it takes the same time for any exponent
+        if self.exponent == 0:
+            return hash(self.mantissa)
+        numerator, denominator = abs(self.mantissa).as_integer_ratio()
+        result = numerator * pow(10, self.exponent, HASH_MODULUS) * pow(denominator, -1, HASH_MODULUS) % HASH_MODULUS
+        result = -result if self.mantissa < 0 else result
+        return -2 if result == -1 else result
+
+    def exact(self: object) -> Fraction:
+
+        """Returns the exact value of the number (it takes longer the bigger the exponent is)."""
+
+        return Fraction(self.mantissa) * 10**self.exponent
+
+    # Conversions
+
+    def __bool__(self: object) -> bool:
+        return bool(self.mantissa)
+
+    def __float__(self: object) -> float:
+        try:
+            return self.mantissa * 10.0**self.exponent
+        except OverflowError:
+            return math.copysign(math.inf, self.mantissa)
+
+    def __int__(self: object) -> int:
+        return int(self.mantissa) * 10**self.exponent
+
+    def __str__(self: object) -> str:
+        if self.exponent == 0:
+            return str(int(self.mantissa)) if self.mantissa.is_integer() else str(self.mantissa)
+        # the digits of the mantissa are moved instead of dividing it, so no digits are lost and the string loads back exactly
+        integer_digits, fraction_digits = repr(abs(self.mantissa)).split('.')
+        digits = (integer_digits + fraction_digits).rstrip('0')
+        return f'{'-' if self.mantissa < 0 else ''}{digits[0]}.{digits[1:] or '0'}e{len(integer_digits) - 1 + self.exponent}'
+
+    def __repr__(self: object) -> str:
+        return f'BigNumber({str(self)!r})'
+
+    def __format__(self: object,
+                   format_spec: str) -> str:
+        return format(float(self), format_spec) if format_spec else str(self)
+
+
+def _normalize(mantissa: float,
+               exponent: int) -> tuple:
+
+    """
+    Returns the mantissa and exponent in BigNumber's format (the exponent is 0 for small numbers).
+       mantissa: float (required)
+         the mantissa
+       exponent: int (required)
+         the power of ten
+    """
+
+    if exponent == 0 and -MANTISSA_MAX < mantissa < MANTISSA_MAX or exponent > 0 and MANTISSA_MIN <= abs(mantissa) < MANTISSA_MAX:
+        return (mantissa, exponent) # already normalized (the usual case)
+    if not mantissa:
+        return (0.0, 0)
+    if not math.isfinite(mantissa):
+        raise OverflowError(f'BigNumber mantissa is {mantissa}')
+    shift = math.floor(math.log10(abs(mantissa))) - MANTISSA_DIGITS
+    if exponent + shift <= 0:
+        # small enough to be kept without an exponent
+        return (mantissa / 10.0**-exponent if exponent < 0 else mantissa * 10.0**exponent, 0)
+    # dividing by a power of ten is more exact than multiplying by its (inexact) inverse, and the other way around
+    mantissa = mantissa / 10.0**shift if shift > 0 else mantissa * 10.0**-shift
+    exponent += shift
+    # log10 can be off by one because of rounding
+    if abs(mantissa) >= MANTISSA_MAX:
+        mantissa /= 10
+        exponent += 1
+    elif abs(mantissa) < MANTISSA_MIN:
+        mantissa *= 10
+        exponent -= 1
+    return (mantissa, exponent)
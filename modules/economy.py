@@ -0,0 +1,476 @@
+'Economy module -- the rules of the game that don\'t need pygame'
+
+import math
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from modules.bignumber import BigNumber, EXACT_INT_MAX
+
+COOKIE_GROW_SECONDS = 8640 # the amount of seconds for one cookie to grow in cookie trees
+
+# upgrade shop data V
+# first list is Special cookies (price first, then name of cookie), second is constant cookies (price, clicks per second needed, seconds needed)
+UPGRADE_DATA = (((10**6, 'Stone'), (10**9, 'Bronze'), (10**12, 'Silver'), (10**15, 'Gold'), (10**18, 'Emerald')),
+                ((10**6, 6, 30), (10**9, 6, 25), (10**12, 5, 25), (10**15, 5, 20), (10**18, 4, 20),
+                 (10**21, 4, 15), (10**24, 3, 15), (10**27, 3, 10), (10**30, 2, 10), (10**33, 2, 5)))
+UPGRADE_SHOP_KEYS = ('special_cookies_level', 'constant_cookies_level')
+# the total price of the first i tiers of each upgrade (starting with 0), so the tiers the player can afford are found with a binary search
+UPGRADE_TOTAL_PRICES = tuple((0, *accumulate(tier[0] for tier in tiers)) for tiers in UPGRADE_DATA)
+# item shop data V
+# the first index in the item is the cost, the second is the value of what it gives, and the third is what it gives (in save data terms)
+ITEM_SHOP_DATA = ((100, 1, 'auto_harvesters'), (100, 10, 'cookie_tree_values'), (10, 1, 'cookies_per_click'), (25, 1, 'cookies_per_second'))
+# the save data's cookie amounts; they are BigNumbers while the game runs so they can get past the biggest float
+# and adding to them takes the same time late game (they are saved as ints, or strings if they are too big)
+BIG_NUMBER_KEYS = ('score', 'total_baked_cookies', 'cookies_per_click', 'cookies_per_second')
+# the most of an item that is saved as an int (not a BigNumber) that is bought at once, so it stays small enough to save
+MAX_INT_ITEM_AMOUNT = 10**100
+
+
+class TreeFarm(object):
+
+    """
+    The cookie tree farm: the amount of trees with each amount of cookies. trees stop growing at max_cookies.
+    the trees that were planted or harvested at the same time (a cohort) are kept together in a ring buffer,
+    so growing only moves where the ring starts, and the totals and the most cookies on a tree are kept up to
+    date as the trees change instead of being counted again.
+    it is saved as a list of the amount of trees with 0 to max_cookies cookies (save_data['cookie_tree_values']).
+    """
+
+    def __init__(self: object,
+                 tree_values: list or tuple=(0,) * 11) -> None:
+
+        """
+        The initialization function of the TreeFarm class.
+           tree_values: list or tuple[int] (not required)
+             the amount of trees with each amount of cookies (index i is the trees with i cookies)
+        """
+
+        self.max_cookies = len(tree_values) - 1
+        # the cohort with i cookies is at (self._start - i) % max_cookies; the full trees are kept separately
+        self._cohorts = list(tree_values[:-1])
+        self._cohorts.reverse()
+        self._start = self.max_cookies - 1
+        self.full_trees = tree_values[-1]
+        self.trees = sum(tree_values)
+        # the most cookies on a tree (0 if there are no trees)
+        self.most_cookies = max((cookies for cookies, trees in enumerate(tree_values) if trees), default=0)
+
+    def count(self: object,
+              cookies: int) -> int:
+
+        """
+        Returns the amount of trees with the given amount of cookies.
+           cookies: int (required)
+             the amount of cookies on the trees
+        """
+
+        if cookies == self.max_cookies:
+            return self.full_trees
+        return self._cohorts[(self._start - cookies) % self.max_cookies]
+
+    @property
+    def ripe_trees(self: object) -> int:
+
+        """The amount of trees with at least one cookie."""
+
+        return self.trees - self._cohorts[self._start]
+
+    def grow(self: object) -> None:
+
+        """Grows one cookie on every tree except the ones that already have the max amount of cookies."""
+
+        # the cohort that becomes full is reused for the trees with 0 cookies (there are none after growing)
+        self._start = (self._start + 1) % self.max_cookies
+        self.full_trees += self._cohorts[self._start]
+        self._cohorts[self._start] = 0
+        if self.trees:
+            self.most_cookies = min(self.most_cookies + 1, self.max_cookies)
+
+    def plant(self: object,
+              trees: int) -> None:
+
+        """
+        Adds trees without cookies.
+           trees: int (required)
+             the amount of trees to add
+        """
+
+        self._cohorts[self._start] += trees
+        self.trees += trees
+
+    def harvest(self: object,
+                trees: int=1) -> int:
+
+        """
+        Harvests the trees with the most cookies first and returns the amount of cookies harvested.
+           trees: int (not required)
+             the max amount of trees to harvest. trees without cookies aren't harvested
+        """
+
+        trees = min(trees, self.ripe_trees)
+        cookies = 0
+        while trees:
+            # the most cookies only goes down here and goes up by one when the trees grow, so this is amortized O(1)
+            while not self.count(self.most_cookies):
+                self.most_cookies -= 1
+            trees_just_harvested = min(self.count(self.most_cookies), trees)
+            if self.most_cookies == self.max_cookies:
+                self.full_trees -= trees_just_harvested
+            else:
+                self._cohorts[(self._start - self.most_cookies) % self.max_cookies] -= trees_just_harvested
+            self._cohorts[self._start] += trees_just_harvested
+            cookies += trees_just_harvested * self.most_cookies
+            trees -= trees_just_harvested
+        return cookies
+
+    def to_list(self: object) -> list:
+
+        """Returns the amount of trees with each amount of cookies (the format of the save data)."""
+
+        return [self.count(cookies) for cookies in range(self.max_cookies + 1)]
+
+    def copy(self: object) -> object:
+
+        """Returns a copy of the farm."""
+
+        return TreeFarm(self.to_list())
+
+
+def offline_progress(tree_farm: TreeFarm,
+                     auto_harvesters: int,
+                     seconds: int,
+                     cookies_per_day_counter: int=0,
+                     grow_seconds: int=COOKIE_GROW_SECONDS,
+                     cookies_per_second: int or float=0) -> tuple:
+
+    """
+    Returns what happens to the tree farm while the player is away in format (tree_farm, cookies, cookies_per_day_counter).
+    the result is the same as growing and auto harvesting the trees once every grow_seconds, but it takes
+    the same time for any amount of seconds.
+       tree_farm: TreeFarm (required)
+         the tree farm. it isn't changed (a copy is returned)
+       auto_harvesters: int (required)
+         the amount of trees auto harvested after every time the trees grow
+       seconds: int (required)
+         the seconds the player was away (negative seconds, e.g. after the clock was set back, count as 0)
+       cookies_per_day_counter: int (not required)
+         the seconds since the trees last grew. like update_tree_farm, it doesn't count while there are no trees
+       grow_seconds: int (not required)
+         the seconds it takes for one cookie to grow on the trees
+       cookies_per_second: int or float (not required)
+         the passive income that is earned while away (added to the cookies)
+    """
+
+    tree_farm = tree_farm.copy()
+    seconds = max(seconds, 0)
+    cookies = cookies_per_second * seconds
+    if not tree_farm.trees:
+        return tree_farm, cookies, cookies_per_day_counter
+    grows, cookies_per_day_counter = divmod(cookies_per_day_counter + seconds, grow_seconds)
+    # the farm stops changing after it grows (and is harvested) as many times as there are cookie amounts (excluding 0):
+    # after that, every tree has either been harvested in one of those grows or is full.
+    # then every grow harvests the same amount of cookies, so they are multiplied instead of simulated
+    for i in range(min(grows, tree_farm.max_cookies)):
+        tree_farm.grow()
+        cookies += tree_farm.harvest(auto_harvesters)
+    if grows > tree_farm.max_cookies:
+        tree_farm.grow()
+        cookies += tree_farm.harvest(auto_harvesters) * (grows - tree_farm.max_cookies)
+    return tree_farm, cookies, cookies_per_day_counter
+
+
+def load_save_data(save_data: dict) -> dict:
+
+    """
+    Turns save data loaded from json into the format the game uses (BigNumbers and a TreeFarm) and returns it.
+       save_data: dict (required)
+         the save data loaded from json
+    """
+
+    for key in BIG_NUMBER_KEYS:
+        save_data[key] = BigNumber(save_data[key])
+    save_data['cookie_tree_values'] = TreeFarm(save_data['cookie_tree_values'])
+    return save_data
+
+
+def dump_save_data(save_data: dict) -> dict:
+
+    """
+    Returns a copy of the save data that can be saved with json (see load_save_data).
+       save_data: dict (required)
+         the player's save data
+    """
+
+    return {**save_data, **{key: BigNumber(save_data[key]).to_json() for key in BIG_NUMBER_KEYS},
+            'cookie_tree_values': save_data['cookie_tree_values'].to_list()}
+
+
+def get_upgrade_price(save_data: dict,
+                      dex: int) -> int:
+
+    """
+    Returns the price of the next tier of an upgrade, or 0 if it is at the max tier.
+       save_data: dict (required)
+         the player's save data
+       dex: int (required)
+         the index of the upgrade in UPGRADE_DATA
+    """
+
+    level = save_data[UPGRADE_SHOP_KEYS[dex]]
+    return UPGRADE_DATA[dex][level][0] if level < len(UPGRADE_DATA[dex]) else 0
+
+
+def get_shop_data(save_data: dict) -> list:
+
+    """
+    Returns the data of the shop's items in format [item shop, upgrade shop]. each item is in format
+    [cost, value of what it gives, what it gives (in save data terms)].
+       save_data: dict (required)
+         the player's save data
+    """
+
+    return [[list(item) for item in ITEM_SHOP_DATA],
+            [[get_upgrade_price(save_data, dex), 1, key] for dex, key in enumerate(UPGRADE_SHOP_KEYS)]]
+
+
+def can_buy(save_data: dict,
+            menu: int,
+            dex: int,
+            amount: int=1) -> bool:
+
+    """
+    Returns whether the player can buy an item.
+       save_data: dict (required)
+         the player's save data
+       menu: int (required)
+         0 for the item shop, 1 for the upgrade shop
+       dex: int (required)
+         the index of the item in its shop
+       amount: int (not required)
+         the amount to buy. upgrades are always bought one tier at a time
+    """
+
+    if menu:
+        return save_data[UPGRADE_SHOP_KEYS[dex]] < len(UPGRADE_DATA[dex]) and save_data['score'] >= get_upgrade_price(save_data, dex)
+    if ITEM_SHOP_DATA[dex][2] == 'cookies_per_second' and save_data['cookies_per_click'] <= amount:
+        return False # makes sure the player always has at least 1 non-automatic oven
+    return save_data['score'] >= ITEM_SHOP_DATA[dex][0] * amount
+
+
+def buy(save_data: dict,
+        menu: int,
+        dex: int,
+        amount: int=1) -> None:
+
+    """
+    Buys an item without checking if the player can buy it (see can_buy).
+       save_data: dict (required)
+         the player's save data
+       menu: int (required)
+         0 for the item shop, 1 for the upgrade shop
+       dex: int (required)
+         the index of the item in its shop
+       amount: int (not required)
+         the amount to buy. upgrades are always bought one tier at a time
+    """
+
+    if menu:
+        save_data['score'] -= get_upgrade_price(save_data, dex)
+        save_data[UPGRADE_SHOP_KEYS[dex]] += 1
+        return
+    cost, value, key = ITEM_SHOP_DATA[dex]
+    save_data['score'] -= cost * amount
+    if key == 'cookies_per_second':
+        save_data['cookies_per_click'] -= amount # each perpetual cog makes an oven automatic
+    if key == 'cookie_tree_values':
+        save_data[key].plant(amount)
+    else:
+        save_data[key] += value * amount
+
+
+def max_affordable(save_data: dict,
+                   menu: int,
+                   dex: int) -> int or BigNumber:
+
+    """
+    Returns the most of an item the player can buy right now (0 if they can't buy any), following the same rules as can_buy.
+    for upgrades, it is the amount of tiers in a row the player can afford (they are still bought one tier at a time).
+       save_data: dict (required)
+         the player's save data
+       menu: int (required)
+         0 for the item shop, 1 for the upgrade shop
+       dex: int (required)
+         the index of the item in its shop
+    """
+
+    if menu:
+        # the most tiers whose total price (from the current tier) is at most the score
+        total_prices = UPGRADE_TOTAL_PRICES[dex]
+        level = save_data[UPGRADE_SHOP_KEYS[dex]]
+        return bisect_right(total_prices, save_data['score'] + total_prices[level]) - 1 - level
+    cost, value, key = ITEM_SHOP_DATA[dex]
+    amount = math.floor(BigNumber(save_data['score']) / cost)
+    if save_data['score'] > EXACT_INT_MAX: # big numbers aren't exact, so a tiny part is left so rounding can't make it cost more than the score
+        amount = math.floor(amount * (1 - 1e-15))
+    if key == 'cookies_per_second':
+        # makes sure the player always has at least 1 non-automatic oven (or a tiny part of them when 1 is too small to change a big number)
+        most_cogs = save_data['cookies_per_click'] - 1
+        if most_cogs >= save_data['cookies_per_click']:
+            most_cogs = save_data['cookies_per_click'] * (1 - 1e-15)
+        amount = min(amount, math.floor(most_cogs))
+    elif key not in BIG_NUMBER_KEYS:
+        return int(min(amount, MAX_INT_ITEM_AMOUNT))
+    return max(amount, 0)
+
+
+def click_cookie(save_data: dict,
+                 constant_cookies_stats: list) -> BigNumber:
+
+    """
+    Gives the player the cookies of a click on the cookie and returns the amount.
+       save_data: dict (required)
+         the player's save data
+       constant_cookies_stats: list[int] (required)
+         the clicks in the current second and the seconds clicked in a row with the needed cps
+    """
+
+    save_data['score'] += save_data['cookies_per_click']
+    save_data['total_baked_cookies'] += save_data['cookies_per_click']
+    if save_data['constant_cookies_level']:
+        constant_cookies_stats[0] += 1
+    return save_data['cookies_per_click']
+
+
+def get_special_cookie_amount(save_data: dict) -> BigNumber:
+
+    """
+    Returns the amount of cookies a special cookie gives.
+       save_data: dict (required)
+         the player's save data
+    """
+
+    return math.ceil(save_data['cookies_per_click']**(save_data['special_cookies_level']**0.1)) * 100000
+
+
+def award_special_cookie(save_data: dict,
+                         amount: int or BigNumber) -> int or BigNumber:
+
+    """
+    Gives the player the cookies of an eaten special cookie and returns the amount.
+       save_data: dict (required)
+         the player's save data
+       amount: int or BigNumber (required)
+         the cookies the special cookie gives (see get_special_cookie_amount)
+    """
+
+    save_data['score'] += amount
+    save_data['total_baked_cookies'] += amount
+    return amount
+
+
+def update_special_cookie_timer(save_data: dict,
+                                randint: object=random.randint) -> bool:
+
+    """
+    Counts down a second until the next special cookie and returns whether one should appear now.
+       save_data: dict (required)
+         the player's save data
+       randint: Callable (not required)
+         the function that picks the seconds until the next special cookie (like random.randint)
+    """
+
+    if not save_data['special_cookies_level']:
+        return False
+    save_data['seconds_until_next_special_cookie'] -= 1
+    if save_data['seconds_until_next_special_cookie'] <= 0:
+        save_data['seconds_until_next_special_cookie'] = randint(600, 3600)
+        return True
+    return False
+
+
+def update_constant_cookies(save_data: dict,
+                            constant_cookies_stats: list) -> int or BigNumber:
+
+    """
+    Ends a second of constant cookies and returns the bonus given to the player (0 if there isn't one).
+       save_data: dict (required)
+         the player's save data
+       constant_cookies_stats: list[int] (required)
+         the clicks in the current second and the seconds clicked in a row with the needed cps
+    """
+
+    level = save_data['constant_cookies_level']
+    bonus = 0
+    if level:
+        if constant_cookies_stats[0] >= UPGRADE_DATA[1][level - 1][1]:
+            constant_cookies_stats[1] += 1
+            if constant_cookies_stats[1] >= UPGRADE_DATA[1][level - 1][2]:
+                bonus = save_data['cookies_per_click'] * 10**(level**0.5)
+                save_data['score'] += bonus
+                constant_cookies_stats[1] = 0
+        else:
+            constant_cookies_stats[1] = 0
+        constant_cookies_stats[0] = 0
+    return bonus
+
+
+def update_passive_income(save_data: dict) -> BigNumber:
+
+    """
+    Gives the player a second of passive income and returns the amount.
+       save_data: dict (required)
+         the player's save data
+    """
+
+    save_data['score'] += save_data['cookies_per_second']
+    save_data['total_baked_cookies'] += save_data['cookies_per_second']
+    return save_data['cookies_per_second']
+
+
+def auto_harvest(save_data: dict) -> int:
+
+    """
+    Auto harvests all the trees that can be auto harvested and returns the amount of cookies harvested.
+       save_data: dict (required)
+         the player's save data
+    """
+
+    cookies = save_data['cookie_tree_values'].harvest(save_data['auto_harvesters'])
+    save_data['score'] += cookies
+    save_data['total_baked_cookies'] += cookies
+    return cookies
+
+
+def harvest_tree(save_data: dict) -> int:
+
+    """
+    Harvests the tree with the most cookies (when the player clicks a tree) and returns the amount of cookies harvested.
+       save_data: dict (required)
+         the player's save data
+    """
+
+    cookies = save_data['cookie_tree_values'].harvest(1)
+    save_data['score'] += cookies
+    save_data['total_baked_cookies'] += cookies
+    return cookies
+
+
+def update_tree_farm(save_data: dict,
+                     grow_seconds: int=COOKIE_GROW_SECONDS) -> bool:
+
+    """
+    Counts a second of the tree farm and returns whether the trees grew (and were auto harvested).
+       save_data: dict (required)
+         the player's save data
+       grow_seconds: int (not required)
+         the seconds it takes for one cookie to grow on the trees
+    """
+
+    if not save_data['cookie_tree_values'].trees:
+        return False
+    save_data['cookies_per_day_counter'] = (save_data['cookies_per_day_counter'] + 1) % grow_seconds
+    if save_data['cookies_per_day_counter']:
+        return False
+    save_data['cookie_tree_values'].grow()
+    auto_harvest(save_data)
+    return True
@@ -0,0 +1,261 @@
+'Economy simulator -- fast-forwards many players at once to balance the prices and tiers (needs numpy)'
+
+# run it with: python -m modules.economy_sim --players 5000 --years 2
+# every player has a strategy (how fast they click, how much of the day they play, how they split their cookies between the item shop's items,
+# and whether they buy upgrades). all the players are simulated together with numpy arrays, one tree grow
+# (COOKIE_GROW_SECONDS) at a time. clicking, passive income, and the bonuses are added as their average over
+# the step, so it is meant for comparing prices and tiers, not for exact scores (see modules/economy.py for those)
+
+import argparse
+import math
+import time
+from modules.economy import (
+        ITEM_SHOP_DATA,
+        UPGRADE_DATA,
+        COOKIE_GROW_SECONDS,
+        )
+
+try:
+    import numpy as np
+except ImportError: # numpy is only needed for the simulator, so the game doesn't need it
+    np = None
+
+SPECIAL_COOKIE_SECONDS = (600 + 3600) / 2 # the average seconds between special cookies
+# the amounts of a player are stored divided by 10**exponent (all with the same exponent, like BigNumber's mantissa and exponent),
+# so they never go past the biggest float. when one goes past RESCALE_POWER powers of ten, they are all divided to about RESCALED_POWER
+RESCALE_POWER = 200
+RESCALED_POWER = 100
+FLOAT_MAX_POWER = 308 # the power of ten of the biggest float (the amounts past it would have overflowed without the exponent)
+ITEM_KEYS = tuple(item[2] for item in ITEM_SHOP_DATA)
+AMOUNT_KEYS = ('score', 'total_baked_cookies', 'auto_harvesters', 'cookies_per_second', 'cookies_per_click') # the save data that is divided by 10**exponent
+
+
+def random_strategies(players: int,
+                      seed: int=None) -> dict:
+
+    """
+    Returns random strategies for the simulator.
+       players: int (required)
+         the amount of strategies
+       seed: int (not required)
+         the seed of the random numbers
+    """
+
+    if np is None:
+        raise ModuleNotFoundError('the economy simulator needs numpy (pip install numpy)')
+    rng = np.random.default_rng(seed)
+    weights = rng.random((players, len(ITEM_SHOP_DATA)))
+    return {'clicks_per_second': rng.uniform(0, 10, players), # while they are playing
+            'play_fraction': rng.uniform(0, 0.25, players), # the part of the day they are playing (they are offline the rest of the time)
+            'weights': weights / weights.sum(axis=1, keepdims=True), # how the cookies spent are split between the items
+            'spend_fraction': rng.uniform(0.05, 1, players), # the part of their cookies spent every step
+            'buy_upgrades': rng.random(players) < 0.8}
+
+
+def simulate(strategies: dict,
+             seconds: int or float,
+             item_shop_data: list or tuple=ITEM_SHOP_DATA,
+             upgrade_data: list or tuple=UPGRADE_DATA,
+             grow_seconds: int=COOKIE_GROW_SECONDS) -> dict:
+
+    """
+    Simulates the players with the given strategies for the given seconds and returns their final save data as arrays,
+    plus the seconds it took each player to reach each upgrade tier ('special_cookies_times' and 'constant_cookies_times';
+    nan if they didn't reach it). the amounts (cookies, items, and trees) are stored divided by 10**save_data['exponent']
+    (see format_big). 'overflow_times' is the seconds it took each player to get an amount past the biggest float, and
+    'power_overflow_times' is the seconds it took to get its power of ten past it too (nan if they didn't; the amounts
+    are inf or nan after that).
+       strategies: dict (required)
+         the arrays of the strategies (see random_strategies)
+       seconds: int or float (required)
+         the game time to simulate
+       item_shop_data: list or tuple (not required)
+         the item shop's items in the format of ITEM_SHOP_DATA (to try other prices)
+       upgrade_data: list or tuple (not required)
+         the upgrade tiers in the format of UPGRADE_DATA (to try other prices and tiers)
+       grow_seconds: int (not required)
+         the seconds it takes for one cookie to grow on the trees (and the length of a step)
+    """
+
+    if np is None:
+        raise ModuleNotFoundError('the economy simulator needs numpy (pip install numpy)')
+    clicks_per_second = np.asarray(strategies['clicks_per_second'], dtype=float)
+    play_fraction = np.asarray(strategies['play_fraction'], dtype=float)
+    # the arrays with a number for every item or cookie amount are stored with the players on the second axis,
+    # so every item's row is contiguous (numpy is much slower along the short axis)
+    weights = np.ascontiguousarray(np.asarray(strategies['weights'], dtype=float).T)
+    spend_fraction = np.asarray(strategies['spend_fraction'], dtype=float)
+    buy_upgrades = np.asarray(strategies['buy_upgrades'], dtype=bool)
+    players = len(clicks_per_second)
+
+    # the save data of every player (floats, so late game numbers don't overflow numpy's ints)
+    save_data = {key: np.zeros(players) for key in ('score', 'total_baked_cookies', 'auto_harvesters', 'cookies_per_second')}
+    save_data['cookies_per_click'] = np.ones(players)
+    # the power of ten every amount of the player is divided by (a float; the special cookies make the score grow so fast
+    # that the power of ten itself goes past the biggest int64 in a few weeks)
+    exponents = np.zeros(players)
+    overflow_times = np.full(players, np.nan)
+    power_overflow_times = np.full(players, np.nan)
+    tree_values = np.zeros((11, players))
+    levels = [np.zeros(players, dtype=int) for i in range(len(upgrade_data))]
+    tier_times = [np.full((players, len(tiers)), np.nan) for tiers in upgrade_data]
+    # the price of the next tier (inf at the max tier), and the special cookies' exponent and the constant cookies' bonus,
+    # needed clicks per second and needed seconds of every tier
+    tier_prices = [np.array([tier[0] for tier in tiers] + [np.inf], dtype=float) for tiers in upgrade_data]
+    special_exponents = np.arange(len(upgrade_data[0]) + 1)**0.1
+    bonus_multipliers = 10**np.arange(len(upgrade_data[1]) + 1)**0.5
+    needed_clicks = np.array([0] + [tier[1] for tier in upgrade_data[1]], dtype=float)
+    needed_seconds = np.array([1] + [tier[2] for tier in upgrade_data[1]], dtype=float)
+    costs = np.array([item[0] for item in item_shop_data], dtype=float)[:, None]
+    values = [item[1] for item in item_shop_data]
+    keys = [item[2] for item in item_shop_data]
+    cookie_amounts = np.arange(len(tree_values) - 1, 0, -1, dtype=float)[:, None] # the cookies on the trees from the fullest
+    trees_harvested = np.zeros((len(tree_values) - 1, players))
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for step in range(int(seconds // grow_seconds)):
+            # special cookies (see get_special_cookie_amount) are a power of the cookies per click, so their power of ten
+            # (divided like the amounts) is worked out first; they are only caught while playing
+            special_exponent = special_exponents[levels[0]]
+            special_power = np.where((levels[0] > 0) & (clicks_per_second > 0),
+                                     special_exponent * np.log10(save_data['cookies_per_click']) + (special_exponent - 1) * exponents + 5, -np.inf)
+            # the amounts are divided when they get too big (the special cookies are counted before they are added)
+            biggest_power = np.fmax(np.log10(np.maximum.reduce([save_data[key] for key in AMOUNT_KEYS] + [tree_values.max(axis=0)])), special_power)
+            overflow_times[np.isnan(overflow_times) & (biggest_power + exponents > FLOAT_MAX_POWER)] = step * grow_seconds
+            power_overflow_times[np.isnan(power_overflow_times) & ~np.isfinite(biggest_power)] = step * grow_seconds
+            shift = np.where(biggest_power > RESCALE_POWER, np.ceil(biggest_power) - RESCALED_POWER, 0)
+            shift[~np.isfinite(exponents + shift)] = 0 # the power of ten can't go past the biggest float either, so the amounts overflow
+            if shift.any():
+                special_power -= shift
+                factor = 10.0**-shift
+                for key in AMOUNT_KEYS:
+                    save_data[key] *= factor
+                tree_values *= factor
+                exponents += shift
+
+            cookies_per_click = save_data['cookies_per_click']
+            # clicking while playing and passive income all the time (see click_cookie, update_passive_income, and offline_progress)
+            play_seconds = play_fraction * grow_seconds
+            cookies = cookies_per_click * clicks_per_second * play_seconds + save_data['cookies_per_second'] * grow_seconds
+            # while the amounts aren't divided, the special cookies are worked out like the game does
+            special_amount = np.where(exponents == 0, np.ceil(cookies_per_click**special_exponent) * 100000, 10**special_power)
+            cookies += np.where(special_power > -np.inf, special_amount * play_seconds / SPECIAL_COOKIE_SECONDS, 0)
+            # constant cookies bonuses (see update_constant_cookies); the bonus isn't added to the total baked cookies
+            bonus = np.where((levels[1] > 0) & (clicks_per_second >= needed_clicks[levels[1]]),
+                             cookies_per_click * bonus_multipliers[levels[1]] * play_seconds / needed_seconds[levels[1]], 0)
+
+            # the trees grow and are auto harvested (see TreeFarm.grow and TreeFarm.harvest)
+            tree_values[-1] += tree_values[-2]
+            tree_values[1:-1] = tree_values[:-2]
+            tree_values[0] = 0
+            # the trees with the most cookies are harvested first: the trees harvested from the fullest trees down to each
+            # amount of cookies are the trees there (added up) until there are no auto harvesters left
+            # (added up with a loop; numpy's cumsum is a lot slower along the first axis)
+            trees = np.zeros(players)
+            for dex in range(len(trees_harvested)):
+                trees += tree_values[-1 - dex]
+                trees_harvested[dex] = trees
+            np.minimum(trees_harvested, save_data['auto_harvesters'], out=trees_harvested)
+            trees_harvested[1:] -= trees_harvested[:-1].copy()
+            cookies += (trees_harvested * cookie_amounts).sum(axis=0)
+            tree_values[:0:-1] -= trees_harvested
+            tree_values[0] += trees_harvested.sum(axis=0)
+
+            save_data['score'] += cookies + bonus
+            save_data['total_baked_cookies'] += cookies
+
+            # the upgrades are bought one tier per step (see can_buy and buy); the prices are divided like the amounts
+            scale = 10.0**-exponents
+            for dex, prices in enumerate(tier_prices):
+                bought = buy_upgrades & (levels[dex] < len(prices) - 1) & (save_data['score'] >= prices[levels[dex]] * scale)
+                if bought.any():
+                    save_data['score'] -= np.where(bought, prices[levels[dex]] * scale, 0)
+                    tier_times[dex][bought, levels[dex][bought]] = (step + 1) * grow_seconds
+                    levels[dex] += bought
+
+            # the items are bought in bulk with a part of the score (the amounts are divided like the score,
+            # and they are only whole numbers while they aren't divided)
+            amounts = save_data['score'] * spend_fraction * weights / costs
+            amounts = np.where(exponents == 0, np.floor(amounts), amounts)
+            if 'cookies_per_second' in keys:
+                # makes sure the player always has at least 1 non-automatic oven
+                dex = keys.index('cookies_per_second')
+                amounts[dex] = np.clip(amounts[dex], 0, save_data['cookies_per_click'] - scale)
+            save_data['score'] -= (amounts * costs).sum(axis=0)
+            for dex, key in enumerate(keys):
+                if key == 'cookie_tree_values':
+                    tree_values[0] += amounts[dex] # new trees have no cookies
+                else:
+                    save_data[key] += amounts[dex] * values[dex]
+                if key == 'cookies_per_second':
+                    save_data['cookies_per_click'] -= amounts[dex] # each perpetual cog makes an oven automatic
+
+    save_data['cookie_tree_values'] = tree_values.T # in the save data's format (a list of 11 numbers for every player)
+    save_data['special_cookies_level'], save_data['constant_cookies_level'] = levels[:2]
+    save_data['special_cookies_times'], save_data['constant_cookies_times'] = tier_times[:2]
+    save_data['exponent'] = exponents
+    save_data['overflow_times'] = overflow_times
+    save_data['power_overflow_times'] = power_overflow_times
+    return save_data
+
+
+def format_big(mantissa: float,
+               exponent: float) -> str:
+
+    """
+    Returns an amount of the simulator (mantissa * 10**exponent) in scientific notation.
+       mantissa: float (required)
+         the amount divided by 10**exponent
+       exponent: float (required)
+         the power of ten the amount was divided by
+    """
+
+    if not mantissa:
+        return '0'
+    if not (math.isfinite(mantissa) and math.isfinite(exponent)): # the power of ten went past the biggest float too
+        return str(mantissa if math.isnan(mantissa) else math.copysign(math.inf, mantissa))
+    power_of_ten = math.floor(math.log10(abs(mantissa)))
+    if abs(exponent) >= 1e15: # the power of ten isn't a whole number anymore, so only it is shown
+        return f'10^{power_of_ten + exponent:.3e}'
+    return f'{mantissa / 10.0**power_of_ten:.3f}e{int(power_of_ten + exponent)}'
+
+
+def main() -> None:
+
+    """Simulates random strategies and prints how the best ones played and how long the upgrade tiers took."""
+
+    parser = argparse.ArgumentParser(description='Simulates the economy for many random strategies.')
+    parser.add_argument('--players', type=int, default=5000, help='the amount of strategies')
+    parser.add_argument('--years', type=float, default=1, help='the game time to simulate in years')
+    parser.add_argument('--seed', type=int, default=None, help='the seed of the random strategies')
+    parser.add_argument('--top', type=int, default=5, help='the amount of best strategies to print')
+    args = parser.parse_args()
+
+    strategies = random_strategies(args.players, args.seed)
+    start_time = time.perf_counter()
+    result = simulate(strategies, args.years * 365 * 86400)
+    print(f'simulated {args.players} players for {args.years} years in {time.perf_counter() - start_time:.2f} seconds')
+
+    # the best strategies are the ones that bought every upgrade tier first (then the ones that baked the most)
+    all_tiers_time = np.nan_to_num(np.fmax(result['special_cookies_times'][:, -1], result['constant_cookies_times'][:, -1]), nan=np.inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        baked_power = np.log10(result['total_baked_cookies']) + result['exponent']
+    print(f'best {args.top} strategies:')
+    for dex in np.lexsort((-baked_power, all_tiers_time))[:args.top]:
+        print(f'  all tiers in {all_tiers_time[dex] / 86400:.1f} days | {format_big(result['total_baked_cookies'][dex], result['exponent'][dex])} baked | clicks/s {strategies['clicks_per_second'][dex]:.1f} | plays {strategies['play_fraction'][dex] * 24:.1f} h/day | spends {strategies['spend_fraction'][dex]:.2f} '
+              f'| weights {' '.join(f'{key} {weight:.2f}' for key, weight in zip(ITEM_KEYS, strategies['weights'][dex]))} '
+              f'| upgrades {'yes' if strategies['buy_upgrades'][dex] else 'no'}')
+    for name in ('special_cookies', 'constant_cookies'):
+        times = result[f'{name}_times']
+        print(f'{name} tiers (players that reached it, median days):')
+        for tier in range(times.shape[1]):
+            reached = ~np.isnan(times[:, tier])
+            print(f'  {tier + 1}: {reached.mean() * 100:.1f}%' + (f', {np.median(times[reached, tier]) / 86400:.1f} days' if reached.any() else ''))
+    for name, times in (('players past the biggest float', result['overflow_times']),
+                        ('players with a power of ten past the biggest float (inf or nan after it)', result['power_overflow_times'])):
+        overflowed = ~np.isnan(times)
+        print(f'{name}: {overflowed.mean() * 100:.1f}%' + (f', median {np.median(times[overflowed]) / 86400:.1f} days' if overflowed.any() else ''))
+
+
+if __name__ == '__main__':
+    main()
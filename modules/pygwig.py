@@ -4,6 +4,9 @@ import sys
 import time
 import math
 import random
+import json
+from collections import OrderedDict, deque
+from array import array
 from typing import Callable
 import pygame as pg
 from pygame import mixer as mx
@@ -11,11 +14,15 @@ from modules.utils import (
         scientific_notation,
         center_word_on_image,
         math_eval,
-        last_index_greater_than_zero,
         image_list,
         element_wise_addition,
         arabic_to_roman,
         render_rect,
+        LazyAsset,
+        DialogueFrame,
+        get_asset,
+        render_text,
+        text_cache_stats,
         )
 
 # i thought it was just utils (without module.) but since its run from main, I put modules.
@@ -24,6 +31,515 @@ from modules.utils import (
 
 type image_dict = dict(str=pg.Surface)
 
+# the scaled images of the buttons' resize animations, shared by all buttons
+# the keys are (image, size); the least recently used image is removed when it gets too big
+SCALE_CACHE_SIZE = 256
+scale_cache = OrderedDict()
+
+# the compiled code of the widgets (click code, enter code, etc.); the keys are the code strings
+code_cache = {}
+
+# how much work the widgets did, for the frame profiler. they only go up (the profiler takes the differences)
+# updates: widget updates, blits: images the widgets gave to be blitted, scales: images scaled (cache misses),
+# text_box_renders: text box images rendered again
+widget_counters = {'updates': 0, 'blits': 0, 'scales': 0, 'text_box_renders': 0}
+
+# events after which the whole window has to be drawn again (dirty rect rendering)
+REDRAW_EVENTS = (pg.WINDOWEXPOSED, pg.WINDOWRESIZED, pg.WINDOWRESTORED, pg.WINDOWSHOWN)
+# events from the user; a frame loop stops idling as soon as it gets one
+INPUT_EVENTS = (pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP, pg.MOUSEWHEEL, pg.KEYDOWN, pg.KEYUP,
+                pg.TEXTINPUT, pg.TEXTEDITING, pg.WINDOWENTER, pg.WINDOWFOCUSGAINED)
+# events that hide and show the window
+HIDE_EVENTS = (pg.WINDOWMINIMIZED, pg.WINDOWHIDDEN)
+SHOW_EVENTS = (pg.WINDOWRESTORED, pg.WINDOWSHOWN, pg.WINDOWMAXIMIZED, pg.WINDOWEXPOSED)
+
+def cached_scale(image: pg.Surface,
+                 size: tuple) -> pg.Surface:
+
+    'Scales an image using the scale cache.\n\n' \
+    '   image: pygame.Surface (required)\n' \
+    '     the image to scale. it should not be changed after it is scaled\n' \
+    '   size: tuple[int] (required)\n' \
+    '     the size to scale the image to'
+
+    if image.get_size() == size:
+        return image
+    key = (image, size) # surfaces are hashed by identity
+    scaled_image = scale_cache.get(key)
+    if scaled_image is None:
+        scaled_image = scale_cache[key] = pg.transform.scale(image, size)
+        widget_counters['scales'] += 1
+        if len(scale_cache) > SCALE_CACHE_SIZE:
+            scale_cache.popitem(last=False)
+    else:
+        scale_cache.move_to_end(key)
+    return scaled_image
+
+def compile_code(code: str or Callable) -> object:
+
+    'Compiles a code string once so it isn\'t parsed every time it is run. code objects and\n' \
+    'callables are returned as they are.\n\n' \
+    '   code: str, code object or Callable (required)\n' \
+    '     the code to compile'
+
+    if type(code) != str:
+        return code
+    compiled_code = code_cache.get(code)
+    if compiled_code is None:
+        compiled_code = code_cache[code] = compile(code, '<widget code>', 'exec')
+    return compiled_code
+
+def run_code(code: object,
+             widget: object,
+             event: pg.event.Event=None) -> None:
+
+    'Runs the code of a widget. callables are called with the widget and code objects are run\n' \
+    'with exec() (in this module) with the widget as self and the event that ran it as event.\n\n' \
+    '   code: code object or Callable (required)\n' \
+    '     the code to run\n' \
+    '   widget: object (required)\n' \
+    '     the widget the code belongs to\n' \
+    '   event: pygame.event.Event (not required)\n' \
+    '     the event that ran the code (None if it wasn\'t run by an event)'
+
+    if callable(code):
+        code(widget)
+    else:
+        # one namespace (not separate globals and locals), so comprehensions and lambdas in the code can see self too
+        exec(code, {**globals(), 'self': widget, 'event': event})
+
+def release_assets(assets: list or tuple) -> None:
+
+    'Releases the lazy images in a list (other images are skipped).\n\n' \
+    '   assets: list or tuple[pygame.Surface or LazyAsset or DialogueFrame] (required)\n' \
+    '     the images to release'
+
+    for asset in assets:
+        if isinstance(asset, (LazyAsset, DialogueFrame)) and asset.surface is not None:
+            # the scaled versions of the image would keep it in memory
+            for key in [key for key in scale_cache if key[0] is asset.surface]:
+                del scale_cache[key]
+            asset.release()
+
+def merge_rects(rects: list or tuple,
+                bounds: pg.Rect) -> list:
+
+    'Clips rects to the bounds and merges the ones that overlap.\n\n' \
+    '   rects: list or tuple[pygame.Rect] (required)\n' \
+    '     the (dirty) rects to merge\n' \
+    '   bounds: pygame.Rect (required)\n' \
+    '     the rect of the surface the rects are on'
+
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds) # clip() returns a new rect, so the widget's rect doesn't change
+        if not rect.width or not rect.height:
+            continue
+        dex = rect.collidelist(merged)
+        while dex != -1:
+            rect.union_ip(merged.pop(dex))
+            dex = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+def blit_indicators(surf: pg.Surface,
+                    blits: list or tuple) -> None:
+
+    'Blits indicators from IndicatorPool.get_blits onto the surface. only the ones inside the\n' \
+    'surface\'s clip are blitted, so they can be blitted once for every dirty rect.\n\n' \
+    '   surf: pygame.Surface (required)\n' \
+    '     the surface to blit the indicators onto\n' \
+    '   blits: list or tuple (required)\n' \
+    '     the (surface, position, alpha) of every indicator'
+
+    clip = surf.get_clip()
+    for image, pos, alpha in blits:
+        if clip.colliderect((pos, image.get_size())):
+            image.set_alpha(alpha)
+            surf.blit(image, pos)
+            widget_counters['blits'] += 1
+
+def copy_surface(surface: pg.Surface,
+                 buffer: pg.Surface or None) -> pg.Surface:
+
+    'Copies a surface into buffer and returns it. a new copy is only made if the buffer\n' \
+    'is None or doesn\'t match the surface.\n\n' \
+    '   surface: pygame.Surface (required)\n' \
+    '     the surface to copy\n' \
+    '   buffer: pygame.Surface or None (required)\n' \
+    '     the surface the last copy was made into'
+
+    # a colorkey or alpha would be blended by blit instead of copied
+    if (buffer is None or buffer.get_size() != surface.get_size() or buffer.get_bitsize() != surface.get_bitsize()
+            or surface.get_colorkey() or surface.get_alpha() is not None):
+        return surface.copy()
+    buffer.blit(surface, (0, 0))
+    return buffer
+
+def scale_surface(surface: pg.Surface,
+                  size: list or tuple,
+                  buffer: pg.Surface or None) -> pg.Surface:
+
+    'Scales a surface into buffer and returns it. a new buffer is only made if the buffer\n' \
+    'is None or doesn\'t match the size and format.\n\n' \
+    '   surface: pygame.Surface (required)\n' \
+    '     the surface to scale\n' \
+    '   size: list or tuple[int] (required)\n' \
+    '     the size to scale the surface to\n' \
+    '   buffer: pygame.Surface or None (required)\n' \
+    '     the surface the last scale was made into'
+
+    if buffer is None or buffer.get_size() != tuple(size) or buffer.get_bitsize() != surface.get_bitsize() or buffer.get_masks() != surface.get_masks():
+        buffer = pg.Surface(size, 0, surface)
+    return pg.transform.scale(surface, size, buffer)
+
+class FrameLoop(object):
+
+    'A game loop that handles the events, updates, and renders every frame. the delta time is\n' \
+    'measured with time.perf_counter and the frame rate can be capped, so the loop sleeps instead\n' \
+    'of spinning when vsync isn\'t available. it can also idle: when there was no input for a while\n' \
+    '(or the window is unfocused or hidden), it waits for events at a low frame rate.'
+
+    def __init__(self: object,
+                 update: Callable,
+                 render: Callable,
+                 handle_event: Callable=None,
+                 condition: Callable=lambda: 1,
+                 frame_cap: int=0,
+                 fixed_step: float=0,
+                 max_delta_time: float=0.25,
+                 idle_time: float=0,
+                 idle_frame_cap: int=0,
+                 idle_blocked: Callable=lambda: 0,
+                 profiler: object=None) -> None:
+
+        'The initialization function of the FrameLoop class.\n\n' \
+        '   update: Callable (required)\n' \
+        '     the function run with the delta time (in seconds) every frame\n' \
+        '   render: Callable (required)\n' \
+        '     the function run after updating. it is not run if the loop was stopped while updating\n' \
+        '     or if the window is hidden while idling is on. the interpolation attribute can be used\n' \
+        '     to render between fixed steps\n' \
+        '   handle_event: Callable (not required)\n' \
+        '     the function run on every event from pygame.event.get()\n' \
+        '   condition: Callable (not required)\n' \
+        '     the loop runs while this returns true (and the loop isn\'t stopped)\n' \
+        '   frame_cap: int (not required)\n' \
+        '     the max frames per second. 0 means uncapped\n' \
+        '   fixed_step: float (not required)\n' \
+        '     if it isn\'t 0, update is run with this delta time (in seconds) as many times as needed\n' \
+        '     to catch up instead of once with the frame\'s delta time\n' \
+        '   max_delta_time: float (not required)\n' \
+        '     the max delta time of a frame so a long freeze doesn\'t make things jump (or make the\n' \
+        '     fixed steps never catch up). 0 means unlimited\n' \
+        '   idle_time: float (not required)\n' \
+        '     the seconds without input before the loop idles. 0 means the loop never idles.\n' \
+        '     it needs handle_event because idling waits for the events\n' \
+        '   idle_frame_cap: int (not required)\n' \
+        '     the max frames per second while idling. 0 means it only runs a frame when an event comes.\n' \
+        '     while the window is hidden, it only runs a frame when an event comes\n' \
+        '   idle_blocked: Callable (not required)\n' \
+        '     the loop doesn\'t idle while this returns true (e.g. while an animation the player is\n' \
+        '     watching is running), unless the window is hidden\n' \
+        '   profiler: FrameProfiler (not required)\n' \
+        '     the profiler that measures the events, update, and render sections of every frame.\n' \
+        '     render can mark its own sections before the render section is marked'
+
+        self.update = update
+        self.render = render
+        self.handle_event = handle_event
+        self.condition = condition
+        self.frame_cap = frame_cap
+        self.fixed_step = fixed_step
+        self.max_delta_time = max_delta_time
+        self.idle_time = idle_time
+        self.idle_frame_cap = idle_frame_cap
+        self.idle_blocked = idle_blocked
+        self.profiler = profiler
+        self.running = 0
+        self.idle = 0
+        self.hidden = 0
+        self.focused = 1
+        self.delta_time = 0
+        self.interpolation = 1 # how far the render is between the last fixed step and the next one (0-1)
+        self._accumulator = 0
+        self._last_time = time.perf_counter()
+        self._input_time = self._last_time
+        self._waited_event = None # the event that ended the last idle wait
+
+    def reset_time(self: object) -> None:
+
+        'Makes the next frame\'s delta time start from now (e.g. after the window was being resized).'
+
+        self._last_time = time.perf_counter()
+
+    def stop(self: object) -> None:
+
+        'Stops the loop after the current frame.'
+
+        self.running = 0
+
+    def start(self: object) -> None:
+
+        'Starts the loop without running it, so it can be stepped (e.g. headless).'
+
+        self.running = 1
+        self._accumulator = 0
+        self.interpolation = 1
+        self.reset_time()
+        self._input_time = self._last_time
+
+    def step(self: object,
+             delta_time: float) -> None:
+
+        'Runs one frame of the loop with the given delta time without measuring time or waiting.\n\n' \
+        '   delta_time: float (required)\n' \
+        '     the time of the frame in seconds'
+
+        self.delta_time = delta_time
+        if self.profiler:
+            self.profiler.begin_frame(delta_time)
+        if self.handle_event:
+            events = pg.event.get()
+            if self._waited_event:
+                events.insert(0, self._waited_event)
+                self._waited_event = None
+            for event in events:
+                if event.type in INPUT_EVENTS:
+                    self._input_time = self._last_time
+                    self.focused = self.focused or event.type == pg.WINDOWFOCUSGAINED
+                elif event.type == pg.WINDOWFOCUSLOST:
+                    self.focused = 0
+                elif event.type in HIDE_EVENTS:
+                    self.hidden = 1
+                elif event.type in SHOW_EVENTS:
+                    self.hidden = 0
+                self.handle_event(event)
+        if self.profiler:
+            self.profiler.mark('events')
+
+        if self.fixed_step:
+            self._accumulator += self.delta_time
+            while self._accumulator >= self.fixed_step:
+                self.update(self.fixed_step)
+                self._accumulator -= self.fixed_step
+            self.interpolation = self._accumulator / self.fixed_step
+        else:
+            self.update(self.delta_time)
+        if self.profiler:
+            self.profiler.mark('update')
+
+        if self.running and not (self.hidden and self.idle_time):
+            self.render()
+        if self.profiler:
+            self.profiler.mark('render')
+            self.profiler.end_frame()
+
+    def tick(self: object) -> None:
+
+        'Runs one frame of the loop and sleeps for the rest of the frame if the frame rate is capped.'
+
+        frame_start = time.perf_counter()
+        delta_time = frame_start - self._last_time
+        if self.max_delta_time:
+            delta_time = min(delta_time, self.max_delta_time)
+        self._last_time = frame_start
+        self.step(delta_time)
+
+        self.idle = bool(self.idle_time and self.handle_event and (self.hidden or (
+            (not self.focused or frame_start - self._input_time >= self.idle_time) and not self.idle_blocked())))
+        if self.idle:
+            # waits for an event instead of sleeping, so input brings back the full frame rate right away
+            if self.idle_frame_cap and not self.hidden:
+                event = pg.event.wait(int(1000 / self.idle_frame_cap))
+            else:
+                event = pg.event.wait()
+            if event.type != pg.NOEVENT:
+                self._waited_event = event
+        elif self.frame_cap:
+            # the next frame starts 1 / frame_cap seconds after this one started
+            remaining_time = frame_start + 1 / self.frame_cap - time.perf_counter()
+            if remaining_time > 0:
+                time.sleep(remaining_time)
+
+    def run(self: object) -> None:
+
+        'Runs the loop until it is stopped or the condition is false.'
+
+        self.start()
+        while self.running and self.condition():
+            self.tick()
+        self.running = 0
+
+class FrameProfiler(object):
+
+    'Measures how long each part of a frame takes and how much work the widgets did, and draws an\n' \
+    'overlay with the frame time, the frame rate, and a rolling graph of the frame times. it is cheap\n' \
+    'while it is off (a check per mark), so it can stay in the game loop. the last frames are kept in a\n' \
+    'ring buffer and can be dumped to a json file.'
+
+    def __init__(self: object,
+                 sections: list or tuple=('events', 'update', 'render', 'display'),
+                 history: int=3600,
+                 overlay_size: list or tuple=(240, 120),
+                 target_frame_time: float=1/60) -> None:
+
+        'The initialization function of the FrameProfiler class.\n\n' \
+        '   sections: list or tuple[str] (not required)\n' \
+        '     the names of the parts of a frame. a mark adds the time since the last mark to its section,\n' \
+        '     so they should be marked in order (a section can be marked more than once per frame)\n' \
+        '   history: int (not required)\n' \
+        '     the number of frames kept. the oldest frames are removed when there are more\n' \
+        '   overlay_size: list or tuple[int] (not required)\n' \
+        '     the size of the overlay in format (width, height)\n' \
+        '   target_frame_time: float (not required)\n' \
+        '     the seconds a frame should take. the graph\'s line is at this time, and slower frames are red'
+
+        self.enabled = 0
+        self.sections = tuple(sections)
+        self.counter_names = (*widget_counters, 'text_renders')
+        self.columns = ('delta_time', 'frame_time', *self.sections, *self.counter_names)
+        self.samples = deque(maxlen=history) # one tuple per frame in the order of the columns
+        self.overlay_size = tuple(overlay_size)
+        self.target_frame_time = target_frame_time
+        self._section_times = dict.fromkeys(self.sections, 0)
+        self._delta_time = 0
+        self._frame_start = 0
+        self._last_mark = 0
+        self._counters = ()
+        self._measuring = 0 # frames that started while the profiler was off aren't added
+        # the text is only rendered again a few times a second so it can be read (and it's cheaper)
+        self._text_images = []
+        self._text_frames = 0
+        self._graph = pg.Surface((self.overlay_size[0] - 8, self.overlay_size[1] // 3))
+
+    def _get_counters(self: object) -> tuple:
+        return (*widget_counters.values(), text_cache_stats['misses'])
+
+    def toggle(self: object) -> None:
+
+        'Turns the profiler on or off. the samples are kept.'
+
+        self.enabled = not self.enabled
+        self._text_frames = 0
+        self._graph.fill((0, 0, 0))
+
+    def begin_frame(self: object,
+                    delta_time: float) -> None:
+
+        'Starts measuring a frame.\n\n' \
+        '   delta_time: float (required)\n' \
+        '     the time since the last frame started in seconds'
+
+        if self.enabled:
+            for section in self._section_times:
+                self._section_times[section] = 0
+            self._counters = self._get_counters()
+            self._delta_time = delta_time
+            self._measuring = 1
+            self._frame_start = self._last_mark = time.perf_counter()
+
+    def mark(self: object,
+             section: str) -> None:
+
+        'Adds the time since the last mark (or the start of the frame) to a section.\n\n' \
+        '   section: str (required)\n' \
+        '     the name of the section'
+
+        if self.enabled:
+            now = time.perf_counter()
+            self._section_times[section] += now - self._last_mark
+            self._last_mark = now
+
+    def end_frame(self: object) -> None:
+
+        'Stops measuring the frame and adds it to the samples.'
+
+        if self._measuring and self.enabled:
+            self.samples.append((self._delta_time, time.perf_counter() - self._frame_start, *self._section_times.values(),
+                                 *(counter - last_counter for counter, last_counter in zip(self._get_counters(), self._counters))))
+        self._measuring = 0
+
+    def get_averages(self: object,
+                     frames: int=30) -> dict:
+
+        'Returns the average of every column over the last frames.\n\n' \
+        '   frames: int (not required)\n' \
+        '     the number of frames to average'
+
+        samples = list(self.samples)[-frames:]
+        if not samples:
+            return dict.fromkeys(self.columns, 0)
+        return {column: sum(sample[dex] for sample in samples) / len(samples) for dex, column in enumerate(self.columns)}
+
+    def get_rect(self: object,
+                 pos: list or tuple=(0, 0)) -> pg.Rect:
+
+        'Returns the rect of the overlay.\n\n' \
+        '   pos: list or tuple[int] (not required)\n' \
+        '     the top left of the overlay'
+
+        return pg.Rect(pos, self.overlay_size)
+
+    def render(self: object,
+               surf: pg.Surface,
+               font: pg.font.Font,
+               pos: list or tuple=(0, 0)) -> pg.Rect:
+
+        'Renders the overlay onto the given surface.\n\n' \
+        '   surf: pygame.Surface (required)\n' \
+        '     the surface to render the overlay onto\n' \
+        '   font: pygame.font.Font (required)\n' \
+        '     the font of the text\n' \
+        '   pos: list or tuple[int] (not required)\n' \
+        '     the top left of the overlay'
+
+        rect = self.get_rect(pos)
+        if not self.samples:
+            return surf.fill((0, 0, 0), rect)
+
+        # the graph moves one pixel to the left every frame and the newest frame is drawn on the right
+        graph_width, graph_height = self._graph.get_size()
+        frame_time = self.samples[-1][1]
+        self._graph.scroll(-1, 0)
+        self._graph.fill((0, 0, 0), (graph_width - 1, 0, 1, graph_height))
+        # the line is at the target time, which is half the graph's height
+        bar_height = min(round(frame_time / self.target_frame_time * graph_height / 2), graph_height)
+        self._graph.fill((255, 64, 64) if frame_time > self.target_frame_time else (64, 255, 64),
+                         (graph_width - 1, graph_height - bar_height, 1, bar_height))
+        self._graph.set_at((graph_width - 1, graph_height // 2), (255, 255, 255))
+
+        self._text_frames -= 1
+        if self._text_frames <= 0:
+            self._text_frames = 15
+            averages = self.get_averages()
+            lines = [f'{1 / averages['delta_time'] if averages['delta_time'] else 0:.0f} fps  frame {averages['frame_time'] * 1000:.2f} ms  '
+                     f'max {max(sample[1] for sample in self.samples) * 1000:.2f} ms',
+                     *('  '.join(f'{section} {averages[section] * 1000:.2f}' for section in self.sections[dex:dex + 3])
+                       for dex in range(0, len(self.sections), 3)),
+                     '  '.join(f'{name} {averages[name]:.0f}' for name in self.counter_names)]
+            self._text_images = [font.render(line, 0, (255, 255, 255), wraplength=rect.width - 8) for line in lines]
+
+        surf.fill((0, 0, 0), rect)
+        y = rect.y + 4
+        for image in self._text_images:
+            surf.blit(image, (rect.x + 4, y))
+            y += image.get_height()
+        surf.blit(self._graph, (rect.x + 4, rect.bottom - graph_height - 4))
+        return rect
+
+    def dump(self: object,
+             path: str) -> None:
+
+        'Writes the samples to a json file (nothing is written if there are no samples).\n\n' \
+        '   path: str (required)\n' \
+        '     the path of the file'
+
+        if self.samples:
+            with open(path, 'w', encoding='UTF-8') as file:
+                json.dump({'columns': self.columns, 'samples': list(self.samples)}, file)
+
+
 class Button(object):
 
     'Main Button class.'
@@ -34,7 +550,7 @@ class Button(object):
                  pos: list or tuple,
                  images: image_dict,
                  size: list or tuple=[],
-                 code: str='',
+                 code: str or Callable='',
                  scroll: list or tuple=[],
                  resize: list or tuple=[0.1, 0.2]) -> None:
 
@@ -58,8 +574,9 @@ class Button(object):
         '   size: list or tuple[int or float] (not required)\n' \
         '     the size of the button in format (width, height).\n' \
         '     this is the size used for calculations when resizing\n' \
-        '   code: str or code object (not required)\n' \
-        '     the code run when the button is clicked. it is run with the exec() function\n' \
+        '   code: str, code object or Callable (not required)\n' \
+        '     the code run when the button is clicked. strings are compiled once and run with the\n' \
+        '     exec() function. callables are called with the button\n' \
         '   scroll: list or tuple (not required)\n' \
         '     the mouse scroll settings of the button. it is a list containing 5 options\n' \
         '       0. the range of x-axis scrolling in format (max increase, max decrease)\n' \
@@ -72,7 +589,7 @@ class Button(object):
         '   resize: list or tuple[int or float] (not required)\n' \
         '     the resize settings for the button in format (size increase when hovered, size increase when clicked)'
 
-        self.code = code
+        self.code = compile_code(code)
         self.clickable = clickable
         self.game = game
         self.scroll_opts = list(scroll) 
@@ -104,10 +621,15 @@ class Button(object):
         # .get() checks if the value exists; if it does, then it returns the value
         for image_name in ['hover_image', 'unclickable_image']:
             if not images.get(image_name):
-                self.images[image_name] = images['image'].copy()
+                # a lazy image is never changed, so it does not have to be copied
+                self.images[image_name] = images['image'] if isinstance(images['image'], LazyAsset) else images['image'].copy()
 
         self.image_state = 'image'
         self.render_image = self.images['image']
+        self._scaled_key = None # the (image, size) that render_image was scaled from
+        # what was on the surface the last time the button was rendered (for dirty rects)
+        self._rendered_state = None
+        self._rendered_rect = pg.Rect(0, 0, 0, 0)
 
     def update(self: object,
                relative_game_speed: float) -> None:
@@ -116,6 +638,7 @@ class Button(object):
         '   relative_game_speed: float (required)\n' \
         '     the delta time to update the values to'
 
+        widget_counters['updates'] += 1
         if self.scroll_opts:
             for i in range(2):
                 # 0.5 because it will be rounded; it will be the wanted_scroll_pos when not scrolling
@@ -136,7 +659,7 @@ class Button(object):
         else:
             self.image_state = 'unclickable_image'
 
-        self.render_image = self.images[self.image_state]
+        self.render_image = get_asset(self.images[self.image_state]) # lazy images are loaded the first time they are used
         # Smooth size change of button
         # prevents unneccessary resizing (rounds anyway when rendered)
         # distributive property does not apply for booleans
@@ -144,13 +667,55 @@ class Button(object):
             self.render_size = [self.render_size[0] + (self.size[0] - self.render_size[0]) * (1 - 0.9**relative_game_speed),
                                 # resize
                                 self.render_size[1] + (self.size[1] - self.render_size[1]) * (1 - 0.9**relative_game_speed)]
-        self.render_image = pg.transform.scale(
-            self.render_image, (int(self.render_size[0]), int(self.render_size[1])))
+        # the size is quantized to whole pixels, so a settled button does no scaling work at all
+        scaled_key = (self.render_image, (int(self.render_size[0]), int(self.render_size[1])))
+        if scaled_key != self._scaled_key:
+            self._scaled_key = scaled_key
+            self._scaled_image = cached_scale(*scaled_key)
+        self.render_image = self._scaled_image
         
         # I round here instead of when rendering because it will be inted (not an fRect) if it's not rounded here
         self.rect.update(round((self.size[0] - self.render_size[0]) / 2 + self.render_pos[0]),
                          round((self.size[1] - self.render_size[1]) / 2 + self.render_pos[1]),
                          self.render_size[0], self.render_size[1])
+
+    def release(self: object) -> None:
+
+        'Releases the button\'s lazy images. they are loaded again when the button is updated'
+
+        release_assets(list(self.images.values()))
+        self._scaled_key = None
+        self._scaled_image = None
+        self.render_image = self.images[self.image_state]
+
+    def _get_render_state(self: object) -> tuple:
+        # the render image is rescaled every update, so the unscaled image and the rect are compared instead
+        return (self.images[self.image_state], tuple(self.rect))
+
+    def _get_render_rect(self: object) -> pg.Rect:
+        return pg.Rect(self.rect.topleft, self.render_image.get_size())
+
+    def get_dirty_rects(self: object,
+                        force: int or bool=0) -> list:
+
+        'Returns the rects that changed since the button was last rendered.\n\n' \
+        '   force: int or bool (not required)\n' \
+        '     if true, the old and new rects are returned even when nothing changed'
+
+        if force or self._get_render_state() != self._rendered_state:
+            return [self._rendered_rect, self._get_render_rect()]
+        return []
+
+    def get_blits(self: object) -> list:
+
+        'Returns the (surface, position) pairs that render the button, so they can be\n' \
+        'blitted together with pygame.Surface.blits. it counts as rendering the button'
+
+        self._rendered_state = self._get_render_state()
+        self._rendered_rect = self._get_render_rect()
+        widget_counters['blits'] += 1
+        return [(self.render_image, (self.rect.x, self.rect.y))]
+
     def render(self: object,
                surf: pg.Surface) -> pg.Rect:
 
@@ -158,7 +723,7 @@ class Button(object):
         '   surf: pygame.Surface (required)\n' \
         '     the surface to render the button onto'
 
-        return surf.blit(self.render_image, (self.rect.x, self.rect.y))
+        return surf.blit(*self.get_blits()[0])
 
     def handle_events(self: object,
                       event: pg.event.Event) -> None:
@@ -170,7 +735,7 @@ class Button(object):
         # I had to add the event.button check because scrolling sends this event with a different event.button
         if event.type == pg.MOUSEBUTTONDOWN and self.clickable and event.button == 1 and self.rect.collidepoint(event.pos):
             self.render_size = [self.size[0] * (1 + self.resize_opts[1]), self.size[1] * 1.2]
-            exec(self.code)
+            run_code(self.code, self, event)
         elif event.type == pg.MOUSEWHEEL and self.scroll_opts and (not self.scroll_opts[4] or self.scroll_opts[4].collidepoint(pg.mouse.get_pos())):
             # self.wanted_scroll_pos[0] = (round((self.render_pos[0] - self.pos[0]) / self.scroll_opts[2]) - int((event.x * self.scroll_opts[3]) / self.scroll_opts[2] - sign(
                 # ceils the change if it's positive and floors it if it's negative (approx.)
@@ -239,6 +804,8 @@ class MenuImage(Button):
         if scroll:
             self.wanted_scroll_pos = list(pos)
         self.clickable = 0
+        self._rendered_state = None
+        self._rendered_rect = pg.Rect(0, 0, 0, 0)
 
     def update(self: object,
                relative_game_speed: float) -> None:
@@ -247,6 +814,7 @@ class MenuImage(Button):
         '   relative_game_speed: float (required)\n' \
         '     the delta time to update the values to'
 
+        widget_counters['updates'] += 1
         if self.scroll_opts:
             for i in range(2):
                 # 0.5 because it will be rounded; it will be the wanted_scroll_pos when not scrolling
@@ -255,6 +823,28 @@ class MenuImage(Button):
                 self.render_pos[i] = max(self.pos[i] - self.scroll_opts[i][1], min(
                     self.pos[i] + self.scroll_opts[i][0], self.render_pos[i]))
 
+    def release(self: object) -> None:
+
+        'Releases the image if it is lazy. it is loaded again when it is rendered'
+
+        release_assets((self.image,))
+
+    def _get_render_state(self: object) -> tuple:
+        # the alpha is included because the cookie indicators fade out
+        return (self.image, tuple(round(item) for item in self.render_pos), None if isinstance(self.image, LazyAsset) else self.image.get_alpha())
+
+    def _get_render_rect(self: object) -> pg.Rect:
+        return pg.Rect(tuple(round(item) for item in self.render_pos), self.image.get_size())
+
+    def get_blits(self: object) -> list:
+
+        'Returns the (surface, position) pairs that render the image. it counts as rendering the image'
+
+        self._rendered_state = self._get_render_state()
+        self._rendered_rect = self._get_render_rect()
+        widget_counters['blits'] += 1
+        return [(get_asset(self.image), tuple(round(item) for item in self.render_pos))]
+
     def render(self: object,
                surf: pg.Surface) -> pg.Rect: # menu image can be used for platformer sprites, so i added offset
 
@@ -262,7 +852,7 @@ class MenuImage(Button):
         '   surf: pygame.Surface (required)\n' \
         '     the surface to render the button onto'
 
-        return surf.blit(self.image, tuple(round(item) for item in self.render_pos))
+        return surf.blit(*self.get_blits()[0])
 
 
 class MenuAnimation(MenuImage):
@@ -342,20 +932,317 @@ class MenuAnimation(MenuImage):
                 self.game_loop_frame = 0
                 self.last_frame_rendered = 0
                 self.running = 0
-         
+
+    def release(self: object) -> None:
+
+        'Releases the animation\'s lazy images. they are loaded again when they are rendered'
+
+        release_assets(self.image_list)
+
+    def _get_render_state(self: object) -> tuple:
+        if self.running:
+            return (self.image_list[int(self.game_loop_frame / self.frame_length)], tuple(round(item) for item in self.render_pos))
+        return (None,)
+
+    def _get_render_rect(self: object) -> pg.Rect:
+        if self.running:
+            return pg.Rect(tuple(round(item) for item in self.render_pos), self.image_list[int(self.game_loop_frame / self.frame_length)].get_size())
+        return pg.Rect(0, 0, 0, 0)
+
+    def get_blits(self: object,
+                  flip: list or tuple=(0, 0)) -> list:
+
+        'Returns the (surface, position) pairs that render the animation. it counts as rendering the animation\n\n' \
+        '   flip: list or tuple[int or bool] (not required)\n' \
+        '     whether to flip the frame on the x and y axes'
+
+        self._rendered_state = self._get_render_state()
+        self._rendered_rect = self._get_render_rect()
+        # this animation class can also be used for platformers, so i included "flip"
+        if self.running:
+            self.last_frame_rendered = int(self.game_loop_frame / self.frame_length)
+            # ^ helps with playing sounds in cutscenes (modding doesn't work because of delta time)
+            frame = get_asset(self.image_list[self.last_frame_rendered])
+            if flip[0] or flip[1]: # flipping makes a new surface, so it's skipped when it's not needed
+                frame = pg.transform.flip(frame, flip[0], flip[1])
+            widget_counters['blits'] += 1
+            return [(frame, tuple(round(item) for item in self.render_pos))]
+        return []
+
     def render(self: object,
                surf: pg.Surface,
                flip: list or tuple=(0, 0)) -> pg.Rect:
 
         'Renders the animation onto the given surface.\n\n' \
         '   surf: pygame.Surface (required)\n' \
-        '     the surface to render the button onto'
+        '     the surface to render the button onto\n' \
+        '   flip: list or tuple[int or bool] (not required)\n' \
+        '     whether to flip the frame on the x and y axes'
 
-        # this animation class can also be used for platformers, so i included "flip"
-        if self.running:
-            self.last_frame_rendered = int(self.game_loop_frame / self.frame_length)
-            # ^ helps with playing sounds in cutscenes (modding doesn't work because of delta time)
-            return surf.blit(pg.transform.flip(self.image_list[self.last_frame_rendered], flip[0], flip[1]), tuple(round(item) for item in self.render_pos))
+        blits = self.get_blits(flip)
+        if blits:
+            return surf.blit(*blits[0])
+
+
+class ParallaxLayer(MenuImage):
+
+    'A scrolling layer that is stored at its native (unscaled) size. only the part of it that is\n' \
+    'on the screen is scaled when it is rendered, so big pixel art layers (e.g. the cookiefall)\n' \
+    'don\'t have to be kept scaled in memory. if wrap is on, the image is tiled while scrolling.'
+
+    def __init__(self: object,
+                 pos: list or tuple,
+                 image: pg.Surface,
+                 pixel_ratio: int,
+                 view_size: list or tuple,
+                 wrap: int or bool=0,
+                 margin: int=16,
+                 colorkey: tuple=0) -> None:
+
+        'The initialization function of the ParallaxLayer class.\n\n' \
+        '   pos: list or tuple[int or float] (required)\n' \
+        '     the starting position of the layer on the screen in format (x, y)\n' \
+        '   image: pygame.Surface (required)\n' \
+        '     the unscaled image (tile) of the layer\n' \
+        '   pixel_ratio: int (required)\n' \
+        '     the amount the image is scaled by when it is rendered\n' \
+        '   view_size: list or tuple[int] (required)\n' \
+        '     the size of the surface the layer is rendered onto. only this part is scaled\n' \
+        '   wrap: int or bool (not required)\n' \
+        '     True or False; whether the image repeats on both axes while it is scrolled\n' \
+        '   margin: int (not required)\n' \
+        '     the unscaled pixels around the screen that are scaled too, so the layer can\n' \
+        '     scroll that far before it has to be scaled again\n' \
+        '   colorkey: tuple or color object (not required)\n' \
+        '     the image\'s colorkey. is redundant if the image already has one'
+
+        super().__init__(pos, image, colorkey)
+        self.pixel_ratio = pixel_ratio
+        self.view_size = tuple(view_size)
+        self.wrap = wrap
+        self.margin = margin
+        self._windows = [] # the scaled parts of the image that were rendered last time in format (rect, surface)
+
+    def _get_render_rect(self: object) -> pg.Rect:
+        if self.wrap:
+            return pg.Rect((0, 0), self.view_size)
+        return pg.Rect(tuple(round(item) for item in self.render_pos),
+                       (self.image.get_width() * self.pixel_ratio, self.image.get_height() * self.pixel_ratio)).clip((0, 0), self.view_size)
+
+    def _get_window(self: object,
+                    origin: list or tuple) -> tuple:
+        # returns the part of the image that is on the screen (in unscaled pixels) when the image is at origin
+        # the window is rounded out to whole unscaled pixels, so it looks the same as the fully scaled image
+        window = []
+        for i in range(2):
+            start = max(0, -origin[i]) // self.pixel_ratio
+            end = min(self.image.get_size()[i], -((origin[i] - self.view_size[i]) // self.pixel_ratio))
+            window.append((start, end))
+        return (window[0][0], window[1][0], window[0][1] - window[0][0], window[1][1] - window[1][0])
+
+    def release(self: object) -> None:
+
+        'Releases the scaled parts of the layer. they are scaled again when the layer is rendered'
+
+        super().release()
+        self._windows = []
+
+    def get_blits(self: object) -> list:
+
+        'Returns the (surface, position) pairs that render the layer. it counts as rendering the layer'
+
+        self._rendered_state = self._get_render_state()
+        self._rendered_rect = self._get_render_rect()
+        pos = tuple(round(item) for item in self.render_pos)
+        scaled_size = (self.image.get_width() * self.pixel_ratio, self.image.get_height() * self.pixel_ratio)
+        if self.wrap:
+            # the tiles that cover the view
+            origins = [(x, y) for x in range(pos[0] % scaled_size[0] - scaled_size[0], self.view_size[0], scaled_size[0])
+                              for y in range(pos[1] % scaled_size[1] - scaled_size[1], self.view_size[1], scaled_size[1])]
+        else:
+            origins = [pos]
+        blits = []
+        windows = []
+        for origin in origins:
+            window = self._get_window(origin)
+            if window[2] <= 0 or window[3] <= 0:
+                continue
+            # a scaled window is kept while the part on the screen is inside it
+            for scaled_window in windows + self._windows:
+                if pg.Rect(scaled_window[0]).contains(window):
+                    break
+            else:
+                # it is made a bit bigger than the screen, so it doesn't have to be scaled again every frame while scrolling
+                rect = pg.Rect(window).inflate(self.margin * 2, self.margin * 2).clip(self.image.get_rect())
+                scaled_window = (tuple(rect), pg.transform.scale_by(self.image.subsurface(rect), self.pixel_ratio))
+                widget_counters['scales'] += 1
+            if scaled_window not in windows:
+                windows.append(scaled_window)
+            blits.append((scaled_window[1], (origin[0] + scaled_window[0][0] * self.pixel_ratio, origin[1] + scaled_window[0][1] * self.pixel_ratio)))
+        self._windows = windows
+        widget_counters['blits'] += len(blits)
+        return blits
+
+    def render(self: object,
+               surf: pg.Surface) -> tuple:
+
+        'Renders the layer onto the given surface.\n\n' \
+        '   surf: pygame.Surface (required)\n' \
+        '     the surface to render the layer onto'
+
+        return tuple(surf.blits(self.get_blits()))
+
+
+class IndicatorPool(object):
+
+    'A fixed size pool of images that rise and fade out, like the "+1"s that pop up when the cookie\n' \
+    'is clicked. The indicators are stored in parallel arrays in a ring buffer. They all fade at the\n' \
+    'same speed, so the oldest one is always the first to disappear.'
+
+    def __init__(self: object,
+                 capacity: int=256,
+                 fade_speed: int or float=196,
+                 colorkey: tuple=(0, 0, 0)) -> None:
+
+        'The initialization function of the IndicatorPool class.\n\n' \
+        '   capacity: int (not required)\n' \
+        '     the max amount of indicators. when it is full, the oldest indicator is replaced\n' \
+        '   fade_speed: int or float (not required)\n' \
+        '     the amount of alpha the indicators lose every second\n' \
+        '   colorkey: tuple or color object (not required)\n' \
+        '     the colorkey of the indicator images'
+
+        self.capacity = capacity
+        self.fade_speed = fade_speed
+        self.colorkey = colorkey
+        self.start = 0 # the slot of the oldest indicator
+        self.count = 0
+        self.images = [None] * capacity
+        self.x = array('d', [0]) * capacity
+        self.y = array('d', [0]) * capacity
+        self.velocity_x = array('d', [0]) * capacity
+        self.velocity_y = array('d', [0]) * capacity
+        self.alpha = array('d', [0]) * capacity
+        # where each indicator was last rendered; alpha is -1 if it hasn't been rendered
+        self._rendered_x = array('l', [0]) * capacity
+        self._rendered_y = array('l', [0]) * capacity
+        self._rendered_alpha = array('l', [-1]) * capacity
+        self._removed_rects = []
+        # the colorkeyed copies of the images, shared by all indicators with the same image
+        self._surfaces = {}
+
+    def __len__(self: object) -> int:
+        return self.count
+
+    def _get_surface(self: object,
+                     image: pg.Surface) -> pg.Surface:
+        # the images (e.g. from render_text) are shared, so the alpha is set on a copy
+        surface = self._surfaces.get(image)
+        if surface is None:
+            if len(self._surfaces) >= 16:
+                used = set(self.images)
+                self._surfaces = {key: value for key, value in self._surfaces.items() if value in used}
+            surface = image.copy()
+            if self.colorkey:
+                surface.set_colorkey(self.colorkey)
+            self._surfaces[image] = surface
+        return surface
+
+    def _remove_oldest(self: object) -> None:
+        i = self.start
+        if self._rendered_alpha[i] != -1:
+            self._removed_rects.append(pg.Rect(self._rendered_x[i], self._rendered_y[i], *self.images[i].get_size()))
+        self.images[i] = None
+        self.start = (i + 1) % self.capacity
+        self.count -= 1
+
+    def add(self: object,
+            image: pg.Surface,
+            pos: list or tuple,
+            velocity: list or tuple=(0, -48)) -> None:
+
+        'Adds an indicator. it starts fully opaque.\n\n' \
+        '   image: pygame.Surface (required)\n' \
+        '     the image of the indicator. it is not copied for every indicator\n' \
+        '   pos: list or tuple[int or float] (required)\n' \
+        '     the starting position of the indicator in format (x, y)\n' \
+        '   velocity: list or tuple[int or float] (not required)\n' \
+        '     the pixels the indicator moves every second in format (x, y)'
+
+        if self.count == self.capacity:
+            self._remove_oldest()
+        i = (self.start + self.count) % self.capacity
+        self.images[i] = self._get_surface(image)
+        self.x[i], self.y[i] = pos
+        self.velocity_x[i], self.velocity_y[i] = velocity
+        self.alpha[i] = 255
+        self._rendered_alpha[i] = -1
+        self.count += 1
+
+    def clear(self: object) -> None:
+
+        'Removes all the indicators.'
+
+        while self.count:
+            self._remove_oldest()
+
+    def update(self: object,
+               delta_time: float) -> None:
+
+        'Moves and fades the indicators, and removes the ones that faded out.\n\n' \
+        '   delta_time: float (required)\n' \
+        '     the seconds since the last update'
+
+        for n in range(self.count):
+            i = (self.start + n) % self.capacity
+            self.x[i] += self.velocity_x[i] * delta_time
+            self.y[i] += self.velocity_y[i] * delta_time
+            self.alpha[i] -= self.fade_speed * delta_time
+        while self.count and self.alpha[self.start] <= 0:
+            self._remove_oldest()
+
+    def get_dirty_rects(self: object,
+                        force: int or bool=0) -> list:
+
+        'Returns the rects that changed since the indicators were last rendered.\n\n' \
+        '   force: int or bool (not required)\n' \
+        '     if true, the rects of all the indicators are returned even when nothing changed'
+
+        dirty_rects = self._removed_rects
+        self._removed_rects = []
+        for n in range(self.count):
+            i = (self.start + n) % self.capacity
+            x, y, alpha = round(self.x[i]), round(self.y[i]), int(self.alpha[i])
+            if force or (x, y, alpha) != (self._rendered_x[i], self._rendered_y[i], self._rendered_alpha[i]):
+                rect = pg.Rect(x, y, *self.images[i].get_size())
+                if self._rendered_alpha[i] != -1:
+                    rect.union_ip((self._rendered_x[i], self._rendered_y[i], *rect.size))
+                dirty_rects.append(rect)
+        return dirty_rects
+
+    def get_blits(self: object) -> list:
+
+        'Returns the (surface, position, alpha) of every indicator (the oldest last, so it is on top).\n' \
+        'the surfaces are shared, so they are drawn with blit_indicators, which sets each one\'s alpha first.\n' \
+        'it counts as rendering the indicators'
+
+        self._removed_rects = [] # they are covered by this render
+        blits = []
+        for n in range(self.count - 1, -1, -1):
+            i = (self.start + n) % self.capacity
+            x, y, alpha = round(self.x[i]), round(self.y[i]), int(self.alpha[i])
+            blits.append((self.images[i], (x, y), alpha))
+            self._rendered_x[i], self._rendered_y[i], self._rendered_alpha[i] = x, y, alpha
+        return blits
+
+    def render(self: object,
+               surf: pg.Surface) -> None:
+
+        'Renders the indicators onto the given surface. the oldest ones are on top.\n\n' \
+        '   surf: pygame.Surface (required)\n' \
+        '     the surface to render the indicators onto'
+
+        blit_indicators(surf, self.get_blits())
 
 
 class TextBox(Button):
@@ -369,13 +1256,14 @@ class TextBox(Button):
                  images: image_dict,
                  font_opts: list or tuple,
                  size: list or tuple=[],
-                 code: str='',
+                 code: str or Callable='',
                  scroll: list or tuple=[],
                  resize: list or tuple=[0, 0],
                  text_pos: list or tuple=[4, 4],
                  limit: int=100,
-                 enter_code: str='',
-                 validator: Callable=lambda x: 1) -> None:
+                 enter_code: str or Callable='',
+                 validator: Callable=lambda x: 1,
+                 cursor_blink: int or float=0) -> None:
 
         'The initialization function of the TextBox class.\n\n' \
         '   game: object (required)\n' \
@@ -405,8 +1293,9 @@ class TextBox(Button):
         '   size: list or tuple[int or float] (not required)\n' \
         '     the size of the text box in format (width, height).\n' \
         '     this is the size used for calculations when resizing\n' \
-        '   code: str or code object (not required)\n' \
-        '     the code run when the text box is clicked. it is run with the exec() function\n' \
+        '   code: str, code object or Callable (not required)\n' \
+        '     the code run when the text box is clicked. strings are compiled once and run with the\n' \
+        '     exec() function. callables are called with the text box\n' \
         '   scroll: list or tuple (not required)\n' \
         '     the mouse scroll settings of the text box. it is a list containing 5 options\n' \
         '       0. the range of x-axis scrolling in format (max increase, max decrease)\n' \
@@ -422,25 +1311,35 @@ class TextBox(Button):
         '     the position inside the image to render the text\n' \
         '   limit: int (not required)\n' \
         '     the maximum number of characters to allow in the text box\n' \
-        '   enter_code: str (not required)\n' \
+        '   enter_code: str, code object or Callable (not required)\n' \
         '     the code the run when the box is focused and the enter key is pressed\n' \
         '   validator: Callable (not required)\n' \
-        '     the validator function to run on each character to see if the character is accepted'
+        '     the validator function to run on each character to see if the character is accepted\n' \
+        '   cursor_blink: int or float (not required)\n' \
+        '     the number of frames (at 60 fps) the cursor stays shown or hidden for when blinking.\n' \
+        '     0 means the cursor doesn\'t blink'
 
         # For font_opts ^: 0 is font, 1 is antialiasing, 2 is color, 3 is bgcoolor, 4 is wraplength
         super().__init__(game, clickable, pos, images, size, code, scroll, resize)
         self._focused = 0
         self._text = ''
         self.render_text = '|' if self._focused else ''# includes the cursor
-        self.cursor_pos = 0
+        self._cursor_pos = 0
         self.text_limit = limit
         self.text_pos = list(text_pos)
         self.font_opts = list(font_opts)
-        self.enter_code = enter_code
+        self.enter_code = compile_code(enter_code)
         self.validator = validator
+        self.cursor_blink = cursor_blink
+        self._blink_time = 0
+        self._cursor_shown = 1
+        # the render image is only re-rendered when the text, cursor, focus, or image changes
+        self._render_key = None
+        self._render_images = {} # 1 is with the cursor, 0 is without (for blinking)
 
         if not images.get('focused_image'):
             self.images['focused_image'] = images['image'].copy()
+
     @property
     def focused(self: object) -> int:
         return self._focused
@@ -463,13 +1362,49 @@ class TextBox(Button):
             self._update_render_text()
             self._update_render_image()
 
+    @property
+    def cursor_pos(self: object) -> int:
+        return self._cursor_pos
+
+    @cursor_pos.setter
+    def cursor_pos(self: object, value: int) -> None:
+        # code outside the text box (e.g. a button that fills it in) can move the cursor too
+        self._cursor_pos = value
+        self._update_render_text()
+        self._update_render_image()
+
+    def _get_render_state(self: object) -> tuple:
+        return (*super()._get_render_state(), self.render_text, self._cursor_shown)
+
     def _update_render_text(self: object) -> None:
-        self.render_text = f'{self._text[:self.cursor_pos]}{'|' if self._focused else ''}{self._text[self.cursor_pos:]}'
+        self.render_text = f'{self._text[:self._cursor_pos]}{'|' if self._focused else ''}{self._text[self._cursor_pos:]}'
+        # the cursor is always shown right after typing or moving it
+        self._blink_time = 0
+        self._cursor_shown = 1
+
+    def _render_font(self: object,
+                     text: str) -> pg.Surface:
+        return self.font_opts[0].render(text, self.font_opts[1], self.font_opts[2], bgcolor=self.font_opts[3], wraplength=self.font_opts[4])
 
     def _update_render_image(self: object) -> None:
-        self.render_image = self.images[self.image_state].copy()
-        self.render_image.blit(self.font_opts[0].render(
-            self.render_text, self.font_opts[1], self.font_opts[2], bgcolor=self.font_opts[3], wraplength=self.font_opts[4]), self.text_pos)
+        render_key = (self.render_text, self.images[self.image_state], self.font_opts[:], self.text_pos[:])
+        if render_key != self._render_key:
+            self._render_key = render_key
+            self._render_images.clear()
+
+        if self._cursor_shown not in self._render_images:
+            image = get_asset(self.images[self.image_state]).copy()
+            if self._cursor_shown or not self._focused:
+                image.blit(self._render_font(self.render_text), self.text_pos)
+            else:
+                # the cursor's space is skipped instead of removed so the text doesn't shift when it blinks
+                left_text = self._text[:self._cursor_pos]
+                image.blit(self._render_font(left_text), self.text_pos)
+                image.blit(self._render_font(self._text[self._cursor_pos:]),
+                           (self.text_pos[0] + self.font_opts[0].size(f'{left_text}|')[0], self.text_pos[1]))
+            self._render_images[self._cursor_shown] = image
+            widget_counters['text_box_renders'] += 1
+        self.render_image = self._render_images[self._cursor_shown]
 
 
     def update(self: object,
@@ -482,6 +1417,11 @@ class TextBox(Button):
         super().update(relative_game_speed)
         if self._focused:
             self.image_state = 'focused_image'
+            if self.cursor_blink:
+                self._blink_time += relative_game_speed
+                if self._blink_time >= self.cursor_blink:
+                    self._blink_time %= self.cursor_blink
+                    self._cursor_shown = not self._cursor_shown
 
         self._update_render_image()
         
@@ -492,25 +1432,26 @@ class TextBox(Button):
         '   event: pygame.event.Event (required)\n' \
         '     the event to handle'
 
+        text_state = (self._text, self._cursor_pos, self._focused)
         if event.type == pg.KEYDOWN and self._focused:
             if event.key == pg.K_BACKSPACE:
-                self._text = f'{self.text[:self.cursor_pos][:-1]}{self.text[self.cursor_pos:]}'
-                self.cursor_pos = max(self.cursor_pos - 1, 0)
+                self._text = f'{self.text[:self._cursor_pos][:-1]}{self.text[self._cursor_pos:]}'
+                self._cursor_pos = max(self._cursor_pos - 1, 0)
             elif event.key == pg.K_RETURN:
-                exec(self.enter_code)
-                self.cursor_pos = min(self.cursor_pos, len(self._text)) # here so that it takes one press of arrow key to move left, not two if text gets shorter
+                run_code(self.enter_code, self, event)
+                self._cursor_pos = min(self._cursor_pos, len(self._text)) # here so that it takes one press of arrow key to move left, not two if text gets shorter
             elif event.key == pg.K_RIGHT:
-                self.cursor_pos = min(self.cursor_pos + 1, len(self._text))
+                self._cursor_pos = min(self._cursor_pos + 1, len(self._text))
             elif event.key == pg.K_LEFT:
-                self.cursor_pos = max(self.cursor_pos - 1, 0)
+                self._cursor_pos = max(self._cursor_pos - 1, 0)
         elif event.type == pg.TEXTINPUT and len(self._text) < self.text_limit and self.validator(event.text) and self._focused:
-            self._text = f'{self._text[:self.cursor_pos]}{event.text}{self._text[self.cursor_pos:]}'
-            self.cursor_pos = min(self.cursor_pos + 1, len(self._text))
+            self._text = f'{self._text[:self._cursor_pos]}{event.text}{self._text[self._cursor_pos:]}'
+            self._cursor_pos = min(self._cursor_pos + 1, len(self._text))
 
         elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1 and self.clickable:
             self._focused = self.rect.collidepoint(event.pos)
-            exec(self.code)
-            self.cursor_pos = min(self.cursor_pos, len(self._text)) # here so that it takes one press of arrow key to move left, not two if text gets shorter
+            run_code(self.code, self, event)
+            self._cursor_pos = min(self._cursor_pos, len(self._text)) # here so that it takes one press of arrow key to move left, not two if text gets shorter
 
         elif self.scroll_opts and event.type == pg.MOUSEWHEEL and (not self.scroll_opts[4] or self.scroll_opts[4].collidepoint(pg.mouse.get_pos())):
             # self.wanted_scroll_pos[0] = (round((self.render_pos[0] - self.pos[0]) / self.scroll_opts[2]) - int((event.x * self.scroll_opts[3]) / self.scroll_opts[2] - sign(
@@ -525,7 +1466,92 @@ class TextBox(Button):
 
             self.wanted_scroll_pos[1] = (round((self.render_pos[1] - self.pos[1]) / self.scroll_opts[2]) + math.copysign(
                 math.ceil(abs((event.y * self.scroll_opts[3]) / self.scroll_opts[2])), event.y)) * self.scroll_opts[2] + self.pos[1]
-        self._update_render_text()
+        if (self._text, self._cursor_pos, self._focused) != text_state:
+            self._update_render_text()
+
+
+class EventRouter(object):
+
+    'Sends the events to only the widgets that use them instead of every widget. The widgets are\n' \
+    'put in a uniform grid by their rects, so a click only goes to the clickable widgets under the\n' \
+    'mouse. Scrolling goes to the widgets that scroll, and key and text events go to the focused\n' \
+    'text box. Other events (e.g. mouse motion) aren\'t used by the widgets, so they go to none.'
+
+    def __init__(self: object,
+                 get_widgets: Callable,
+                 cell_size: int=64) -> None:
+
+        'The initialization function of the EventRouter class.\n\n' \
+        '   get_widgets: Callable (required)\n' \
+        '     the function that returns the widgets (buttons, text boxes, images) that can get events.\n' \
+        '     the widgets get the events in this order\n' \
+        '   cell_size: int (not required)\n' \
+        '     the width and height of the grid cells in pixels'
+
+        self.get_widgets = get_widgets
+        self.cell_size = cell_size
+        # the grid is only rebuilt when the widgets changed (they moved, became clickable or not, or a menu
+        # was opened or closed); set this to rebuild it anyway
+        self.dirty = 1
+        self.signature = None # the widgets and their rects and clickable values when the grid was built
+        self.widgets = []
+        self.grid = {} # (cell x, cell y): indexes of the widgets that overlap the cell, in order
+        self.text_boxes = [] # indexes; they get every click so they can lose focus
+        self.scroll_widgets = []
+
+    def refresh(self: object) -> None:
+
+        'Rebuilds the grid if the widgets changed since it was built. checking takes a lot less time than building it.'
+
+        widgets = list(self.get_widgets())
+        signature = [widget if isinstance(widget, MenuImage) else (widget, widget.rect.copy(), widget.clickable) for widget in widgets] # images aren't in the grid
+        if self.dirty or signature != self.signature:
+            self.build(widgets)
+            self.signature = signature
+
+    def build(self: object,
+              widgets: list=None) -> None:
+
+        'Rebuilds the grid from the widgets.\n\n' \
+        '   widgets: list (not required)\n' \
+        '     the widgets; they are gotten with get_widgets if they aren\'t given'
+
+        self.dirty = 0
+        self.widgets = list(self.get_widgets()) if widgets is None else widgets
+        self.grid.clear()
+        self.text_boxes.clear()
+        self.scroll_widgets.clear()
+        for dex, widget in enumerate(self.widgets):
+            if widget.scroll_opts:
+                self.scroll_widgets.append(widget)
+            if isinstance(widget, TextBox):
+                self.text_boxes.append(dex)
+            elif not isinstance(widget, MenuImage): # images can't be clicked
+                for x in range(widget.rect.left // self.cell_size, (widget.rect.right - 1) // self.cell_size + 1):
+                    for y in range(widget.rect.top // self.cell_size, (widget.rect.bottom - 1) // self.cell_size + 1):
+                        self.grid.setdefault((x, y), []).append(dex)
+
+    def route(self: object,
+              event: pg.event.Event) -> list:
+
+        'Returns the widgets that should get the event, in order.\n\n' \
+        '   event: pygame.event.Event (required)\n' \
+        '     the event to route'
+
+        if event.type in (pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP):
+            self.refresh()
+            dexes = self.grid.get((event.pos[0] // self.cell_size, event.pos[1] // self.cell_size), [])
+            if self.text_boxes:
+                dexes = sorted(set(dexes).union(self.text_boxes))
+            return [self.widgets[dex] for dex in dexes if isinstance(self.widgets[dex], TextBox) or (
+                self.widgets[dex].clickable and self.widgets[dex].rect.collidepoint(event.pos))]
+        if event.type == pg.MOUSEWHEEL:
+            self.refresh()
+            return self.scroll_widgets.copy()
+        if event.type in (pg.KEYDOWN, pg.KEYUP, pg.TEXTINPUT, pg.TEXTEDITING):
+            self.refresh()
+            return [self.widgets[dex] for dex in self.text_boxes if self.widgets[dex].focused]
+        return []
 
 
 class Menu(object):
@@ -555,6 +1581,11 @@ class Menu(object):
         if background[2]:
             self.background_surface.fill(background[2])
         self.background_surface.set_alpha(background[1])
+        self._rendered_on = 0
+        self._rendered_buttons = []
+        # kept between runs so they aren't made again every time
+        self._pre_background = None
+        self._scaled_surface = None
 
     def update(self: object,
                relative_game_speed: float) -> None:
@@ -575,9 +1606,50 @@ class Menu(object):
         '     the surface to render the button onto'
 
         if self.on:
-            return (surf.blit(self.background_surface, (0, 0)), *(button.render(surf) for button in self.button_list))
+            return tuple(surf.blits(self.get_blits()))
+        self._rendered_on = 0
         return (pg.Rect(0, 0, 0, 0),)
 
+    def get_blits(self: object) -> list:
+
+        'Returns the (surface, position) pairs that render the menu (background first), so the\n' \
+        'whole menu can be blitted with one call. it counts as rendering the menu'
+
+        self._rendered_on = self.on
+        if self.on:
+            self._rendered_buttons = list(self.button_list)
+            return [(self.background_surface, (0, 0)), *(blit for button in self.button_list for blit in button.get_blits())]
+        return []
+
+    def release(self: object) -> None:
+
+        'Releases the lazy images of the menu\'s buttons. they are loaded again when they are used'
+
+        for button in self.button_list:
+            button.release()
+
+    def get_dirty_rects(self: object,
+                        force: int or bool=0) -> list:
+
+        'Returns the rects that changed since the menu was last rendered.\n\n' \
+        '   force: int or bool (not required)\n' \
+        '     if true, everything the menu covers is returned even when nothing changed'
+
+        # the buttons of a menu that is off (and was off when it was rendered) aren't on the surface, so they don't matter
+        if force or self.on != self._rendered_on or (self.on and self.button_list != self._rendered_buttons):
+            # buttons that were removed since the last render still have to be drawn over
+            return [self.background_surface.get_rect(), *(rect for button in self._rendered_buttons + [
+                button for button in self.button_list if button not in self._rendered_buttons] for rect in button.get_dirty_rects(1))]
+        if self.on:
+            return [rect for button in self.button_list for rect in button.get_dirty_rects()]
+        return []
+
+
+    def get_event_widgets(self: object) -> list:
+
+        'Returns the buttons that can get events (for an EventRouter); none when the menu is off.'
+
+        return self.button_list if self.on else []
 
     def handle_events(self: object,
                       event: pg.event.Event) -> None:
@@ -594,7 +1666,8 @@ class Menu(object):
             surf: pg.Surface,
             game_speed: int,
             screen: pg.Surface=0, # if the surface is to be rendered again onto another surface
-            toggle_keys: list or tuple[int]=[None]) -> None:
+            toggle_keys: list or tuple[int]=[None],
+            frame_cap: int=0) -> None:
 
         'Runs the menu independently in its own game loop.\n\n' \
         '   surf: pygame.Surface (required)\n' \
@@ -604,34 +1677,43 @@ class Menu(object):
         '   screen: pygame.Surface=0 (not required)\n' \
         '     the surfave to render the rendered surface on (if needed)\n' \
         '   toggle_keys: list or tuple[int] (not required)\n' \
-        '     the list of keys that will toggle off the menu'
+        '     the list of keys that will toggle off the menu\n' \
+        '   frame_cap: int (not required)\n' \
+        '     the max frames per second of the loop. 0 means uncapped'
 
         self.on = 1
-        start_time = time.time()
+        self._rendered_on = 0 # so the first frame is always drawn
         pre_background = pg.Surface((0, 0))
         if screen:
             screen_size = screen.get_size()
         if self.background_surface.get_alpha() or self.background_surface.get_size() == (0, 0):
-            pre_background = surf.copy() # for alpha backgrounds, it will still show old screen below the alpha layer
-        while self.on:
-            delta_time = time.time() - start_time
-            start_time = time.time()
-            for event in pg.event.get():
-                self.handle_events(event)
-                if event.type == pg.QUIT:
-                    self.on = 0
-                    pg.quit()
-                    sys.exit()
-                if event.type == pg.KEYDOWN and event.key in toggle_keys:
-                    self.on = 0
-
-            self.update(delta_time * game_speed)
-
-            surf.blit(pre_background, (0, 0))
-            self.render(surf)
-            if screen:
-                screen.blit(pg.transform.scale(surf, screen_size), (0, 0))
-            pg.display.update()
+            self._pre_background = copy_surface(surf, self._pre_background) # for alpha backgrounds, it will still show old screen below the alpha layer
+            pre_background = self._pre_background
+
+        def handle_event(event: pg.event.Event) -> None:
+            self.handle_events(event)
+            if event.type == pg.QUIT:
+                self.on = 0
+                pg.quit()
+                sys.exit()
+            if event.type == pg.KEYDOWN and event.key in toggle_keys:
+                self.on = 0
+
+            if event.type in REDRAW_EVENTS:
+                self._rendered_on = 0
+
+        def render() -> None:
+            # nothing is drawn (or scaled) when nothing changed
+            if self.get_dirty_rects():
+                surf.blit(pre_background, (0, 0))
+                self.render(surf)
+                if screen:
+                    self._scaled_surface = scale_surface(surf, screen_size, self._scaled_surface)
+                    screen.blit(self._scaled_surface, (0, 0))
+                pg.display.update()
+
+        FrameLoop(lambda delta_time: self.update(delta_time * game_speed), render, handle_event,
+                  lambda: self.on, frame_cap).run()
 
 
 class Cutscene(Menu):
@@ -683,6 +1765,8 @@ class Cutscene(Menu):
         self.button_list[-1].game_loop_frame = 0
         if state and self.sound:
             self.sound.play()
+        elif not state:
+            self.release() # a cutscene is rarely shown again, so its images don't stay loaded
 
     def update(self: object,
                relative_game_speed: float) -> None:
@@ -719,7 +1803,8 @@ class Cutscene(Menu):
             game_speed: int,
             screen: pg.Surface=0,
             toggle_keys: list or tuple[int]=[None],
-            auto_time: int=-1) -> None:
+            auto_time: int=-1,
+            frame_cap: int=0) -> None:
 
         'Runs the cutscene independently in its own game loop.\n\n' \
         '   surf: pg.Surface (required)\n' \
@@ -731,29 +1816,34 @@ class Cutscene(Menu):
         '   toggle_keys: list or tuple[int] (not required)\n' \
         '     the list of keys that will toggle off the menu\n' \
         '   auto_time: int (not required)\n' \
-        '     the time for that cutscene to automatically switch off (leave as -1 for unlimited)'
+        '     the time for that cutscene to automatically switch off (leave as -1 for unlimited)\n' \
+        '   frame_cap: int (not required)\n' \
+        '     the max frames per second of the loop. 0 means uncapped'
 
         self.start_stop(1)
-        start_time = time.time()
+        self._rendered_on = 0 # so the first frame is always drawn
         pre_background = pg.Surface((0, 0))
         # pre_background.fill((0, 0, 0))
         if screen:
             screen_size = screen.get_size()
         auto_time_buffer = 0
         if self.background_surface.get_alpha() or self.background_surface.get_size() == (0, 0):
-            pre_background = surf.copy() # for alpha backgrounds, it will still show old screen below the alpha layer
-        while self.on:
-            delta_time = time.time() - start_time
-            start_time = time.time()
-            for event in pg.event.get():
-                self.handle_events(event)
-                if event.type == pg.QUIT:
-                    self.start_stop(0)
-                    pg.quit()
-                    sys.exit()
-                if event.type == pg.KEYDOWN and event.key in toggle_keys:
-                    self.start_stop(0)
-
+            self._pre_background = copy_surface(surf, self._pre_background) # for alpha backgrounds, it will still show old screen below the alpha layer
+            pre_background = self._pre_background
+
+        def handle_event(event: pg.event.Event) -> None:
+            self.handle_events(event)
+            if event.type == pg.QUIT:
+                self.start_stop(0)
+                pg.quit()
+                sys.exit()
+            if event.type == pg.KEYDOWN and event.key in toggle_keys:
+                self.start_stop(0)
+            if event.type in REDRAW_EVENTS:
+                self._rendered_on = 0
+
+        def update(delta_time: float) -> None:
+            nonlocal auto_time_buffer
             self.update(delta_time * game_speed)
 
             if auto_time != -1 and (self.button_list[-1].game_loop_frame >=
@@ -762,11 +1852,16 @@ class Cutscene(Menu):
                 if auto_time_buffer >= auto_time:
                     self.start_stop(0)
 
-            surf.blit(pre_background, (0, 0))
-            self.render(surf)
-            if screen:
-                screen.blit(pg.transform.scale(surf, screen_size), (0, 0))
-            pg.display.update()
+        def render() -> None:
+            if self.get_dirty_rects():
+                surf.blit(pre_background, (0, 0))
+                self.render(surf)
+                if screen:
+                    self._scaled_surface = scale_surface(surf, screen_size, self._scaled_surface)
+                    screen.blit(self._scaled_surface, (0, 0))
+                pg.display.update()
+
+        FrameLoop(update, render, handle_event, lambda: self.on, frame_cap).run()
 
 class CutsceneSlideshow(object):
 
@@ -778,7 +1873,7 @@ class CutsceneSlideshow(object):
                  control_keys: list or tuple(int)=(pg.K_RIGHT, pg.K_LEFT, pg.K_ESCAPE),
                  transition_style: str='fade',
                  transition_frames: int=510, # only applicable for fade tranisitions
-                 finish_code: str='',
+                 finish_code: str or Callable='',
                  auto_time: int=-1) -> None:
 
         'The initialization function of the CutsceneSlideshow class.\n' \
@@ -793,7 +1888,7 @@ class CutsceneSlideshow(object):
         '     the style of transition between slides (\'fade\' for fade and \'jump\' for jumpcut)\n' \
         '   transition_frames: int (not required)\n' \
         '     the amount of frames a fade transition lasts (accounts for delta time)\n' \
-        '   finish_code: str (not required)\n' \
+        '   finish_code: str, code object or Callable (not required)\n' \
         '     the code that runs when the slideshow is finished\n' \
         '   auto_time: int (not required)\n' \
         '     the amount of time in frames for the slideshow to move to the next slide\n' \
@@ -805,7 +1900,7 @@ class CutsceneSlideshow(object):
         # for transition_style ^ 'fade' is for a fade transition and 'jump' is for a jumpcut
         self.game = game
         self.on = 0
-        self.finish_code = finish_code
+        self.finish_code = compile_code(finish_code)
         self.current_slide = 0
         if transition_style == 'fade':
             self.transition_state = 0 # if 1, then alpha is increasing; if -1, then alpha is decreasing
@@ -819,6 +1914,12 @@ class CutsceneSlideshow(object):
         self.control_keys = control_keys
         self.auto_time = auto_time # number of frames to wait before automatically switching slides
         self.auto_time_buffer = 0 # current number of frames passed
+        self._rendered_state = None
+        self._rendered_rect = pg.Rect(0, 0, 0, 0)
+        # made once per surface size; only its alpha is changed during a fade
+        self._transition_surface = None
+        self._pre_background = None
+        self._scaled_surface = None
 
     def start_stop(self: object,
                    state: int or bool) -> None: # full start/end
@@ -867,7 +1968,7 @@ class CutsceneSlideshow(object):
                         self.cutscene_list[self.wanted_slide].start_stop(1)
                         self.current_slide = self.wanted_slide
                     else:
-                        exec(self.finish_code)
+                        run_code(self.finish_code, self)
 
                 elif not self.alpha:
                     self.transition_state = 0
@@ -887,12 +1988,48 @@ class CutsceneSlideshow(object):
         '     the surface to render the button onto'
 
         if self.on:
-            if self.transition_style == 'fade':
-                transition_surface = pg.Surface(surf.get_size())
-                transition_surface.set_alpha(int(self.alpha))
-            return (*self.cutscene_list[self.current_slide].render(surf), surf.blit(transition_surface, (0, 0)) if self.transition_style == 'fade' and self.transition_state else None)
+            return (*surf.blits(self.get_blits(surf.get_size())), None)
+        self.get_blits(surf.get_size())
         return (pg.Rect(0, 0, 0, 0),)
 
+    def get_blits(self: object,
+                  size: list or tuple) -> list:
+
+        'Returns the (surface, position) pairs that render the slideshow (with the fade on top).\n' \
+        'it counts as rendering the slideshow\n\n' \
+        '   size: list or tuple[int] (required)\n' \
+        '     the size of the surface the slideshow is rendered onto'
+
+        self._rendered_state = self._get_render_state()
+        self._rendered_rect = pg.Rect((0, 0), size)
+        if not self.on:
+            return []
+        blits = self.cutscene_list[self.current_slide].get_blits()
+        if self.transition_style == 'fade' and self.transition_state:
+            if self._transition_surface is None or self._transition_surface.get_size() != tuple(size):
+                self._transition_surface = pg.Surface(size)
+            if self._transition_surface.get_alpha() != int(self.alpha):
+                self._transition_surface.set_alpha(int(self.alpha))
+            blits.append((self._transition_surface, (0, 0)))
+        return blits
+
+    def _get_render_state(self: object) -> tuple:
+        # a fade covers the whole surface, so the alpha is part of the state
+        return (self.on, self.current_slide, int(self.alpha) if self.transition_style == 'fade' and self.transition_state else None)
+
+    def get_dirty_rects(self: object,
+                        force: int or bool=0) -> list:
+
+        'Returns the rects that changed since the slideshow was last rendered.\n\n' \
+        '   force: int or bool (not required)\n' \
+        '     if true, the whole surface is returned even when nothing changed'
+
+        if force or self._get_render_state() != self._rendered_state:
+            return [self._rendered_rect]
+        if self.on:
+            return self.cutscene_list[self.current_slide].get_dirty_rects()
+        return []
+
     def handle_events(self: object,
                       event: pg.event.Event) -> None:
         'The event handler of the CutsceneSlideshow class.\n\n' \
@@ -910,7 +2047,7 @@ class CutsceneSlideshow(object):
                             self.transition_state = 1
                     else:
                         self.start_stop(0)
-                        exec(self.finish_code)
+                        run_code(self.finish_code, self, event)
                 elif change and self.wanted_slide < len(self.cutscene_list):
                     self.wanted_slide = self.current_slide + change
                     if self.wanted_slide >= 0:
@@ -920,49 +2057,81 @@ class CutsceneSlideshow(object):
                             self.cutscene_list[self.current_slide].start_stop(0)
                             if self.wanted_slide == len(self.cutscene_list):
                                 self.start_stop(0)
-                                exec(self.finish_code)
+                                run_code(self.finish_code, self, event)
                             else:
                                 self.current_slide = self.wanted_slide
                                 self.cutscene_list[self.current_slide].start_stop(1)
 
-    def run(self: object,
-            surf: pg.Surface,
-            game_speed: int,
-            screen: pg.Surface=0) -> None:
+    def create_frame_loop(self: object,
+                          surf: pg.Surface,
+                          game_speed: int,
+                          screen: pg.Surface=0,
+                          frame_cap: int=0) -> FrameLoop:
 
-        'Runs the slideshow independently in its own game loop.\n\n' \
+        'Starts the slideshow and returns the loop that runs it (without running it), so the loop can\n' \
+        'be stepped instead (e.g. headless).\n\n' \
         '   surf: pygame.Surface (required)\n' \
         '     the surface to render the slideshow on\n' \
         '   game_speed: int (required)\n' \
         '     the game speed to run the cutscene with\n' \
         '   screen: pygame.Surface=0 (not required)\n' \
         '     the surface to render the rendered surface on (if needed)\n' \
+        '   frame_cap: int (not required)\n' \
+        '     the max frames per second of the loop. 0 means uncapped'
 
 
         # the screen argument is so that the cutscene can be rendered onto a surface and the surface will be rendered onto the screen
 
         self.start_stop(1)
-        start_time = time.time()
-        pre_background = surf.copy() # for alpha backgrounds, it will still show old screen below the alpha layer
+        self._rendered_state = None # so the first frame is always drawn
+        self._pre_background = copy_surface(surf, self._pre_background) # for alpha backgrounds, it will still show old screen below the alpha layer
+        pre_background = self._pre_background
         if screen:
             screen_size = screen.get_size()
-        while self.on:
-            delta_time = time.time() - start_time
-            start_time = time.time()
-            for event in pg.event.get():
-                self.handle_events(event)
-                if event.type == pg.QUIT:
-                    self.start_stop(0)
-                    pg.quit()
-                    sys.exit()
+
+        def handle_event(event: pg.event.Event) -> None:
+            self.handle_events(event)
+            if event.type == pg.QUIT:
+                self.start_stop(0)
+                pg.quit()
+                sys.exit()
+            if event.type in REDRAW_EVENTS:
+                self._rendered_state = None
+
+        def update(delta_time: float) -> None:
             self.update(delta_time * game_speed)
             if self.transition_style == 'fade' and self.wanted_slide == len(self.cutscene_list) and self.transition_state == -1:
-                break
+                loop.stop()
                 # so it will be rendered on the screen after it has ran (final fade transition)
                 # this is why one should also put the render statement into the mainloop
-            surf.blit(pre_background, (0, 0))
-            self.render(surf)
-            if screen:
-                screen.blit(pg.transform.scale(surf, screen_size), (0, 0))
-            pg.display.update()
+
+        def render() -> None:
+            if self.get_dirty_rects():
+                surf.blit(pre_background, (0, 0))
+                self.render(surf)
+                if screen:
+                    self._scaled_surface = scale_surface(surf, screen_size, self._scaled_surface)
+                    screen.blit(self._scaled_surface, (0, 0))
+                pg.display.update()
+
+        loop = FrameLoop(update, render, handle_event, lambda: self.on, frame_cap)
+        return loop
+
+    def run(self: object,
+            surf: pg.Surface,
+            game_speed: int,
+            screen: pg.Surface=0,
+            frame_cap: int=0) -> None:
+
+        'Runs the slideshow independently in its own game loop.\n\n' \
+        '   surf: pygame.Surface (required)\n' \
+        '     the surface to render the slideshow on\n' \
+        '   game_speed: int (required)\n' \
+        '     the game speed to run the cutscene with\n' \
+        '   screen: pygame.Surface=0 (not required)\n' \
+        '     the surface to render the rendered surface on (if needed)\n' \
+        '   frame_cap: int (not required)\n' \
+        '     the max frames per second of the loop. 0 means uncapped'
+
+        self.create_frame_loop(surf, game_speed, screen, frame_cap).run()
 
@@ -1,11 +1,49 @@
 from collections.abc import Iterable
+from collections import OrderedDict
+from typing import Callable
+import os
+import glob
+import json
+import hashlib
 import math
+import ast
+import operator
 import pygame as pg
+from modules.bignumber import BigNumber
 
 BASE_IMG_PATH = 'data/images/'
+# scaled and converted images are stored here as raw pixels so they don't have to be decoded and scaled every launch
+CACHE_PATH = 'data/cache/'
+# the images packed together into a few big images (made with build_atlas.py)
+ATLAS_PATH = 'data/atlas/'
+ATLAS_SIZE = (1024, 1024)
+
+atlas_cache = {} # the loaded atlas; filled the first time an image is loaded
+
+# rendered texts, keyed by (font, text, antialias, color, bgcolor, wraplength, scale)
+# the least recently used text is removed when it gets too big
+TEXT_CACHE_SIZE = 128
+text_cache = OrderedDict()
+text_cache_stats = {'hits': 0, 'misses': 0}
 
 type image_list = list[pg.Surface]
 
+# the operators math_eval allows, and its limits so every expression is evaluated quickly (like 9**9**9**9 in the bulk buy box)
+MATH_EVAL_OPERATORS = {
+            ast.Add: operator.add,
+            ast.Sub: operator.sub,
+            ast.Mult: operator.mul,
+            ast.Div: operator.truediv,
+            ast.FloorDiv: operator.floordiv,
+            ast.Mod: operator.mod,
+            ast.Pow: operator.pow,
+            ast.UAdd: operator.pos,
+            ast.USub: operator.neg,
+            }
+MATH_EVAL_MAX_DIGITS = 4300 # the most digits a number can have (the most python turns into a string, so it can be saved)
+MATH_EVAL_MAX_BITS = int(MATH_EVAL_MAX_DIGITS * math.log2(10))
+MATH_EVAL_MAX_STEPS = 100 # the most numbers and operators an expression can have
+
 ROMAN_INDICATOR = (
             (1000, 'M'),
             (900, 'CM'),
@@ -71,13 +109,58 @@ def load_img(path: str,
     """
 
     try:
-        img = pg.transform.scale(pg.image.load(f'{BASE_IMG_PATH}{path}'), size).convert()
+        img = load_img_from_atlas(path, size)
+        if img is None:
+            # scaling makes a new image anyway, so scaled images come from the cache instead
+            img = load_cached_img(path, size)
         img.set_colorkey((0, 0, 0))
     except:
         img = pg.transform.scale(pg.image.load(f'{BASE_IMG_PATH}forgot_to_install_source.png'), size).convert()
     return img
 
 
+def load_cached_img(path: str,
+                    size: list or tuple) -> pg.Surface:
+
+    """
+    Loads an image from the asset cache. If it is not cached (or the image
+    changed since it was cached), it is loaded normally and then cached.
+       path: str (required)
+         the file path of the image (inside of BASE_IMG_PATH)
+       size: list or tuple (required)
+         the size of the returned image
+    """
+
+    size = (int(size[0]), int(size[1]))
+    source = f'{BASE_IMG_PATH}{path}'
+    display = pg.display.get_surface()
+    # the pixels are stored in the display's format, so the format is part of the name too
+    name = hashlib.sha1(f'{path}|{size[0]}|{size[1]}|{display.get_bitsize()}|{display.get_masks()}'.encode()).hexdigest()
+    # the modification time is part of the file name, so a changed image never hits an old cache file
+    cache_file = f'{CACHE_PATH}{name}_{os.stat(source).st_mtime_ns}.raw'
+    try:
+        img = pg.Surface(size, 0, display)
+        with open(cache_file, 'rb') as file:
+            data = file.read()
+        if len(data) != img.get_buffer().length:
+            raise ValueError('cache file has the wrong size')
+        img.get_buffer().write(data) # already converted; there is no decoding, scaling or converting
+        return img
+    except (OSError, ValueError):
+        img = load_img_from_atlas(path)
+        img = pg.transform.scale(pg.image.load(source) if img is None else img, size).convert()
+    try:
+        os.makedirs(CACHE_PATH, exist_ok=True)
+        for old_file in glob.glob(f'{CACHE_PATH}{name}_*.raw'):
+            os.remove(old_file)
+        with open(f'{cache_file}.tmp', 'wb') as file:
+            file.write(img.get_buffer().raw)
+        os.replace(f'{cache_file}.tmp', cache_file) # so a half written file is never loaded
+    except OSError:
+        pass # the game still works without the cache
+    return img
+
+
 def load_img_series(path: str,
                     size: list or tuple,
                     number_of_images: int,
@@ -101,8 +184,74 @@ def load_img_series(path: str,
     return images
 
 
+class LazyAsset(object):
+
+    """An image that is loaded the first time it is used and can be released after."""
+
+    def __init__(self: object,
+                 path: str,
+                 size: list or tuple,
+                 loader: Callable=load_img) -> None:
+
+        """
+        The initialization function of the LazyAsset class.
+           path: str (required)
+             the file path of the image
+           size: list or tuple (required)
+             the size of the image. it is known before the image is loaded
+           loader: Callable (not required)
+             the function that loads the image; it is called with the path and the size
+        """
+
+        self.path = path
+        self.size = tuple(size)
+        self.loader = loader
+        self.surface = None
+        self.colorkey = None
+
+    def get(self: object) -> pg.Surface:
+
+        """Returns the image, loading it if it is not loaded."""
+
+        if self.surface is None:
+            self.surface = self.loader(self.path, self.size)
+            if self.surface.get_parent() is not None:
+                # images from the atlas share their pixels with the whole atlas, which would stay loaded after release
+                self.surface = self.surface.copy()
+            if self.colorkey is not None:
+                self.surface.set_colorkey(self.colorkey)
+        return self.surface
+
+    def release(self: object) -> None:
+
+        """Unloads the image. It will be loaded again the next time it is used."""
+
+        self.surface = None
+
+    def get_size(self: object) -> tuple:
+        return self.size
+
+    def set_colorkey(self: object,
+                     colorkey: tuple) -> None:
+        self.colorkey = colorkey
+        if self.surface is not None:
+            self.surface.set_colorkey(colorkey)
+
+
+def get_asset(asset: pg.Surface or LazyAsset) -> pg.Surface:
+
+    """
+    Returns the surface of an image, whether or not it is lazy.
+       asset: pygame.Surface or LazyAsset or DialogueFrame (required)
+         the image
+    """
+
+    return asset.get() if isinstance(asset, (LazyAsset, DialogueFrame)) else asset
+
+
 def load_img_from_spritesheet(spritesheet: pg.Surface,
-                              rect: pg.Rect) -> pg.Surface:
+                              rect: pg.Rect,
+                              copy: int or bool=1) -> pg.Surface:
 
     """
     Loads a single image from a spritesheet.
@@ -110,8 +259,14 @@ def load_img_from_spritesheet(spritesheet: pg.Surface,
          the surface of the spritesheet
        rect: pygame.Rect (required)
          the rect of the portion of the image
+       copy: int or bool (not required)
+         if False, a subsurface that shares its pixels with the spritesheet is returned
     """
 
+    if not copy:
+        surface = spritesheet.subsurface(rect)
+        surface.set_colorkey((0, 0, 0))
+        return surface
     surface = pg.Surface(rect.size)
     surface.set_colorkey((0, 0, 0))
     surface.blit(spritesheet, (0, 0), area=rect)
@@ -123,7 +278,8 @@ def load_spritesheet(spritesheet: pg.Surface,
                      size: list or tuple, # size of one sprite
                      number_of_imgs: int,
                      row_length: int=0, # number of images in one row
-                     starting_pos: list or tuple=(0, 0)) -> image_list:
+                     starting_pos: list or tuple=(0, 0),
+                     copy: int or bool=1) -> image_list:
 
     """
     Loads multiple images from a spritesheet.
@@ -137,6 +293,8 @@ def load_spritesheet(spritesheet: pg.Surface,
          the length of each row of the spritesheet
        starting_pos: list or tuple (not required)
          the starting position for the image loading
+       copy: int or bool (not required)
+         if False, the images are subsurfaces that share their pixels with the spritesheet
     """
 
     if row_length == 0:
@@ -144,17 +302,98 @@ def load_spritesheet(spritesheet: pg.Surface,
     image_list = []
     for i in range(number_of_imgs):
         image_list.append(load_img_from_spritesheet(
-            spritesheet, pg.Rect(i % row_length * size[0] + starting_pos[0], int(i / row_length) * size[1] + starting_pos[1], size[0], size[1])))
+            spritesheet, pg.Rect(i % row_length * size[0] + starting_pos[0], int(i / row_length) * size[1] + starting_pos[1], size[0], size[1]), copy))
     return image_list
 
 
-def scientific_notation(num: int or float,
+def build_atlas() -> None:
+
+    """
+    Packs every image in BASE_IMG_PATH (except backups) into atlases. Each top
+    folder gets its own atlases, so loading one image doesn't load every image.
+    They are saved in ATLAS_PATH with an index (atlas.json) of where each image is.
+    A display mode has to be set before this is called.
+    """
+
+    images = []
+    for folder, folders, files in os.walk(BASE_IMG_PATH):
+        folders[:] = sorted(item for item in folders if item != 'backup')
+        for file in sorted(files):
+            if file.endswith('.png'):
+                path = os.path.join(folder, file)
+                images.append((os.path.relpath(path, BASE_IMG_PATH).replace(os.sep, '/'), os.stat(path).st_mtime_ns,
+                               pg.image.load(path).convert_alpha()))
+    # shelf packing; the tallest images go first so the shelves waste less space
+    images.sort(key=lambda item: (item[0].split('/')[0], -item[2].get_height()))
+    index = {}
+    atlases = []
+    used_sizes = [] # the part of each atlas that has images
+    x = y = shelf_height = 0
+    for dex, (path, mtime, img) in enumerate(images):
+        width, height = img.get_size()
+        if x + width > ATLAS_SIZE[0]:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if not dex or y + height > ATLAS_SIZE[1] or path.split('/')[0] != images[dex - 1][0].split('/')[0]:
+            atlases.append(pg.Surface(ATLAS_SIZE, pg.SRCALPHA))
+            used_sizes.append([0, 0])
+            x = y = shelf_height = 0
+        # BLEND_RGBA_MAX onto a clear surface copies the pixels exactly (alpha included)
+        atlases[-1].blit(img, (x, y), special_flags=pg.BLEND_RGBA_MAX)
+        index[path] = [len(atlases) - 1, x, y, width, height, mtime]
+        used_sizes[-1] = [max(used_sizes[-1][0], x + width), max(used_sizes[-1][1], y + height)]
+        x += width
+        shelf_height = max(shelf_height, height)
+
+    os.makedirs(ATLAS_PATH, exist_ok=True)
+    for old_file in glob.glob(f'{ATLAS_PATH}atlas_*.png'):
+        os.remove(old_file)
+    for dex, atlas in enumerate(atlases):
+        # the atlas is cropped to what was used
+        pg.image.save(atlas.subsurface((0, 0), used_sizes[dex]), f'{ATLAS_PATH}atlas_{dex}.png')
+    with open(f'{ATLAS_PATH}atlas.json', 'w', encoding='UTF-8') as index_file:
+        json.dump(index, index_file)
+
+
+def load_img_from_atlas(path: str,
+                        size: list or tuple=()) -> pg.Surface or None:
+
+    """
+    Loads an image (at its original size) from the atlas without copying it.
+    Returns None if the image is not in the atlas, changed after the atlas was
+    built or is not the given size.
+       path: str (required)
+         the file path of the image (inside of BASE_IMG_PATH)
+       size: list or tuple (not required)
+         the size the image has to be
+    """
+
+    if not atlas_cache:
+        atlas_cache['atlases'] = {} # the atlases are only loaded once an image in them is needed
+        try:
+            with open(f'{ATLAS_PATH}atlas.json', 'r', encoding='UTF-8') as index_file:
+                atlas_cache['index'] = json.load(index_file)
+        except (OSError, ValueError):
+            atlas_cache['index'] = {} # no atlas; every image is loaded by itself
+    item = atlas_cache['index'].get(path)
+    if item is None or (size and tuple(item[3:5]) != tuple(size)):
+        return None
+    try:
+        if os.stat(f'{BASE_IMG_PATH}{path}').st_mtime_ns != item[5]:
+            return None
+        if item[0] not in atlas_cache['atlases']:
+            atlas_cache['atlases'][item[0]] = pg.image.load(f'{ATLAS_PATH}atlas_{item[0]}.png').convert()
+    except (OSError, pg.error):
+        return None
+    return load_img_from_spritesheet(atlas_cache['atlases'][item[0]], pg.Rect(item[1:5]), copy=0)
+
+
+def scientific_notation(num: int or float or BigNumber,
                         condition: int or bool=1,
                         max_decimals: int=3) -> str:
 
     """
     Converts a number to scientific notation.
-       num: int or float (required)
+       num: int, float, or BigNumber (required)
          the number to convert to scientific notation
        condition: int or bool (not required)
          True or False; True for yes convert, false for no convert
@@ -163,11 +402,58 @@ def scientific_notation(num: int or float,
     """
 
     if condition and num:
+        if type(num) is BigNumber: # it can be too big for log10 and floats
+            mantissa, power_of_ten = num.scientific()
+            return f'{round(mantissa, max_decimals)} x 10^{power_of_ten}'
         power_of_ten = math.floor(math.log10(abs(num))) # I use abs so that it will work with negative numbers, rest is takeen care of
         return f'{round(num / 10**power_of_ten, max_decimals)} x 10^{power_of_ten}'
     return str(num)
 
 
+def render_text(font: pg.font.Font,
+                text: str,
+                antialias: int or bool,
+                color: tuple or pg.Color,
+                bgcolor: tuple or pg.Color=None,
+                wraplength: int=0,
+                scale: tuple=(1, 1)) -> pg.Surface:
+
+    """
+    Renders text using the text cache. The returned surface is
+    shared, so copy it before changing it (set_alpha, set_colorkey, etc).
+       font: pygame.font.Font (required)
+         the font to render the text with
+       text: str (required)
+         the text to render
+       antialias: int or bool (required)
+         True or False; same as in pygame.font.Font.render
+       color: tuple or pygame.Color (required)
+         the color of the text
+       bgcolor: tuple or pygame.Color (not required)
+         the color of the background; None for transparent
+       wraplength: int (not required)
+         the width in pixels before the text wraps; 0 for no wrapping
+       scale: tuple (not required)
+         the amount to scale the render by on each axis
+    """
+
+    # fonts are hashed by identity, so fonts with different aligns are different keys
+    key = (font, text, bool(antialias), tuple(color), bgcolor and tuple(bgcolor), wraplength, tuple(scale))
+    render = text_cache.get(key)
+    if render:
+        text_cache.move_to_end(key)
+        text_cache_stats['hits'] += 1
+        return render
+    text_cache_stats['misses'] += 1
+    render = font.render(text, antialias, color, bgcolor, wraplength)
+    if tuple(scale) != (1, 1):
+        render = pg.transform.scale_by(render, scale)
+    text_cache[key] = render
+    if len(text_cache) > TEXT_CACHE_SIZE:
+        text_cache.popitem(last=0)
+    return render
+
+
 def center_word_on_image(image: pg.Surface,
                          text_ratio: int or float=1,
                          text_sequence: image_list=[pg.Surface((0, 0))],
@@ -248,7 +534,8 @@ def math_eval(string: str,
               return_type: type=float) -> object:
     
     """
-    Evaluates string expressions safely.
+    Evaluates string expressions safely. only numbers and the operators in MATH_EVAL_OPERATORS are allowed
+    (^ and x also work for powers and multiplying), and numbers can't have more than MATH_EVAL_MAX_DIGITS digits.
        string: str (required)
          the string expression
        exception_number: int or float (required)
@@ -258,25 +545,98 @@ def math_eval(string: str,
     """
 
     try:
-        return return_type(eval(''.join(list((filter(lambda x: x in '0123456789^*/%+-().', string.replace('^', '**').replace('x', '*')))))))
-        # I add the float() because then it will raise an exception if above 4300 digits. else, it would return it and the exception would happen outside of the function
-    except:
+        expression = ast.parse(''.join(filter(lambda x: x in '0123456789*/%+-().', string.replace('^', '**').replace('x', '*'))), mode='eval')
+        return return_type(math_eval_node(expression.body, [MATH_EVAL_MAX_STEPS]))
+    except (SyntaxError, ValueError, TypeError, ArithmeticError, RecursionError, MemoryError):
         return exception_number
 
 
-def last_index_greater_than_zero(number_list: list or tuple,
-                                 exception_number: int=0) -> int:
+def math_eval_node(node: ast.AST,
+                   steps: list) -> int or float:
+
+    """
+    Evaluates a node of a parsed expression for math_eval. raises ValueError if the node isn't allowed or is too big.
+       node: ast.AST (required)
+         the node of the expression
+       steps: list[int] (required)
+         the amount of nodes that can still be evaluated (in a list so it is shared by all the nodes)
+    """
+
+    steps[0] -= 1
+    if steps[0] < 0:
+        raise ValueError('the expression is too long')
+    if type(node) is ast.Constant and type(node.value) in (int, float):
+        value = node.value
+    elif type(node) is ast.UnaryOp and type(node.op) in MATH_EVAL_OPERATORS:
+        value = MATH_EVAL_OPERATORS[type(node.op)](math_eval_node(node.operand, steps))
+    elif type(node) is ast.BinOp and type(node.op) in MATH_EVAL_OPERATORS:
+        left, right = math_eval_node(node.left, steps), math_eval_node(node.right, steps)
+        # powers are the only operator that can make a number too big to calculate quickly, so they are checked before.
+        # the others can at most double the digits of a number that isn't too big
+        if type(node.op) is ast.Pow and type(left) is int and type(right) is int and right > 0 and (abs(left).bit_length() - 1) * right > MATH_EVAL_MAX_BITS:
+            raise ValueError('the number is too big')
+        value = MATH_EVAL_OPERATORS[type(node.op)](left, right)
+    else:
+        raise ValueError(f'{type(node).__name__} isn\'t allowed')
+    if type(value) is int:
+        if value.bit_length() > MATH_EVAL_MAX_BITS:
+            raise ValueError('the number is too big')
+    elif type(value) is not float or not math.isfinite(value): # complex numbers (like (-1)**0.5) aren't allowed either
+        raise ValueError('the number isn\'t a real number')
+    return value
+
+
+class DialogueFrame(object):
 
     """
-    Returns the index of the last number greater than zero.
-       exception_number: int (not required)
-         the number to return if all numbers are zero
+    A frame of a dialogue animation. It is rendered the first time it is used,
+    with font.render, so it wraps exactly like the text always did.
     """
 
-    for i in range(len(number_list) - 1, -1, -1):
-        if number_list[i]:
-            return i
-    return exception_number
+    def __init__(self: object,
+                 text: str,
+                 font_opts: list or tuple,
+                 loaded: list) -> None:
+
+        """
+        The initialization function of the DialogueFrame class.
+           text: str (required)
+             the text of the frame
+           font_opts: list or tuple (required)
+             the options for font rendering (same as create_dialogue_animation)
+           loaded: list (required)
+             the frames of the dialogue that are loaded; it is shared by all the frames of the dialogue
+        """
+
+        self.text = text
+        self.font_opts = font_opts
+        self.loaded = loaded
+        self.surface = None
+
+    def get(self: object) -> pg.Surface:
+
+        """Returns the frame, rendering it if it is not loaded."""
+
+        if self.surface is None:
+            self.surface = self.font_opts[0].render(self.text, self.font_opts[1], self.font_opts[2], bgcolor=self.font_opts[3], wraplength=self.font_opts[4])
+            self.surface.set_colorkey((0, 0, 0))
+            # only the newest frames of a dialogue stay loaded, since it only plays forwards
+            self.loaded.append(self)
+            if len(self.loaded) > 2:
+                self.loaded[0].release()
+        return self.surface
+
+    def release(self: object) -> None:
+
+        """Unloads the frame. It will be rendered again the next time it is used."""
+
+        self.surface = None
+        if self in self.loaded:
+            self.loaded.remove(self)
+
+    def get_size(self: object) -> tuple:
+        # the size depends on how the text wraps, so the frame is rendered (it is about to be shown anyway)
+        return self.get().get_size()
 
 
 def create_dialogue_animation(text: str,
@@ -284,6 +644,7 @@ def create_dialogue_animation(text: str,
 
     """
     Creates an animation where characters are added one by one.
+    The frames are rendered when they are shown (see DialogueFrame).
        text: str (required)
          the text to use in the animation
        font_opts: list or tuple (required)
@@ -295,14 +656,14 @@ def create_dialogue_animation(text: str,
            4: wraplength
     """
 
+    loaded = []
     image_list = []
     for i in range(len(text)):
-        rendered_text = font_opts[0].render(text[:i + 1], font_opts[1], font_opts[2], bgcolor=font_opts[3], wraplength=font_opts[4])
-        rendered_text.set_colorkey((0, 0, 0))
+        frame = DialogueFrame(text[:i + 1], font_opts, loaded)
         for j in range((text[i] in ',.;:!') * 2 + 1):
             # adding extra images so that it pauses on punctuation. 
             # Since the repeated frames refer to the same memory address, a sound will not play multiple times when showing dialogue; only once
-            image_list.append(rendered_text)
+            image_list.append(frame)
     return image_list
 
 
@@ -0,0 +1,102 @@
+'Tests for modules/bignumber.py -- equality, hashing, comparisons, and json round trips'
+
+import json
+import random
+from fractions import Fraction
+import pytest
+from modules.bignumber import (
+        BigNumber,
+        EXACT_INT_MAX,
+        MANTISSA_MAX,
+        )
+
+# ints around the limits where BigNumber stops being exact and starts using an exponent
+EDGE_INTS = [value + offset for value in (EXACT_INT_MAX, int(MANTISSA_MAX), 10**17, 10**20, 10**308, 10**400)
+             for offset in (-2, -1, 0, 1, 2)]
+
+
+def random_ints(seed: int,
+                amount: int=500) -> list:
+
+    """Returns random ints of many sizes (positive and negative)."""
+
+    rng = random.Random(seed)
+    return [rng.choice((1, -1)) * rng.randint(0, 10**rng.randint(0, 500)) for i in range(amount)]
+
+
+@pytest.mark.parametrize('value', EDGE_INTS + [0, 1, -1, 2.5, -0.1, 1e300, 123456789.125])
+def test_equal_numbers_have_equal_hashes(value: int or float) -> None:
+    number = BigNumber(value)
+    # the number hashes like the exact value it stores, and only equals the value if it stores it exactly
+    assert hash(number) == hash(number.exact())
+    if number.exact() == value:
+        assert number == value and hash(number) == hash(value)
+        assert len({number, value}) == 1
+    else:
+        assert number != value
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_hash_matches_the_exact_value(seed: int) -> None:
+    for value in random_ints(seed):
+        number = BigNumber(value)
+        assert hash(number) == hash(number.exact())
+        assert hash(-number) == hash(-number.exact())
+
+
+def test_big_ints_are_not_interchangeable_with_their_neighbors() -> None:
+    number = BigNumber(10**20)
+    assert number == 10**20 and hash(number) == hash(10**20)
+    assert number != 10**20 + 1 and number < 10**20 + 1 and number > 10**20 - 1
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_compare_matches_exact_values(seed: int) -> None:
+    values = random_ints(seed, 200) + EDGE_INTS
+    rng = random.Random(seed)
+    for value in values:
+        other = rng.choice((value, value + rng.randint(-3, 3), rng.choice(values)))
+        number, exact_value = BigNumber(value), BigNumber(value).exact()
+        # against ints, the stored (rounded) value is compared exactly
+        assert (number < other) == (exact_value < other)
+        assert (number <= other) == (exact_value <= other)
+        assert (number > other) == (exact_value > other)
+        assert (number >= other) == (exact_value >= other)
+        assert (number == other) == (exact_value == other)
+        # against other big numbers too
+        other_number = BigNumber(other)
+        assert (number < other_number) == (exact_value < other_number.exact())
+        assert (number == other_number) == (exact_value == other_number.exact())
+
+
+def test_compare_with_floats() -> None:
+    assert BigNumber('1e400') > 1e308 and BigNumber('1e400') < float('inf')
+    assert BigNumber('-1e400') < -1e308 and BigNumber('-1e400') > float('-inf')
+    assert BigNumber(0.5) == 0.5 and BigNumber(0.5) < 1
+
+
+@pytest.mark.parametrize('value', EDGE_INTS + [0, 7, -7, 2.5, 1e300, '1.5e400', '-2.25e5000', '9.999999999999999e99999'])
+def test_json_round_trip(value: int or float or str) -> None:
+    number = BigNumber(value)
+    loaded = BigNumber(json.loads(json.dumps(number.to_json())))
+    assert loaded == number and hash(loaded) == hash(number)
+    assert (loaded.mantissa, loaded.exponent) == (number.mantissa, number.exponent)
+
+
+def test_small_ints_stay_exact() -> None:
+    for value in (0, 1, 12345, EXACT_INT_MAX - 1):
+        number = BigNumber(value)
+        assert number.to_json() == value and type(number.to_json()) is int
+        assert str(number) == str(value) and int(number) == value
+    total = BigNumber(0)
+    for i in range(1000):
+        total += 7
+    assert total == 7000
+
+
+def test_arithmetic_is_close_to_exact() -> None:
+    for value in random_ints(9, 300):
+        other = random.Random(value).randint(1, 10**40)
+        for result, expected in ((BigNumber(value) + other, value + other), (BigNumber(value) * other, value * other),
+                                 (BigNumber(value) - other, value - other), (BigNumber(value) / other, Fraction(value, other))):
+            assert abs(result.exact() - expected) <= abs(expected) * Fraction(1, 10**14) + 1
@@ -0,0 +1,119 @@
+'Tests for modules/economy.py -- offline progress against growing and harvesting the trees one step at a time'
+
+import random
+import pytest
+from modules.economy import (
+        TreeFarm,
+        offline_progress,
+        update_passive_income,
+        update_tree_farm,
+        COOKIE_GROW_SECONDS,
+        )
+
+GROW_SECONDS = 10 # a short grow time so the tests can step through many grows
+
+
+def step_by_step(tree_farm: TreeFarm,
+                 auto_harvesters: int,
+                 seconds: int,
+                 cookies_per_day_counter: int=0,
+                 cookies_per_second: int=0) -> tuple:
+
+    """Returns what offline_progress should return, found by running the game's seconds (update_passive_income and update_tree_farm) one at a time."""
+
+    save_data = {'cookie_tree_values': tree_farm.copy(), 'auto_harvesters': auto_harvesters, 'cookies_per_day_counter': cookies_per_day_counter,
+                 'cookies_per_second': cookies_per_second, 'score': 0, 'total_baked_cookies': 0}
+    for second in range(seconds):
+        update_passive_income(save_data)
+        update_tree_farm(save_data, GROW_SECONDS)
+    return save_data['cookie_tree_values'], save_data['total_baked_cookies'], save_data['cookies_per_day_counter']
+
+
+def list_step(tree_values: list,
+              auto_harvesters: int) -> int:
+
+    """Grows and harvests trees stored as a plain list (like the save data) and returns the cookies harvested."""
+
+    tree_values[-1] += tree_values[-2]
+    tree_values[1:-1] = tree_values[:-2]
+    tree_values[0] = 0
+    cookies = 0
+    for amount in range(len(tree_values) - 1, 0, -1):
+        harvested = min(tree_values[amount], auto_harvesters)
+        tree_values[amount] -= harvested
+        tree_values[0] += harvested
+        auto_harvesters -= harvested
+        cookies += harvested * amount
+    return cookies
+
+
+def random_farm(rng: random.Random) -> list:
+
+    """Returns random tree values (some empty cookie amounts, some small, some big)."""
+
+    return [rng.choice((0, 0, rng.randint(1, 5), rng.randint(1, 1000))) for i in range(11)]
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_offline_progress_matches_step_by_step(seed: int) -> None:
+    rng = random.Random(seed)
+    tree_values = random_farm(rng)
+    auto_harvesters = rng.choice((0, rng.randint(1, 10), rng.randint(1, 5000)))
+    counter = rng.randrange(GROW_SECONDS)
+    cookies_per_second = rng.choice((0, rng.randint(1, 100)))
+    # 0 grows, fewer grows than max_cookies, and more grows than max_cookies
+    for grows in (0, rng.randint(1, 9), rng.randint(11, 40)):
+        seconds = grows * GROW_SECONDS + rng.randrange(GROW_SECONDS - counter)
+        farm, cookies, new_counter = offline_progress(TreeFarm(tree_values), auto_harvesters, seconds, counter, GROW_SECONDS, cookies_per_second)
+        expected_farm, expected_cookies, expected_counter = step_by_step(TreeFarm(tree_values), auto_harvesters, seconds, counter, cookies_per_second)
+        assert (farm.to_list(), cookies, new_counter) == (expected_farm.to_list(), expected_cookies, expected_counter)
+
+
+@pytest.mark.parametrize('tree_values, auto_harvesters', [
+        ([0] * 11, 5), # no trees
+        ([3, 0, 7, 0, 0, 0, 0, 0, 0, 0, 2], 0), # no harvesters
+        ([0] * 11, 0),
+        ])
+def test_offline_progress_edge_cases(tree_values: list,
+                                     auto_harvesters: int) -> None:
+    for grows in (0, 4, 10, 11, 25):
+        seconds = grows * GROW_SECONDS + 4
+        farm, cookies, counter = offline_progress(TreeFarm(tree_values), auto_harvesters, seconds, 3, GROW_SECONDS)
+        expected_farm, expected_cookies, expected_counter = step_by_step(TreeFarm(tree_values), auto_harvesters, seconds, 3)
+        assert (farm.to_list(), cookies, counter) == (expected_farm.to_list(), expected_cookies, expected_counter)
+        if not auto_harvesters:
+            assert cookies == 0
+
+
+def test_offline_progress_leaves_the_farm_unchanged() -> None:
+    tree_farm = TreeFarm([1, 2, 3, 0, 0, 0, 0, 0, 0, 0, 4])
+    offline_progress(tree_farm, 3, 50 * COOKIE_GROW_SECONDS)
+    assert tree_farm.to_list() == [1, 2, 3, 0, 0, 0, 0, 0, 0, 0, 4]
+
+
+def test_offline_progress_negative_seconds() -> None:
+    # the clock went back (or the last logout is in the future), so nothing happens
+    farm, cookies, counter = offline_progress(TreeFarm([1, 2, 3, 0, 0, 0, 0, 0, 0, 0, 4]), 3, -500, 3, GROW_SECONDS, 7)
+    assert (farm.to_list(), cookies, counter) == ([1, 2, 3, 0, 0, 0, 0, 0, 0, 0, 4], 0, 3)
+
+
+def test_offline_progress_passive_income() -> None:
+    farm, cookies, counter = offline_progress(TreeFarm(), 0, 1000, 5, cookies_per_second=7)
+    assert cookies == 7000 and counter == 5 # the counter doesn't count without trees (see update_tree_farm)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_tree_farm_matches_list(seed: int) -> None:
+    rng = random.Random(seed)
+    tree_values = random_farm(rng)
+    tree_farm = TreeFarm(tree_values)
+    for step in range(40):
+        if rng.random() < 0.2:
+            trees = rng.randint(1, 100)
+            tree_farm.plant(trees)
+            tree_values[0] += trees
+        auto_harvesters = rng.choice((0, rng.randint(1, 50), rng.randint(1, 5000)))
+        tree_farm.grow()
+        assert tree_farm.harvest(auto_harvesters) == list_step(tree_values, auto_harvesters)
+        assert tree_farm.to_list() == tree_values
+        assert tree_farm.trees == sum(tree_values) and tree_farm.ripe_trees == sum(tree_values[1:])
@@ -0,0 +1,40 @@
+'Tests for main.py -- a headless game (they need the fonts in data/font, which are not in the repo)'
+
+import os
+import json
+import time
+import pytest
+import pygame as pg
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_PATHS = [os.path.join(REPO_DIR, 'data', 'font', font) for font in ('Pixbob.ttf', 'Pixbob_Bold.ttf')]
+pytestmark = pytest.mark.skipif(not all(os.path.exists(path) for path in FONT_PATHS), reason='the fonts aren\'t in data/font')
+
+
+@pytest.fixture
+def game(tmp_path: object,
+         monkeypatch: object) -> object:
+
+    """Returns a headless game with the intro already watched. it runs in a temporary folder, so the repo's saves aren't changed."""
+
+    (tmp_path / 'data' / 'save').mkdir(parents=True)
+    for folder in ('images', 'sounds', 'font'):
+        os.symlink(os.path.join(REPO_DIR, 'data', folder), tmp_path / 'data' / folder)
+    with open(tmp_path / 'data' / 'save' / 'save.json', 'w', encoding='UTF-8') as save_file:
+        json.dump({'score': 0, 'total_baked_cookies': 0, 'cookies_per_second': 0, 'cookies_per_click': 1, 'cookies_per_day_counter': 0,
+                   'last_logout': time.time(), 'cookie_tree_values': [0] * 11, 'auto_harvesters': 0, 'last_cutscene': 0,
+                   'constant_cookies_level': 0, 'special_cookies_level': 0, 'seconds_until_next_special_cookie': 0}, save_file)
+    monkeypatch.chdir(tmp_path)
+    import main
+    return main.Game(headless=1)
+
+
+def test_idle_frames_have_no_dirty_rects(game: object,
+                                         monkeypatch: object) -> None:
+    game.step(120) # the first frames draw the whole screen
+    updates = []
+    monkeypatch.setattr(pg.display, 'update', lambda rects=None: updates.append(list(rects)))
+    game.step(59) # no input and no second timer event
+    assert updates == []
+    game.step(1) # the second timer only blinks the red dot
+    assert len(updates) == 1 and all(rect.width < 64 and rect.height < 64 for rect in updates[0])
@@ -0,0 +1,60 @@
+'Tests for modules/pygwig.py -- the dirty rects of menus, the text of text boxes and the code of buttons'
+
+import pygame as pg
+from modules.pygwig import (
+        Button,
+        TextBox,
+        Menu,
+        )
+
+
+def make_menu() -> Menu:
+
+    """Returns a menu with a background and two buttons (without a game)."""
+
+    return Menu(None, (pg.Surface((64, 64)), None, (0, 0, 0)),
+                [Button(None, 1, (0, 0), {'image': pg.Surface((8, 8))}), Button(None, 1, (16, 16), {'image': pg.Surface((8, 8))})])
+
+
+def test_menu_that_stays_off_has_no_dirty_rects() -> None:
+    menu = make_menu()
+    assert menu.get_blits() == []
+    for frame in range(3):
+        assert menu.get_dirty_rects() == []
+        menu.get_blits()
+
+
+def test_menu_dirty_rects_when_it_turns_on_and_off() -> None:
+    menu = make_menu()
+    menu.on = 1
+    assert menu.get_dirty_rects()[0] == pg.Rect(0, 0, 64, 64)
+    menu.get_blits()
+    assert menu.get_dirty_rects() == []
+    menu.on = 0
+    assert menu.get_dirty_rects()[0] == pg.Rect(0, 0, 64, 64) # the menu has to be drawn over
+    menu.get_blits()
+    assert menu.get_dirty_rects() == []
+    menu.button_list.pop() # changing the buttons of a menu that is off doesn't change the screen
+    assert menu.get_dirty_rects() == []
+
+
+def test_text_box_shows_the_cursor_moved_by_other_code() -> None:
+    pg.font.init()
+    text_box = TextBox(None, 1, (0, 0), {'image': pg.Surface((64, 16))}, [pg.font.Font(None, 10), 0, (255, 255, 255), (0, 0, 0), 64])
+    text_box.focused = 1
+    # like the bulk buy button: the text and the cursor are set by the button's code, not by typing
+    text_box.text = ''
+    text_box.cursor_pos = 0
+    text_box.text = '12345'
+    text_box.cursor_pos = 5
+    assert text_box.render_text == '12345|'
+    rendered_image = text_box.render_image
+    text_box.cursor_pos = 2
+    assert text_box.render_text == '12|345' and text_box.render_image is not rendered_image
+
+
+def test_button_code_can_use_self_in_comprehensions() -> None:
+    button = Button(None, 1, (0, 0), {'image': pg.Surface((8, 8))},
+                    code='self.clicks = [self.size[0] * i for i in range(3)]; self.click_pos = (lambda: event.pos)()')
+    button.handle_events(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(2, 2)))
+    assert button.clicks == [0, 8, 16] and button.click_pos == (2, 2)